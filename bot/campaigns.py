@@ -0,0 +1,158 @@
+"""
+Campaigns: several promos served by one process, each with its own data.
+- CAMPAIGNS_FILE (JSON) maps a slug to overrides of the global settings: name, database_path,
+  archive_dir, photos_dir, admin_ids, staff_ids, prize lists, daily big prizes, subscription channels and texts.
+  Without it the process runs a single "default" campaign from the global settings
+- A user joins a campaign with a deep link (t.me/<bot>?start=<slug>) and stays in it;
+  the choice is stored in the default campaign's database. Admins switch campaigns the same way
+- The campaign of the update being handled lives in a context variable: database functions,
+  prizes, channels and texts read it, so handlers stay campaign-agnostic
+- Tasks inherit the campaign of the update that created them; background loops visit every
+  campaign with for_each_campaign
+"""
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from bot.config import (
+    CAMPAIGNS_FILE,
+    DATABASE_PATH,
+    ARCHIVE_DIR,
+    PHOTOS_DIR,
+    ADMIN_IDS,
+    STAFF_IDS,
+    SMALL_PRIZE_LIST,
+    BIG_PRIZE_LIST,
+    DAILY_BIG_PRIZES,
+    SUBSCRIPTION_CHANNELS
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLUG = "default"
+# Allowed characters of a deep-link start parameter
+SLUG_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+TEXTS = {
+    "welcome": "Здравствуйте! Как вас зовут?\nВ ответе должно быть не менее 2 символов.",
+    "subscribe": "Отлично, номер сохранён.\nПодпишитесь на телеграм-каналы EXEED и «Лужников».\nКак закончите, нажмите «Готово».",
+    "photo_request": "Супер! И финальное:\nСделайте классное фото на катке и отправьте его боту.",
+    "pickup": "Чтобы получить подарок, подойдите на бренд-зону EXEED возле павильона №1 и назовите свой номер участника.",
+}
+
+
+@dataclass(frozen=True, eq=False)
+class Campaign:
+    slug: str
+    name: str
+    database_path: str
+    archive_dir: str
+    photos_dir: str
+    admin_ids: frozenset[int]
+    staff_ids: frozenset[int]
+    small_prize_list: tuple[str, ...]
+    big_prize_list: tuple[str, ...]
+    daily_big_prizes: int
+    channels: tuple[dict, ...]
+    texts: dict[str, str] = field(default_factory=dict)
+
+    def text(self, key: str) -> str:
+        return self.texts.get(key) or TEXTS[key]
+
+
+def _campaign(slug: str, settings: dict) -> Campaign:
+    """A campaign from its JSON settings; anything not set falls back to the global settings."""
+    if not SLUG_PATTERN.match(slug):
+        raise ValueError(f"Campaign slug {slug!r} is not a valid deep-link parameter")
+    unknown = set(settings.get("texts", {})) - set(TEXTS)
+    if unknown:
+        raise ValueError(f"Campaign {slug}: unknown texts {', '.join(sorted(unknown))}")
+
+    data_dir = os.path.join(os.path.dirname(DATABASE_PATH), "campaigns", slug)
+    admin_ids = frozenset(settings.get("admin_ids", ())) | ADMIN_IDS
+    return Campaign(
+        slug=slug,
+        name=settings.get("name", slug),
+        database_path=settings.get("database_path", os.path.join(data_dir, "database.db")),
+        archive_dir=settings.get("archive_dir", os.path.join(data_dir, "archive")),
+        photos_dir=settings.get("photos_dir", os.path.join(data_dir, "photos")),
+        # Global admins run the whole process and manage every campaign
+        admin_ids=admin_ids,
+        # Brand-zone staff redeem prizes of their campaign only; global staff and admins work everywhere
+        staff_ids=frozenset(settings.get("staff_ids", ())) | STAFF_IDS | admin_ids,
+        small_prize_list=tuple(settings.get("small_prize_list", SMALL_PRIZE_LIST)),
+        big_prize_list=tuple(settings.get("big_prize_list", BIG_PRIZE_LIST)),
+        daily_big_prizes=int(settings.get("daily_big_prizes", DAILY_BIG_PRIZES)),
+        channels=tuple(settings.get("channels", SUBSCRIPTION_CHANNELS)),
+        texts=dict(settings.get("texts", {}))
+    )
+
+
+def load_campaigns(path: str = CAMPAIGNS_FILE) -> dict[str, Campaign]:
+    """The default campaign (global settings) plus the ones defined in `path`."""
+    campaigns = {
+        DEFAULT_SLUG: Campaign(
+            slug=DEFAULT_SLUG,
+            name=DEFAULT_SLUG,
+            database_path=DATABASE_PATH,
+            archive_dir=ARCHIVE_DIR,
+            photos_dir=PHOTOS_DIR,
+            admin_ids=frozenset(ADMIN_IDS),
+            staff_ids=frozenset(STAFF_IDS),
+            small_prize_list=tuple(SMALL_PRIZE_LIST),
+            big_prize_list=tuple(BIG_PRIZE_LIST),
+            daily_big_prizes=DAILY_BIG_PRIZES,
+            channels=tuple(SUBSCRIPTION_CHANNELS)
+        )
+    }
+    if path:
+        with open(path, encoding="utf-8") as f:
+            for slug, settings in json.load(f).items():
+                campaigns[slug] = _campaign(slug, settings)
+    return campaigns
+
+
+CAMPAIGNS = load_campaigns()
+DEFAULT_CAMPAIGN = CAMPAIGNS[DEFAULT_SLUG]
+
+_current: ContextVar[Campaign] = ContextVar("campaign", default=DEFAULT_CAMPAIGN)
+
+
+def current_campaign() -> Campaign:
+    """Campaign of the update (or background pass) being handled."""
+    return _current.get()
+
+
+def get_campaign(slug: str) -> Campaign | None:
+    return CAMPAIGNS.get(slug)
+
+
+@contextmanager
+def use_campaign(campaign: Campaign):
+    """Run the block in `campaign`."""
+    token = _current.set(campaign)
+    try:
+        yield campaign
+    finally:
+        _current.reset(token)
+
+
+async def for_each_campaign(work: Callable[[], Awaitable]) -> dict[str, object]:
+    """
+    Run `work()` once per campaign (in that campaign), one after another.
+    A failing campaign is logged and gets None; the others still run.
+    """
+    results = {}
+    for slug, campaign in CAMPAIGNS.items():
+        with use_campaign(campaign):
+            try:
+                results[slug] = await work()
+            except Exception as e:
+                logger.error(f"Campaign {slug}: {getattr(work, '__name__', 'work')} failed: {e}")
+                results[slug] = None
+    return results
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -6,6 +7,10 @@ load_dotenv()
 # Bot token
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 
+# Roles (comma-separated Telegram IDs): admins manage the bot, staff redeem prizes at the brand zone
+ADMIN_IDS = {int(x) for x in os.getenv("ADMIN_IDS", "802692559").split(",") if x.strip()}
+STAFF_IDS = {int(x) for x in os.getenv("STAFF_IDS", "").split(",") if x.strip()} | ADMIN_IDS
+
 # Channel configuration
 EXEED_CHANNEL_ID = os.getenv("EXEED_CHANNEL_ID", "@exeedrussia")
 LUZHNIKI_CHANNEL_ID = os.getenv("LUZHNIKI_CHANNEL_ID", "@luzhniki_life")
@@ -13,6 +18,15 @@ EXEED_CHANNEL_URL = os.getenv("EXEED_CHANNEL_URL", "https://t.me/exeedrussia")
 LUZHNIKI_CHANNEL_URL = os.getenv("LUZHNIKI_CHANNEL_URL", "https://t.me/luzhniki_life")
 STORAGE_CHANNEL_ID = os.getenv("STORAGE_CHANNEL_ID", "")
 
+# Subscription channels, in keyboard order (JSON list of {"id", "url", "name", "button", "verify"}).
+# "verify": false channels are only linked - the bot cannot read their member list
+SUBSCRIPTION_CHANNELS = json.loads(os.getenv("SUBSCRIPTION_CHANNELS") or "null") or [
+    {"id": EXEED_CHANNEL_ID, "url": EXEED_CHANNEL_URL, "name": "EXEED", "button": "📢 EXEED Russia", "verify": True},
+    {"id": LUZHNIKI_CHANNEL_ID, "url": LUZHNIKI_CHANNEL_URL, "name": "Лужники", "button": "🏟 Лужники", "verify": False},
+]
+# One deadline for all membership checks of a user (seconds); unanswered channels count as subscribed
+SUBSCRIPTION_CHECK_TIMEOUT = float(os.getenv("SUBSCRIPTION_CHECK_TIMEOUT", "5"))
+
 # Randomizer settings (2 days, ~6000 visitors per day)
 DAILY_SMALL_PRIZES = int(os.getenv("DAILY_SMALL_PRIZES", "100"))  # маленькие подарки
 DAILY_BIG_PRIZES = int(os.getenv("DAILY_BIG_PRIZES", "5"))        # большие подарки
@@ -26,3 +40,99 @@ BIG_PRIZE_LIST = os.getenv("BIG_PRIZE_LIST", "Термокружка,Шарф,Ш
 PHOTOS_DIR = os.getenv("PHOTOS_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "photos"))
 DATABASE_PATH = os.getenv("DATABASE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "database.db"))
 
+
+# Campaigns hosted by this process (JSON file: slug -> overrides), empty = single campaign
+CAMPAIGNS_FILE = os.getenv("CAMPAIGNS_FILE", "")
+
+# Registration buffering: keep name/phone in FSM data and write them once at the photo step
+BUFFER_REGISTRATION = os.getenv("BUFFER_REGISTRATION", "true").lower() in ("1", "true", "yes")
+
+# How often aggregated funnel counters are flushed to the database (seconds)
+FUNNEL_FLUSH_INTERVAL = int(os.getenv("FUNNEL_FLUSH_INTERVAL", "60"))
+
+# Database backups to the storage channel (interval in seconds, 0 disables the schedule)
+BACKUP_INTERVAL = int(os.getenv("BACKUP_INTERVAL", "1800"))
+
+# Per-day archives of completed participants (one SQLite file per event day)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(os.path.dirname(DATABASE_PATH), "archive"))
+ARCHIVE_CHECK_INTERVAL = int(os.getenv("ARCHIVE_CHECK_INTERVAL", "600"))
+
+# Storage channel forwarding: photos are sent as albums of up to STORAGE_BATCH_SIZE
+STORAGE_BATCH_SIZE = min(int(os.getenv("STORAGE_BATCH_SIZE", "10")), 10)
+STORAGE_BATCH_TIMEOUT = float(os.getenv("STORAGE_BATCH_TIMEOUT", "3"))
+STORAGE_MAX_RETRIES = int(os.getenv("STORAGE_MAX_RETRIES", "5"))
+
+# Outbox: retries of failed non-interactive Bot API sends
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BASE_DELAY = float(os.getenv("OUTBOX_BASE_DELAY", "5"))
+OUTBOX_MAX_DELAY = float(os.getenv("OUTBOX_MAX_DELAY", "900"))
+
+# Broadcasts to participants
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))          # messages per second (Telegram allows ~30)
+BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "10"))
+BROADCAST_PROGRESS_INTERVAL = float(os.getenv("BROADCAST_PROGRESS_INTERVAL", "10"))
+
+# Duplicate photo detection (perceptual hash, Hamming distance out of 64 bits)
+PHASH_RADIUS = int(os.getenv("PHASH_RADIUS", "6"))
+PHASH_WORKERS = int(os.getenv("PHASH_WORKERS", "2"))
+
+# Update scheduling: concurrent handler limit and backlog size at which chatter is dropped
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "32"))
+SCHEDULER_SHED_DEPTH = int(os.getenv("SCHEDULER_SHED_DEPTH", "200"))
+# Updates taken from polling and not finished yet (0 = unlimited); past it polling pauses and
+# the rest waits at Telegram. Keep it above SCHEDULER_WORKERS + SCHEDULER_SHED_DEPTH, or chatter is never shed
+POLLING_TASK_LIMIT = int(os.getenv("POLLING_TASK_LIMIT", "1000"))
+
+# Waiting room: max users in the journey at once (0 = unlimited), others wait in a virtual queue
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", "0"))
+ADMISSION_JOURNEY_TIMEOUT = int(os.getenv("ADMISSION_JOURNEY_TIMEOUT", "900"))
+ADMISSION_UPDATE_INTERVAL = float(os.getenv("ADMISSION_UPDATE_INTERVAL", "3"))
+ADMISSION_EDITS_PER_TICK = int(os.getenv("ADMISSION_EDITS_PER_TICK", "20"))
+
+# Photo export: ZIP parts must fit the Bot API upload limit (50 MB)
+PHOTO_EXPORT_PART_SIZE = int(os.getenv("PHOTO_EXPORT_PART_SIZE", str(45 * 1024 * 1024)))
+
+# Logging: records go through a bounded queue to a writer thread (json or text lines)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_RATE_LIMIT = float(os.getenv("LOG_RATE_LIMIT", "5"))          # warnings/errors per second per logger
+LOG_RATE_BURST = int(os.getenv("LOG_RATE_BURST", "20"))
+
+# Event loop watchdog: lag sampling interval and the stall duration that gets its stack logged (seconds)
+LAG_CHECK_INTERVAL = float(os.getenv("LAG_CHECK_INTERVAL", "0.1"))
+LAG_THRESHOLD = float(os.getenv("LAG_THRESHOLD", "0.25"))
+
+# Run on uvloop when it is installed (pip install uvloop)
+USE_UVLOOP = os.getenv("USE_UVLOOP", "false").lower() in ("1", "true", "yes")
+
+# Bot API HTTP sessions: pool sizes for handler replies and background traffic, timeouts (seconds)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))
+HTTP_BACKGROUND_POOL_SIZE = int(os.getenv("HTTP_BACKGROUND_POOL_SIZE", "20"))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_FAST_TIMEOUT = float(os.getenv("HTTP_FAST_TIMEOUT", "10"))
+HTTP_UPLOAD_TIMEOUT = float(os.getenv("HTTP_UPLOAD_TIMEOUT", "120"))
+
+# Recording of incoming updates (redacted) for replay with `python -m bot.replay`
+RECORD_UPDATES = os.getenv("RECORD_UPDATES", "false").lower() in ("1", "true", "yes")
+RECORD_PATH = os.getenv("RECORD_PATH", os.path.join(os.path.dirname(DATABASE_PATH), "recordings", "updates.jsonl"))
+RECORD_MAX_BYTES = int(os.getenv("RECORD_MAX_BYTES", str(50 * 1024 * 1024)))
+RECORD_BACKUPS = int(os.getenv("RECORD_BACKUPS", "20"))
+
+# On-demand profiling (/profile, /memsnap): sampling interval (seconds), longest run, tracemalloc depth
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.01"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+MEMSNAP_FRAMES = int(os.getenv("MEMSNAP_FRAMES", "5"))
+
+# Graceful shutdown: total budget after SIGTERM (Render allows 30s before SIGKILL) and the part
+# of it in-flight handlers get to finish (seconds)
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "25"))
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "15"))
+
+# Startup: expected boot time (seconds, a longer boot is logged as a warning) and warming of
+# the hot tables into the OS page cache before polling starts
+STARTUP_BUDGET = float(os.getenv("STARTUP_BUDGET", "10"))
+PREWARM_DATABASE = os.getenv("PREWARM_DATABASE", "true").lower() in ("1", "true", "yes")
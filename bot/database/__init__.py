@@ -1,21 +1,97 @@
 from .db import (
     init_db,
+    checkpoint_wal,
     get_or_create_participant,
     update_participant,
     get_next_participant_number,
     get_daily_stats,
     increment_daily_stats,
     delete_participant,
-    get_participant_by_phone
+    get_participant_by_phone,
+    save_registration,
+    increment_funnel_stats,
+    get_funnel_stats,
+    normalize_phone,
+    archive_participants,
+    get_all_participants,
+    get_participant_contacts,
+    clear_archives,
+    enqueue_outbox,
+    get_due_outbox,
+    update_outbox,
+    delete_outbox,
+    get_dead_letters,
+    replay_dead_letters,
+    BROADCAST_SEGMENTS,
+    create_broadcast,
+    get_broadcast,
+    set_broadcast_status,
+    claim_broadcast,
+    get_running_broadcasts,
+    get_pending_recipients,
+    save_recipient_results,
+    assign_participant_number,
+    get_participant_by_number,
+    redeem_prize,
+    get_photo_hashes,
+    get_participation_keys,
+    get_media_file_ids,
+    save_media_file_id,
+    prewarm_database,
+    database_path,
+    write_connection,
+    get_user_campaigns,
+    save_user_campaign,
+    get_settings,
+    save_setting,
+    get_settings_audit
 )
 
 __all__ = [
     "init_db",
+    "checkpoint_wal",
     "get_or_create_participant",
     "update_participant",
     "get_next_participant_number",
     "get_daily_stats",
     "increment_daily_stats",
     "delete_participant",
-    "get_participant_by_phone"
+    "get_participant_by_phone",
+    "save_registration",
+    "increment_funnel_stats",
+    "get_funnel_stats",
+    "normalize_phone",
+    "archive_participants",
+    "get_all_participants",
+    "get_participant_contacts",
+    "clear_archives",
+    "enqueue_outbox",
+    "get_due_outbox",
+    "update_outbox",
+    "delete_outbox",
+    "get_dead_letters",
+    "replay_dead_letters",
+    "BROADCAST_SEGMENTS",
+    "create_broadcast",
+    "get_broadcast",
+    "set_broadcast_status",
+    "claim_broadcast",
+    "get_running_broadcasts",
+    "get_pending_recipients",
+    "save_recipient_results",
+    "assign_participant_number",
+    "get_participant_by_number",
+    "redeem_prize",
+    "get_photo_hashes",
+    "get_participation_keys",
+    "get_media_file_ids",
+    "save_media_file_id",
+    "prewarm_database",
+    "database_path",
+    "write_connection",
+    "get_user_campaigns",
+    "save_user_campaign",
+    "get_settings",
+    "save_setting",
+    "get_settings_audit"
 ]
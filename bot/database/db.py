@@ -1,11 +1,146 @@
+import os
+import json
+import logging
+import asyncio
 import aiosqlite
+from contextlib import asynccontextmanager
 from datetime import date
-from bot.config import DATABASE_PATH
+from bot.campaigns import current_campaign, DEFAULT_CAMPAIGN
+
+logger = logging.getLogger(__name__)
+
+
+# Rows that finished the journey and can move to a day archive
+COMPLETED_CONDITION = "prize_type IS NOT NULL"
+
+
+# Next participant number - archived days keep their numbers, so both tables count
+NEXT_NUMBER_SQL = """
+    SELECT COALESCE(MAX(number), 0) + 1 FROM (
+        SELECT MAX(participant_number) AS number FROM participants
+        UNION ALL
+        SELECT MAX(participant_number) FROM participant_index
+    )
+"""
+
+
+# Broadcast segments: name -> filter over all participants (hot table and archive index)
+BROADCAST_SEGMENTS = {
+    "all": "1",
+    "winners": "is_winner = 1",
+    "big": "prize_type = 'big'",
+    "small": "prize_type = 'small'",
+    "unredeemed": "prize_type IS NOT NULL AND redeemed_at IS NULL",
+    "big_unredeemed": "prize_type = 'big' AND redeemed_at IS NULL",
+}
+
+# Columns shared by the hot table and the archive index, used for segment queries
+ALL_PARTICIPANTS_SQL = """
+    SELECT telegram_id, is_winner, prize_type, redeemed_at FROM participants
+    UNION ALL
+    SELECT telegram_id, is_winner, prize_type, redeemed_at FROM participant_index
+"""
+
+
+def normalize_phone(phone: str) -> str:
+    """Canonical phone key: last 10 digits (ignores country code variations)."""
+    return ''.join(filter(str.isdigit, phone or ''))[-10:]
+
+
+def database_path() -> str:
+    """Database of the current campaign."""
+    return current_campaign().database_path
+
+
+def archive_dir() -> str:
+    """Day archives of the current campaign."""
+    return current_campaign().archive_dir
+
+
+def get_archive_path(day: str) -> str:
+    """Path of the archive database for an event day (YYYY-MM-DD)."""
+    return os.path.join(archive_dir(), f"participants_{day}.db")
+
+
+# Rows per chunk when streaming large reads (exports) to the event loop
+FETCH_CHUNK = 2000
+
+
+async def _fetch_dicts(cursor: aiosqlite.Cursor) -> list[dict]:
+    """
+    Fetch a large result as dicts in chunks.
+    
+    Plain tuples are fetched in the connection thread and converted per chunk,
+    so other handlers (participant writes) keep running during a full export.
+    """
+    columns = [column[0] for column in cursor.description]
+    result = []
+    while True:
+        rows = await cursor.fetchmany(FETCH_CHUNK)
+        if not rows:
+            return result
+        result.extend(dict(zip(columns, row)) for row in rows)
+        await asyncio.sleep(0)
+
+
+@asynccontextmanager
+async def read_connection():
+    """
+    Read-only connection for admin analytics and exports.
+    
+    In WAL mode it reads a consistent snapshot without taking locks that
+    block participant writes; `query_only` guards against accidental writes.
+    """
+    async with aiosqlite.connect(database_path()) as db:
+        await db.execute("PRAGMA query_only = ON")
+        db.row_factory = aiosqlite.Row
+        yield db
+
+
+# Database path -> (event loop, lock) serializing this process's writers
+_write_locks: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = {}
+
+
+@asynccontextmanager
+async def write_connection(path: str = None):
+    """
+    Connection for a write transaction (the current campaign's database by default).
+    
+    SQLite takes one writer at a time and its busy handler polls with growing sleeps,
+    so under many concurrent writers some keep losing the race and fail with
+    "database is locked" once the busy timeout runs out. Writers of this process
+    queue on a lock instead and get the database in arrival order.
+    """
+    path = path or database_path()
+    loop = asyncio.get_running_loop()
+    entry = _write_locks.get(path)
+    if entry is None or entry[0] is not loop:
+        entry = _write_locks[path] = (loop, asyncio.Lock())
+    # Opened before queueing: starting the connection thread needs no lock
+    async with aiosqlite.connect(path) as db:
+        async with entry[1]:
+            yield db
+
+
+async def checkpoint_wal() -> tuple[int, int, int]:
+    """
+    Copy the WAL into the database file and truncate it (shutdown).
+    
+    Returns:
+        (busy, wal_pages, checkpointed_pages) as reported by SQLite
+    """
+    async with aiosqlite.connect(database_path()) as db:
+        cursor = await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return tuple(await cursor.fetchone())
 
 
 async def init_db():
-    """Initialize database tables."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    """Initialize database tables (of the current campaign)."""
+    os.makedirs(os.path.dirname(os.path.abspath(database_path())), exist_ok=True)
+    async with aiosqlite.connect(database_path()) as db:
+        # WAL: readers (exports, analytics) and the writer no longer block each other
+        await db.execute("PRAGMA journal_mode = WAL")
+        
         await db.execute("""
             CREATE TABLE IF NOT EXISTS participants (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -31,12 +166,166 @@ async def init_db():
             )
         """)
         
+        # One row per archived participant: lookup keys and the day archive holding the full row
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS participant_index (
+                telegram_id INTEGER PRIMARY KEY,
+                name TEXT,
+                phone_key TEXT,
+                participant_number INTEGER,
+                is_winner BOOLEAN,
+                prize TEXT,
+                prize_type TEXT,
+                archive_day TEXT NOT NULL
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_participant_index_phone ON participant_index(phone_key)"
+        )
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_participant_index_number ON participant_index(participant_number)"
+        )
+        
+        # Failed Bot API sends waiting for retry ('pending') or given up on ('dead')
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                method TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at REAL DEFAULT 0,
+                last_error TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)"
+        )
+        
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS broadcasts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                text TEXT NOT NULL,
+                segment TEXT NOT NULL,
+                status TEXT DEFAULT 'draft',
+                admin_chat_id INTEGER,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Per-recipient delivery state, lets a broadcast resume after restart
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS broadcast_recipients (
+                broadcast_id INTEGER NOT NULL,
+                telegram_id INTEGER NOT NULL,
+                status TEXT DEFAULT 'pending',
+                error TEXT,
+                PRIMARY KEY (broadcast_id, telegram_id)
+            )
+        """)
+        
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS funnel_stats (
+                date DATE NOT NULL,
+                step TEXT NOT NULL,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (date, step)
+            )
+        """)
+        
+        # Telegram file_ids of uploaded static media, keyed by content hash
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS media_cache (
+                key TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL
+            )
+        """)
+        
+        # Live settings (JSON values overriding the startup config) and their change log
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS settings_audit (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                changed_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                admin_id INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                old_value TEXT,
+                new_value TEXT
+            )
+        """)
+        
+        # Campaign chosen by each user through a deep link (default campaign's database only)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS user_campaigns (
+                telegram_id INTEGER PRIMARY KEY,
+                campaign TEXT NOT NULL
+            )
+        """)
+        
+        # Columns added after the first event day
+        await _ensure_columns(db, "participants", {
+            "redeemed_at": "DATETIME",
+            "redeemed_by": "INTEGER",
+            "photo_hash": "INTEGER",
+            "duplicate_of": "INTEGER",
+            "phone_key": "TEXT"
+        })
+        await _ensure_columns(db, "participant_index", {
+            "redeemed_at": "DATETIME",
+            "redeemed_by": "INTEGER",
+            "photo_hash": "INTEGER"
+        })
+        
+        # Phone duplicate check: an indexed lookup instead of normalizing every row's phone
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_participants_phone_key ON participants(phone_key)"
+        )
+        await db.create_function("normalize_phone", 1, normalize_phone, deterministic=True)
+        await db.execute(
+            "UPDATE participants SET phone_key = normalize_phone(phone) WHERE phone_key IS NULL AND phone IS NOT NULL"
+        )
+        
+        # Staff look winners up by number at the brand zone, and a prize is handed out
+        # once per number - with duplicates a lookup or redemption could hit the wrong person
+        try:
+            await db.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_participants_number ON participants(participant_number)"
+            )
+        except aiosqlite.IntegrityError:
+            cursor = await db.execute(
+                """SELECT participant_number, COUNT(*) FROM participants
+                   WHERE participant_number IS NOT NULL
+                   GROUP BY participant_number HAVING COUNT(*) > 1 LIMIT 20"""
+            )
+            duplicates = ", ".join(f"#{number} x{count}" for number, count in await cursor.fetchall())
+            raise RuntimeError(
+                f"Duplicate participant numbers in {database_path()}: {duplicates}. "
+                f"Renumber them before starting the bot"
+            )
+        # Non-unique index of older versions, superseded by the unique one
+        await db.execute("DROP INDEX IF EXISTS idx_participants_number_dup")
+        
         await db.commit()
 
 
+async def _ensure_columns(db: aiosqlite.Connection, table: str, columns: dict[str, str]) -> None:
+    """Add missing columns to an existing table."""
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in await cursor.fetchall()}
+    for column, column_type in columns.items():
+        if column not in existing:
+            await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
 async def get_or_create_participant(telegram_id: int, username: str = None) -> dict:
-    """Get existing participant or create new one."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    """Get existing participant (including archived ones) or create new one."""
+    async with aiosqlite.connect(database_path()) as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM participants WHERE telegram_id = ?",
@@ -44,12 +333,25 @@ async def get_or_create_participant(telegram_id: int, username: str = None) -> d
         )
         row = await cursor.fetchone()
         
-        if row:
+        if row and row["prize_type"] is not None:
             return dict(row)
         
-        # Create new participant
+        # Finished participants from previous days live in the archive
+        archived = await _find_archived(db, "telegram_id", telegram_id)
+        if archived:
+            return archived
+        
+        if row:
+            return dict(row)
+    
+    # Written on a connection of its own: upgrading the read above to a write fails with
+    # "database is locked" at once (no busy wait) if another writer committed in between
+    async with write_connection() as db:
+        db.row_factory = aiosqlite.Row
+        # A concurrent /start of the same user may have created it first
         await db.execute(
-            "INSERT INTO participants (telegram_id, username) VALUES (?, ?)",
+            """INSERT INTO participants (telegram_id, username) VALUES (?, ?)
+               ON CONFLICT(telegram_id) DO NOTHING""",
             (telegram_id, username)
         )
         await db.commit()
@@ -67,35 +369,36 @@ async def get_participant_by_phone(phone: str) -> dict | None:
     if not phone:
         return None
     
-    # Normalize phone - keep only digits
-    phone_digits = ''.join(filter(str.isdigit, phone))
+    # Normalize phone - last 10 digits (ignoring country code variations)
+    phone_key = normalize_phone(phone)
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with aiosqlite.connect(database_path()) as db:
         db.row_factory = aiosqlite.Row
-        # Search for phone containing these digits
         cursor = await db.execute(
-            "SELECT * FROM participants WHERE phone IS NOT NULL AND prize_type IS NOT NULL"
+            "SELECT * FROM participants WHERE phone_key = ? AND prize_type IS NOT NULL LIMIT 1",
+            (phone_key,)
         )
-        rows = await cursor.fetchall()
-        
-        for row in rows:
-            row_phone_digits = ''.join(filter(str.isdigit, row['phone'] or ''))
-            # Match last 10 digits (ignoring country code variations)
-            if phone_digits[-10:] == row_phone_digits[-10:]:
-                return dict(row)
+        row = await cursor.fetchone()
+        await cursor.close()
+        if row:
+            return dict(row)
         
-        return None
+        # Previous days: indexed lookup, then fetch the full row from its archive
+        return await _find_archived(db, "phone_key", phone_key)
 
 
 async def update_participant(telegram_id: int, **kwargs) -> None:
     """Update participant fields."""
     if not kwargs:
         return
+    if "phone" in kwargs:
+        # Kept next to the phone for the indexed duplicate check
+        kwargs["phone_key"] = normalize_phone(kwargs["phone"]) if kwargs["phone"] else None
     
     fields = ", ".join(f"{k} = ?" for k in kwargs.keys())
     values = list(kwargs.values()) + [telegram_id]
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with write_connection() as db:
         await db.execute(
             f"UPDATE participants SET {fields} WHERE telegram_id = ?",
             values
@@ -103,13 +406,71 @@ async def update_participant(telegram_id: int, **kwargs) -> None:
         await db.commit()
 
 
-async def get_next_participant_number() -> int:
-    """Get next sequential participant number."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+async def save_registration(
+    telegram_id: int,
+    username: str = None,
+    name: str = None,
+    phone: str = None,
+    photo_path: str = None
+) -> int:
+    """
+    Persist buffered registration fields in one upsert.
+    
+    The next participant number is assigned inside the same statement,
+    so the whole registration costs a single write transaction. A participant
+    who already drew keeps their record untouched, and a number once given is
+    never replaced.
+    
+    Returns:
+        int: the participant's number
+    """
+    async with write_connection() as db:
+        cursor = await db.execute(
+            f"""INSERT INTO participants
+                   (telegram_id, username, name, phone, phone_key, photo_path, participant_number)
+               VALUES (?, ?, ?, ?, ?, ?, ({NEXT_NUMBER_SQL}))
+               ON CONFLICT(telegram_id) DO UPDATE SET
+                   username = COALESCE(excluded.username, username),
+                   name = COALESCE(excluded.name, name),
+                   phone = COALESCE(excluded.phone, phone),
+                   phone_key = COALESCE(excluded.phone_key, phone_key),
+                   photo_path = excluded.photo_path,
+                   participant_number = COALESCE(participant_number, excluded.participant_number)
+               WHERE participants.prize_type IS NULL
+               RETURNING participant_number""",
+            (telegram_id, username, name, phone, normalize_phone(phone) if phone else None, photo_path)
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+        if row is None:
+            # Already drew: the finished record and its number stay as they are
+            cursor = await db.execute(
+                "SELECT participant_number FROM participants WHERE telegram_id = ?",
+                (telegram_id,)
+            )
+            row = await cursor.fetchone()
+        await db.commit()
+        return row[0]
+
+
+async def assign_participant_number(telegram_id: int) -> int:
+    """Atomically give the participant the next free number and return it."""
+    async with write_connection() as db:
         cursor = await db.execute(
-            "SELECT COALESCE(MAX(participant_number), 0) + 1 FROM participants"
+            f"""UPDATE participants SET participant_number = ({NEXT_NUMBER_SQL})
+                WHERE telegram_id = ? RETURNING participant_number""",
+            (telegram_id,)
         )
         row = await cursor.fetchone()
+        await db.commit()
+        return row[0]
+
+
+async def get_next_participant_number() -> int:
+    """Get next sequential participant number."""
+    async with aiosqlite.connect(database_path()) as db:
+        cursor = await db.execute(NEXT_NUMBER_SQL)
+        row = await cursor.fetchone()
         return row[0]
 
 
@@ -118,7 +479,7 @@ async def get_daily_stats(target_date: date = None) -> dict:
     if target_date is None:
         target_date = date.today()
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with aiosqlite.connect(database_path()) as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM daily_stats WHERE date = ?",
@@ -128,27 +489,28 @@ async def get_daily_stats(target_date: date = None) -> dict:
         
         if row:
             return dict(row)
-        
-        # Create new daily stats
+    
+    # Create new daily stats
+    async with write_connection() as db:
         await db.execute(
-            "INSERT INTO daily_stats (date, participants_count, small_prizes_given, big_prizes_given) VALUES (?, 0, 0, 0)",
+            "INSERT OR IGNORE INTO daily_stats (date, participants_count, small_prizes_given, big_prizes_given) VALUES (?, 0, 0, 0)",
             (target_date.isoformat(),)
         )
         await db.commit()
-        
-        return {
-            "date": target_date.isoformat(),
-            "participants_count": 0,
-            "small_prizes_given": 0,
-            "big_prizes_given": 0
-        }
+    
+    return {
+        "date": target_date.isoformat(),
+        "participants_count": 0,
+        "small_prizes_given": 0,
+        "big_prizes_given": 0
+    }
 
 
 async def increment_daily_stats(small_prizes: int = 0, big_prizes: int = 0, participants: int = 0) -> None:
     """Increment daily statistics."""
     today = date.today().isoformat()
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with write_connection() as db:
         # Ensure row exists
         await db.execute(
             "INSERT OR IGNORE INTO daily_stats (date, participants_count, small_prizes_given, big_prizes_given) VALUES (?, 0, 0, 0)",
@@ -167,11 +529,578 @@ async def increment_daily_stats(small_prizes: int = 0, big_prizes: int = 0, part
 
 
 async def delete_participant(telegram_id: int) -> bool:
-    """Delete a participant from database."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    """Delete a participant from database (and from the archive index)."""
+    async with write_connection() as db:
         cursor = await db.execute(
             "DELETE FROM participants WHERE telegram_id = ?",
             (telegram_id,)
         )
+        deleted = cursor.rowcount > 0
+        
+        cursor = await db.execute(
+            "DELETE FROM participant_index WHERE telegram_id = ?",
+            (telegram_id,)
+        )
+        deleted = deleted or cursor.rowcount > 0
+        await db.commit()
+        return deleted
+
+
+async def increment_funnel_stats(counts: dict[str, int], target_date: date = None) -> None:
+    """Add aggregated funnel step counts in one transaction."""
+    if not counts:
+        return
+    if target_date is None:
+        target_date = date.today()
+    
+    day = target_date.isoformat()
+    async with write_connection() as db:
+        await db.executemany(
+            """INSERT INTO funnel_stats (date, step, count) VALUES (?, ?, ?)
+               ON CONFLICT(date, step) DO UPDATE SET count = count + excluded.count""",
+            [(day, step, count) for step, count in counts.items()]
+        )
+        await db.commit()
+
+
+async def get_funnel_stats(target_date: date = None) -> dict[str, int]:
+    """Get funnel step counts for a day."""
+    if target_date is None:
+        target_date = date.today()
+    
+    async with read_connection() as db:
+        cursor = await db.execute(
+            "SELECT step, count FROM funnel_stats WHERE date = ?",
+            (target_date.isoformat(),)
+        )
+        rows = await cursor.fetchall()
+        return {step: count for step, count in rows}
+
+
+async def _find_archived(db: aiosqlite.Connection, key: str, value) -> dict | None:
+    """Look up an archived participant by an indexed key and load the full row."""
+    cursor = await db.execute(
+        f"SELECT telegram_id, archive_day FROM participant_index WHERE {key} = ? LIMIT 1",
+        (value,)
+    )
+    entry = await cursor.fetchone()
+    await cursor.close()
+    if not entry:
+        return None
+    
+    telegram_id, archive_day = entry[0], entry[1]
+    archive_path = get_archive_path(archive_day)
+    if not os.path.exists(archive_path):
+        return None
+    
+    await db.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+    try:
+        cursor = await db.execute(
+            "SELECT * FROM archive.participants WHERE telegram_id = ?",
+            (telegram_id,)
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+    finally:
+        await db.execute("DETACH DATABASE archive")
+    
+    if not row:
+        return None
+    return {k: row[k] for k in row.keys()}
+
+
+async def _prepare_archive(db: aiosqlite.Connection, columns: list[str]) -> None:
+    """Create the attached archive table or add columns added to participants since."""
+    await db.execute(
+        "CREATE TABLE IF NOT EXISTS archive.participants AS SELECT * FROM main.participants WHERE 0"
+    )
+    await db.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS archive.idx_archive_telegram_id ON participants(telegram_id)"
+    )
+    
+    cursor = await db.execute("PRAGMA archive.table_info(participants)")
+    existing = {row[1] for row in await cursor.fetchall()}
+    for column in columns:
+        if column not in existing:
+            await db.execute(f"ALTER TABLE archive.participants ADD COLUMN {column}")
+
+
+async def archive_participants() -> int:
+    """
+    Move completed participants of previous days into per-day archive databases.
+    
+    Keeps the hot `participants` table small; archived rows stay reachable
+    through `participant_index`.
+    
+    A transaction spanning attached WAL databases is not atomic across the files,
+    so the copy is committed first and the rows are removed from `participants`
+    afterwards. The copy is idempotent: a move interrupted in between is redone
+    by the next run.
+    
+    Returns:
+        int: number of archived rows
+    """
+    os.makedirs(archive_dir(), exist_ok=True)
+    archived = 0
+    
+    async with write_connection() as db:
+        cursor = await db.execute(
+            f"""SELECT DISTINCT date(created_at) FROM participants
+                WHERE {COMPLETED_CONDITION} AND date(created_at) < date('now')"""
+        )
+        days = [row[0] for row in await cursor.fetchall()]
+        
+        cursor = await db.execute("PRAGMA main.table_info(participants)")
+        columns = [row[1] for row in await cursor.fetchall()]
+        column_list = ", ".join(columns)
+        condition = f"{COMPLETED_CONDITION} AND date(created_at) = ?"
+        await db.create_function("normalize_phone", 1, normalize_phone, deterministic=True)
+        
+        for day in days:
+            await db.execute("ATTACH DATABASE ? AS archive", (get_archive_path(day),))
+            try:
+                await _prepare_archive(db, columns)
+                
+                await db.execute(
+                    f"""INSERT OR IGNORE INTO archive.participants ({column_list})
+                        SELECT {column_list} FROM main.participants WHERE {condition}""",
+                    (day,)
+                )
+                await db.commit()
+                
+                await db.execute(
+                    f"""INSERT OR REPLACE INTO participant_index
+                        (telegram_id, name, phone_key, participant_number, is_winner, prize, prize_type,
+                         redeemed_at, redeemed_by, photo_hash, archive_day)
+                        SELECT telegram_id, name, normalize_phone(phone), participant_number,
+                               is_winner, prize, prize_type, redeemed_at, redeemed_by, photo_hash, ?
+                        FROM main.participants WHERE {condition}""",
+                    (day, day)
+                )
+                cursor = await db.execute(
+                    f"DELETE FROM main.participants WHERE {condition}",
+                    (day,)
+                )
+                archived += cursor.rowcount
+                await db.commit()
+            finally:
+                await db.execute("DETACH DATABASE archive")
+    
+    return archived
+
+
+async def get_all_participants() -> list[dict]:
+    """All participants: archived days (via the index) followed by the hot table."""
+    async with read_connection() as db:
+        cursor = await db.execute(
+            "SELECT DISTINCT archive_day FROM participant_index ORDER BY archive_day"
+        )
+        days = [row[0] for row in await cursor.fetchall()]
+        # Full exports are large: stream plain tuples instead of Row objects
+        db.row_factory = None
+        
+        result = []
+        for day in days:
+            archive_path = get_archive_path(day)
+            if not os.path.exists(archive_path):
+                continue
+            
+            await db.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+            try:
+                # Only rows still listed in the index (deleted participants are dropped from it)
+                cursor = await db.execute(
+                    """SELECT a.* FROM archive.participants a
+                       JOIN main.participant_index i
+                         ON i.telegram_id = a.telegram_id AND i.archive_day = ?
+                       ORDER BY a.id""",
+                    (day,)
+                )
+                result.extend(await _fetch_dicts(cursor))
+            finally:
+                await db.execute("DETACH DATABASE archive")
+        
+        cursor = await db.execute("SELECT * FROM participants ORDER BY id")
+        result.extend(await _fetch_dicts(cursor))
+        return result
+
+
+async def get_participant_contacts() -> list[dict]:
+    """telegram_id and name of every participant, including archived ones."""
+    async with read_connection() as db:
+        db.row_factory = None
+        cursor = await db.execute(
+            """SELECT telegram_id, name FROM participants
+               UNION ALL
+               SELECT telegram_id, name FROM participant_index"""
+        )
+        return await _fetch_dicts(cursor)
+
+
+def clear_archives() -> None:
+    """Remove all archive database files."""
+    directory = archive_dir()
+    if not os.path.isdir(directory):
+        return
+    for filename in os.listdir(directory):
+        if filename.startswith("participants_") and filename.endswith(".db"):
+            os.remove(os.path.join(directory, filename))
+
+
+async def enqueue_outbox(method: str, payload: dict, last_error: str = None) -> int:
+    """Store a Bot API call for later delivery."""
+    async with write_connection() as db:
+        cursor = await db.execute(
+            "INSERT INTO outbox (method, payload, last_error) VALUES (?, ?, ?)",
+            (method, json.dumps(payload, ensure_ascii=False), last_error)
+        )
         await db.commit()
-        return cursor.rowcount > 0
+        return cursor.lastrowid
+
+
+async def get_due_outbox(now: float, limit: int = 50) -> list[dict]:
+    """Pending outbox entries whose retry time has come, oldest first."""
+    async with aiosqlite.connect(database_path()) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            """SELECT * FROM outbox
+               WHERE status = 'pending' AND next_attempt_at <= ?
+               ORDER BY id LIMIT ?""",
+            (now, limit)
+        )
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def update_outbox(entry_id: int, **kwargs) -> None:
+    """Update outbox entry fields (status, attempts, next_attempt_at, last_error)."""
+    if not kwargs:
+        return
+    
+    fields = ", ".join(f"{k} = ?" for k in kwargs.keys())
+    async with write_connection() as db:
+        await db.execute(
+            f"UPDATE outbox SET {fields} WHERE id = ?",
+            list(kwargs.values()) + [entry_id]
+        )
+        await db.commit()
+
+
+async def delete_outbox(entry_id: int) -> None:
+    """Remove a delivered outbox entry."""
+    async with write_connection() as db:
+        await db.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+        await db.commit()
+
+
+async def get_dead_letters(limit: int = 20) -> tuple[int, list[dict]]:
+    """Total number of dead letters and the most recent ones."""
+    async with read_connection() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM outbox WHERE status = 'dead'")
+        total = (await cursor.fetchone())[0]
+        cursor = await db.execute(
+            "SELECT * FROM outbox WHERE status = 'dead' ORDER BY id DESC LIMIT ?",
+            (limit,)
+        )
+        rows = await cursor.fetchall()
+        return total, [dict(row) for row in rows]
+
+
+async def replay_dead_letters(entry_id: int = None) -> int:
+    """Move dead letters (one or all) back to the pending queue."""
+    query = "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = 0 WHERE status = 'dead'"
+    params = ()
+    if entry_id is not None:
+        query += " AND id = ?"
+        params = (entry_id,)
+    
+    async with write_connection() as db:
+        cursor = await db.execute(query, params)
+        await db.commit()
+        return cursor.rowcount
+
+
+async def create_broadcast(text: str, segment: str, admin_chat_id: int) -> tuple[int, int]:
+    """
+    Create a draft broadcast and materialize its recipient list.
+    
+    Returns:
+        tuple: (broadcast_id, recipients count)
+    """
+    condition = BROADCAST_SEGMENTS[segment]
+    
+    async with write_connection() as db:
+        cursor = await db.execute(
+            "INSERT INTO broadcasts (text, segment, admin_chat_id) VALUES (?, ?, ?)",
+            (text, segment, admin_chat_id)
+        )
+        broadcast_id = cursor.lastrowid
+        
+        cursor = await db.execute(
+            f"""INSERT OR IGNORE INTO broadcast_recipients (broadcast_id, telegram_id)
+                SELECT ?, telegram_id FROM ({ALL_PARTICIPANTS_SQL}) WHERE {condition}""",
+            (broadcast_id,)
+        )
+        total = cursor.rowcount
+        await db.commit()
+        return broadcast_id, total
+
+
+async def get_broadcast(broadcast_id: int = None) -> dict | None:
+    """Get a broadcast with per-status recipient counts (latest one if no id given)."""
+    async with read_connection() as db:
+        if broadcast_id is None:
+            cursor = await db.execute("SELECT * FROM broadcasts ORDER BY id DESC LIMIT 1")
+        else:
+            cursor = await db.execute("SELECT * FROM broadcasts WHERE id = ?", (broadcast_id,))
+        row = await cursor.fetchone()
+        if not row:
+            return None
+        
+        broadcast = dict(row)
+        cursor = await db.execute(
+            "SELECT status, COUNT(*) FROM broadcast_recipients WHERE broadcast_id = ? GROUP BY status",
+            (broadcast["id"],)
+        )
+        counts = {status: count for status, count in await cursor.fetchall()}
+        broadcast["counts"] = counts
+        broadcast["total"] = sum(counts.values())
+        return broadcast
+
+
+async def set_broadcast_status(broadcast_id: int, status: str) -> None:
+    """Update broadcast status (draft/running/done/cancelled)."""
+    async with write_connection() as db:
+        await db.execute("UPDATE broadcasts SET status = ? WHERE id = ?", (status, broadcast_id))
+        await db.commit()
+
+
+async def claim_broadcast(broadcast_id: int) -> bool:
+    """
+    Move a draft broadcast to running in one statement.
+    Returns True for the caller that made the move: a second tap on "start" gets False.
+    """
+    async with write_connection() as db:
+        cursor = await db.execute(
+            "UPDATE broadcasts SET status = 'running' WHERE id = ? AND status = 'draft'",
+            (broadcast_id,)
+        )
+        await db.commit()
+        return cursor.rowcount == 1
+
+
+async def get_running_broadcasts() -> list[dict]:
+    """Broadcasts interrupted mid-way (to resume after restart)."""
+    async with aiosqlite.connect(database_path()) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("SELECT * FROM broadcasts WHERE status = 'running' ORDER BY id")
+        return [dict(row) for row in await cursor.fetchall()]
+
+
+async def get_pending_recipients(broadcast_id: int) -> list[int]:
+    """Recipients of a broadcast that have not been handled yet."""
+    async with aiosqlite.connect(database_path()) as db:
+        cursor = await db.execute(
+            "SELECT telegram_id FROM broadcast_recipients WHERE broadcast_id = ? AND status = 'pending'",
+            (broadcast_id,)
+        )
+        return [row[0] for row in await cursor.fetchall()]
+
+
+async def save_recipient_results(broadcast_id: int, results: list[tuple[int, str, str | None]]) -> None:
+    """Store delivery results [(telegram_id, status, error)] in one transaction."""
+    if not results:
+        return
+    
+    async with write_connection() as db:
+        await db.executemany(
+            "UPDATE broadcast_recipients SET status = ?, error = ? WHERE broadcast_id = ? AND telegram_id = ?",
+            [(status, error, broadcast_id, telegram_id) for telegram_id, status, error in results]
+        )
+        await db.commit()
+
+
+async def get_participant_by_number(participant_number: int) -> dict | None:
+    """Find participant by participant number (hot table, then archive)."""
+    async with aiosqlite.connect(database_path()) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            "SELECT * FROM participants WHERE participant_number = ?",
+            (participant_number,)
+        )
+        row = await cursor.fetchone()
+        if row:
+            return dict(row)
+        
+        return await _find_archived(db, "participant_number", participant_number)
+
+
+async def redeem_prize(participant_number: int, staff_id: int) -> tuple[str, dict | None]:
+    """
+    Mark a participant's prize as handed out - at most once.
+    
+    Returns:
+        tuple: (status, participant) where status is
+            'redeemed', 'already_redeemed', 'no_prize' or 'not_found'
+    """
+    guard = "participant_number = ? AND prize_type IS NOT NULL AND redeemed_at IS NULL"
+    
+    async with write_connection() as db:
+        cursor = await db.execute(
+            f"UPDATE participants SET redeemed_at = CURRENT_TIMESTAMP, redeemed_by = ? WHERE {guard}",
+            (staff_id, participant_number)
+        )
+        redeemed = cursor.rowcount > 0
+        
+        if not redeemed:
+            # Archived winners: the index row is the guard, the archive copy is updated alongside
+            cursor = await db.execute(
+                f"""UPDATE participant_index SET redeemed_at = CURRENT_TIMESTAMP, redeemed_by = ?
+                    WHERE {guard} RETURNING archive_day, redeemed_at""",
+                (staff_id, participant_number)
+            )
+            entry = await cursor.fetchone()
+            await db.commit()
+            if entry:
+                redeemed = True
+                archive_path = get_archive_path(entry[0])
+                if os.path.exists(archive_path):
+                    await db.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+                    try:
+                        await _prepare_archive(db, ["redeemed_at", "redeemed_by"])
+                        await db.execute(
+                            """UPDATE archive.participants SET redeemed_at = ?, redeemed_by = ?
+                               WHERE participant_number = ?""",
+                            (entry[1], staff_id, participant_number)
+                        )
+                        await db.commit()
+                    finally:
+                        await db.execute("DETACH DATABASE archive")
+        await db.commit()
+    
+    participant = await get_participant_by_number(participant_number)
+    if redeemed:
+        return "redeemed", participant
+    if participant is None:
+        return "not_found", None
+    if participant.get("prize_type") is None:
+        return "no_prize", participant
+    return "already_redeemed", participant
+
+
+async def get_photo_hashes() -> list[tuple[int, int]]:
+    """(telegram_id, photo_hash) of every hashed photo, including archived days."""
+    async with aiosqlite.connect(database_path()) as db:
+        cursor = await db.execute(
+            """SELECT telegram_id, photo_hash FROM participants WHERE photo_hash IS NOT NULL
+               UNION ALL
+               SELECT telegram_id, photo_hash FROM participant_index WHERE photo_hash IS NOT NULL"""
+        )
+        return [tuple(row) for row in await cursor.fetchall()]
+
+
+async def get_participation_keys() -> list[tuple[int, str | None]]:
+    """(telegram_id, phone) of everyone who already got a draw result, including archived days."""
+    async with aiosqlite.connect(database_path()) as db:
+        cursor = await db.execute(
+            f"""SELECT telegram_id, phone FROM participants WHERE {COMPLETED_CONDITION}
+                UNION ALL
+                SELECT telegram_id, phone_key FROM participant_index"""
+        )
+        return [tuple(row) for row in await cursor.fetchall()]
+
+
+async def get_media_file_ids() -> dict[str, str]:
+    """Cached file_ids of static media by content key (shared by all campaigns)."""
+    async with aiosqlite.connect(DEFAULT_CAMPAIGN.database_path) as db:
+        cursor = await db.execute("SELECT key, file_id FROM media_cache")
+        return dict(await cursor.fetchall())
+
+
+async def save_media_file_id(key: str, file_id: str) -> None:
+    async with write_connection(DEFAULT_CAMPAIGN.database_path) as db:
+        await db.execute("INSERT OR REPLACE INTO media_cache (key, file_id) VALUES (?, ?)", (key, file_id))
+        await db.commit()
+
+
+async def get_settings() -> dict:
+    """Stored setting overrides, decoded."""
+    async with aiosqlite.connect(database_path()) as db:
+        cursor = await db.execute("SELECT key, value FROM settings")
+        return {key: json.loads(value) for key, value in await cursor.fetchall()}
+
+
+async def save_setting(key: str, value, admin_id: int) -> None:
+    """
+    Store (or with value=None remove) a setting override and log the change, in one transaction.
+    """
+    new_value = None if value is None else json.dumps(value, ensure_ascii=False)
+    async with write_connection() as db:
+        await db.execute("BEGIN IMMEDIATE")
+        cursor = await db.execute("SELECT value FROM settings WHERE key = ?", (key,))
+        row = await cursor.fetchone()
+        if new_value is None:
+            await db.execute("DELETE FROM settings WHERE key = ?", (key,))
+        else:
+            await db.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, new_value))
+        await db.execute(
+            "INSERT INTO settings_audit (admin_id, key, old_value, new_value) VALUES (?, ?, ?, ?)",
+            (admin_id, key, row[0] if row else None, new_value)
+        )
+        await db.commit()
+
+
+async def get_settings_audit(limit: int = 10) -> list[dict]:
+    """Latest setting changes, newest first."""
+    async with read_connection() as db:
+        cursor = await db.execute(
+            "SELECT * FROM settings_audit ORDER BY id DESC LIMIT ?", (limit,)
+        )
+        return [dict(row) for row in await cursor.fetchall()]
+
+
+async def get_user_campaigns() -> dict[int, str]:
+    """Campaign of every user who joined one through a deep link."""
+    async with aiosqlite.connect(DEFAULT_CAMPAIGN.database_path) as db:
+        cursor = await db.execute("SELECT telegram_id, campaign FROM user_campaigns")
+        return dict(await cursor.fetchall())
+
+
+async def save_user_campaign(telegram_id: int, campaign: str) -> None:
+    async with write_connection(DEFAULT_CAMPAIGN.database_path) as db:
+        await db.execute(
+            "INSERT OR REPLACE INTO user_campaigns (telegram_id, campaign) VALUES (?, ?)",
+            (telegram_id, campaign)
+        )
+        await db.commit()
+
+
+# Tables every participant update reads (participant_index backs dedup of archived days)
+HOT_TABLES = ("participants", "participant_index", "daily_stats")
+
+
+async def prewarm_database() -> int:
+    """
+    Read the hot tables and their indexes once, so the first requests after a restart
+    find their pages in the OS cache instead of on disk.
+    
+    Each call here opens its own connection, so SQLite's per-connection page cache
+    does not outlive it - the OS cache is what stays warm.
+    
+    Returns:
+        int: number of b-trees (tables and indexes) read
+    """
+    async with aiosqlite.connect(database_path()) as db:
+        placeholders = ",".join("?" * len(HOT_TABLES))
+        cursor = await db.execute(
+            f"SELECT type, name, tbl_name FROM sqlite_master "
+            f"WHERE tbl_name IN ({placeholders}) AND type IN ('table', 'index')",
+            HOT_TABLES
+        )
+        trees = await cursor.fetchall()
+        for kind, name, table in trees:
+            if kind == "table":
+                await db.execute(f'SELECT COUNT(*) FROM "{table}" NOT INDEXED')
+            else:
+                await db.execute(f'SELECT COUNT(*) FROM "{table}" INDEXED BY "{name}"')
+        return len(trees)
+
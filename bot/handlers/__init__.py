@@ -5,6 +5,7 @@ from bot.handlers.subscription import router as subscription_router
 from bot.handlers.tasks import router as tasks_router
 from bot.handlers.result import router as result_router
 from bot.handlers.admin import router as admin_router
+from bot.handlers.redeem import router as redeem_router
 
 
 def setup_routers() -> Router:
@@ -12,6 +13,7 @@ def setup_routers() -> Router:
     main_router = Router()
     
     main_router.include_router(admin_router) # Register first to capture commands
+    main_router.include_router(redeem_router)
     main_router.include_router(start_router)
     main_router.include_router(subscription_router)
     main_router.include_router(tasks_router)
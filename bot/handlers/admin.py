@@ -1,5 +1,3 @@
-import csv
-import io
 import logging
 from datetime import datetime
 
@@ -7,75 +5,136 @@ from aiogram import Router, types
 from aiogram.filters import Command
 from aiogram.types import BufferedInputFile
 
-from bot.config import DATABASE_PATH
-from bot.database import delete_participant
+from bot.campaigns import current_campaign
+from bot.database import write_connection, delete_participant, get_all_participants, get_participant_contacts, clear_archives
+from bot.utils.outbox import send_or_enqueue
 import aiosqlite
 
 router = Router()
 logger = logging.getLogger(__name__)
 
+
+async def answer_error(message: types.Message, text: str) -> None:
+    """Report an error to the admin; queued in the outbox if it can't be delivered now."""
+    await send_or_enqueue(message.bot, "send_message", chat_id=message.chat.id, text=text)
+
+
+async def reload_participant_indexes() -> None:
+    """Rebuild the in-memory indexes after participants were deleted or reset."""
+    from bot.utils.membership import load_membership
+    from bot.utils.phash import reset_photo_hashes, load_photo_hashes
+
+    # Otherwise re-submitted photos match deleted participants and repeat draws are refused
+    reset_photo_hashes()
+    await load_photo_hashes()
+    await load_membership()
+
+
 @router.message(Command("export"))
 async def export_database(message: types.Message):
     """Export participants database to CSV."""
-    logger.info(f"Export requested by user {message.from_user.id}")
+    from bot.utils.export import build_participants_csv
+
+    logger.debug(f"Export requested by user {message.from_user.id}")
     
-    # Security check: Only allow specific admin
-    ADMIN_ID = 802692559
-    if message.from_user.id != ADMIN_ID:
+    # Security check: Only allow admins
+    if message.from_user.id not in current_campaign().admin_ids:
         await message.answer("⛔️ У вас нет прав для выполнения этой команды.")
         return
 
     try:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("SELECT * FROM participants")
-            rows = await cursor.fetchall()
+        # Archived days are included through the participant index
+        rows = await get_all_participants()
 
-            if not rows:
-                await message.answer("📁 База данных пуста.")
-                return
+        if not rows:
+            await message.answer("📁 База данных пуста.")
+            return
 
-            # Create CSV in memory
-            output = io.StringIO()
-            writer = csv.writer(output)
+        # Prepare file for sending
+        document = BufferedInputFile(
+            build_participants_csv(rows), 
+            filename=f"participants_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        )
 
-            # Write header
-            if rows:
-                writer.writerow(rows[0].keys())
+        await message.reply_document(
+            document,
+            caption=f"📁 Экспорт базы данных\nКоличество записей: {len(rows)}"
+        )
 
-            # Write data
-            for row in rows:
-                writer.writerow(list(row))
+    except Exception as e:
+        logger.error(f"Export failed: {e}")
+        await answer_error(message, f"❌ Ошибка экспорта: {e}")
 
-            # Prepare file for sending
-            output.seek(0)
-            document = BufferedInputFile(
-                output.getvalue().encode(), 
-                filename=f"participants_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            )
 
-            await message.reply_document(
-                document,
-                caption=f"📁 Экспорт базы данных\nКоличество записей: {len(rows)}"
-            )
+@router.message(Command("export_photos"))
+async def export_photos(message: types.Message):
+    """Export participant photos as ZIP parts: /export_photos [YYYY-MM-DD|winners]."""
+    if message.from_user.id not in current_campaign().admin_ids:
+        await message.answer("⛔️ Команда доступна только администратору.")
+        return
 
-    except Exception as e:
-        logger.error(f"Export failed: {e}")
-        await message.answer(f"❌ Ошибка экспорта: {e}")
+    import asyncio
+    import os
+    import tempfile
+    from aiogram.exceptions import TelegramRetryAfter
+    from aiogram.types import FSInputFile
+    from bot.utils.photo_export import collect_photos, plan_parts, write_part
 
+    args = message.text.split()
+    day = None
+    winners_only = False
+    if len(args) > 1:
+        if args[1] == "winners":
+            winners_only = True
+        else:
+            try:
+                day = datetime.strptime(args[1], "%Y-%m-%d").date().isoformat()
+            except ValueError:
+                await message.answer("ℹ️ Использование: /export_photos [ГГГГ-ММ-ДД | winners]")
+                return
 
-ADMIN_ID = 802692559
+    try:
+        entries, missing = collect_photos(await get_all_participants(), day=day, winners_only=winners_only)
+        if not entries:
+            await message.answer("📭 Нет фотографий для выгрузки.")
+            return
+
+        parts = plan_parts(entries)
+        label = day or ("winners" if winners_only else "all")
+        await message.answer(
+            f"📦 Выгрузка фото ({label}): {len(entries)} шт., частей: {len(parts)}"
+            + (f"\n⚠️ Не найдено на диске: {missing}" if missing else "")
+        )
+
+        # One part on disk at a time: written, uploaded, removed
+        with tempfile.TemporaryDirectory(prefix="photos_export_") as work_dir:
+            for index, part in enumerate(parts, start=1):
+                filename = f"photos_{label}_{index}of{len(parts)}.zip"
+                path = os.path.join(work_dir, filename)
+                size = await asyncio.to_thread(write_part, path, part)
+                caption = f"📦 Часть {index}/{len(parts)}: {len(part)} фото, {size / 1024 / 1024:.1f} МБ"
+                try:
+                    await message.answer_document(FSInputFile(path, filename=filename), caption=caption)
+                except TelegramRetryAfter as e:
+                    await asyncio.sleep(e.retry_after)
+                    await message.answer_document(FSInputFile(path, filename=filename), caption=caption)
+                os.remove(path)
+
+        logger.info(f"Photo export ({label}): {len(entries)} photos in {len(parts)} parts")
+    except Exception as e:
+        logger.error(f"Photo export failed: {e}")
+        await answer_error(message, f"❌ Ошибка выгрузки фото: {e}")
 
 
 @router.message(Command("reset_me"))
 async def reset_me(message: types.Message):
     """Reset admin's participation status for testing."""
-    if message.from_user.id != ADMIN_ID:
+    if message.from_user.id not in current_campaign().admin_ids:
         await message.answer("⛔️ Команда доступна только администратору.")
         return
     
     try:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
+        async with write_connection() as db:
             # First, check current state
             db.row_factory = aiosqlite.Row
             cursor = await db.execute(
@@ -95,6 +154,11 @@ async def reset_me(message: types.Message):
                    WHERE telegram_id = ?""",
                 (message.from_user.id,)
             )
+            # Forget an archived participation from previous days as well
+            await db.execute(
+                "DELETE FROM participant_index WHERE telegram_id = ?",
+                (message.from_user.id,)
+            )
             await db.commit()
             
             # Verify reset
@@ -103,6 +167,7 @@ async def reset_me(message: types.Message):
                 (message.from_user.id,)
             )
             after = await cursor.fetchone()
+        await reload_participant_indexes()
         
         before_info = f"До: номер={before['participant_number']}, winner={before['is_winner']}" if before else "До: не найден"
         after_info = f"После: номер={after['participant_number'] if after else 'N/A'}, winner={after['is_winner'] if after else 'N/A'}"
@@ -115,27 +180,33 @@ async def reset_me(message: types.Message):
         )
     except Exception as e:
         logger.error(f"Reset failed: {e}")
-        await message.answer(f"❌ Ошибка: {e}")
+        await answer_error(message, f"❌ Ошибка: {e}")
 
 
 @router.message(Command("reset_all"))
 async def reset_all(message: types.Message):
     """Clear entire database - all participants and stats."""
-    if message.from_user.id != ADMIN_ID:
+    if message.from_user.id not in current_campaign().admin_ids:
         await message.answer("⛔️ Команда доступна только администратору.")
         return
     
     try:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            # Count before
-            cursor = await db.execute("SELECT COUNT(*) FROM participants")
+        async with write_connection() as db:
+            # Count before (including archived days)
+            cursor = await db.execute(
+                "SELECT (SELECT COUNT(*) FROM participants) + (SELECT COUNT(*) FROM participant_index)"
+            )
             count = (await cursor.fetchone())[0]
             
             # Delete all
             await db.execute("DELETE FROM participants")
+            await db.execute("DELETE FROM participant_index")
             await db.execute("DELETE FROM daily_stats")
             await db.commit()
         
+        clear_archives()
+        await reload_participant_indexes()
+        
         await message.answer(
             f"🗑 <b>База данных очищена!</b>\n\n"
             f"Удалено записей: {count}\n\n"
@@ -145,28 +216,28 @@ async def reset_all(message: types.Message):
         )
     except Exception as e:
         logger.error(f"Reset all failed: {e}")
-        await message.answer(f"❌ Ошибка: {e}")
+        await answer_error(message, f"❌ Ошибка: {e}")
 
 
 from aiogram import Bot
-from bot.config import EXEED_CHANNEL_ID, LUZHNIKI_CHANNEL_ID
+from bot.utils.subscriptions import campaign_channels, verified_channels, channel_status
 
 
 @router.message(Command("check_channels"))
 async def check_channels(message: types.Message, bot: Bot):
     """Check if bot is admin in required channels."""
-    if message.from_user.id != ADMIN_ID:
+    if message.from_user.id not in current_campaign().admin_ids:
         await message.answer("⛔️ Команда доступна только администратору.")
         return
     
     results = []
+    me = await bot.me()
     
-    for channel_id, name in [(EXEED_CHANNEL_ID, "EXEED"), (LUZHNIKI_CHANNEL_ID, "Лужники")]:
+    for channel in campaign_channels():
+        name = channel.name if channel.verify else f"{channel.name} (без проверки подписки)"
         try:
-            # Get bot's own info
-            me = await bot.get_me()
             # Try to get bot's membership in channel
-            member = await bot.get_chat_member(chat_id=channel_id, user_id=me.id)
+            member = await bot.get_chat_member(chat_id=channel.id, user_id=me.id)
             
             if member.status in ["administrator", "creator"]:
                 results.append(f"✅ {name}: Бот — администратор")
@@ -185,18 +256,15 @@ async def check_channels(message: types.Message, bot: Bot):
 
 @router.message(Command("check_subs"))
 async def check_subs(message: types.Message, bot: Bot):
-    """Check if all DB participants are subscribed to EXEED channel."""
-    if message.from_user.id != ADMIN_ID:
+    """Check if all DB participants are subscribed to the verified channels."""
+    if message.from_user.id not in current_campaign().admin_ids:
         await message.answer("⛔️ Команда доступна только администратору.")
         return
     
     await message.answer("⏳ Проверяю подписки участников...")
     
     try:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("SELECT telegram_id, name FROM participants")
-            rows = await cursor.fetchall()
+        rows = await get_participant_contacts()
         
         if not rows:
             await message.answer("📁 База данных пуста.")
@@ -207,21 +275,20 @@ async def check_subs(message: types.Message, bot: Bot):
         errors = 0
         not_sub_list = []
         
-        from aiogram.enums import ChatMemberStatus
+        import asyncio
         
         for row in rows:
-            try:
-                member = await bot.get_chat_member(
-                    chat_id=EXEED_CHANNEL_ID, 
-                    user_id=row["telegram_id"]
-                )
-                if member.status in [ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR]:
-                    subscribed += 1
-                else:
-                    not_subscribed += 1
-                    not_sub_list.append(f"{row['name']} (ID: {row['telegram_id']})")
-            except Exception:
+            # The user's channels concurrently
+            statuses = await asyncio.gather(
+                *(channel_status(bot, row["telegram_id"], channel) for channel in verified_channels())
+            )
+            if None in statuses:
                 errors += 1
+            elif all(statuses):
+                subscribed += 1
+            else:
+                not_subscribed += 1
+                not_sub_list.append(f"{row['name']} (ID: {row['telegram_id']})")
         
         # Prepare not subscribed list (max 10)
         not_sub_text = ""
@@ -231,7 +298,7 @@ async def check_subs(message: types.Message, bot: Bot):
                 not_sub_text += f"\n... и ещё {len(not_sub_list) - 10}"
         
         await message.answer(
-            f"<b>Проверка подписок на EXEED:</b>\n\n"
+            f"<b>Проверка подписок на {', '.join(channel.name for channel in verified_channels())}:</b>\n\n"
             f"✅ Подписаны: {subscribed}\n"
             f"❌ Не подписаны: {not_subscribed}\n"
             f"⚠️ Ошибки: {errors}\n"
@@ -241,13 +308,14 @@ async def check_subs(message: types.Message, bot: Bot):
         )
         
     except Exception as e:
-        await message.answer(f"❌ Ошибка: {e}")
+        logger.error(f"Subscription check failed: {e}")
+        await answer_error(message, f"❌ Ошибка: {e}")
 
 
 @router.message(Command("reset_user"))
 async def reset_specific_user(message: types.Message):
     """Reset a specific user by ID."""
-    if message.from_user.id != ADMIN_ID:
+    if message.from_user.id not in current_campaign().admin_ids:
         await message.answer("⛔️ Команда доступна только администратору.")
         return
     
@@ -264,6 +332,7 @@ async def reset_specific_user(message: types.Message):
         success = await delete_participant(target_id)
         
         if success:
+            await reload_participant_indexes()
             await message.answer(f"✅ Участник {target_id} удалён из базы данных.")
         else:
             await message.answer(f"⚠️ Участник {target_id} не найден в базе.")
@@ -272,5 +341,381 @@ async def reset_specific_user(message: types.Message):
         await message.answer("❌ ID должен быть числом.")
     except Exception as e:
         logger.error(f"Reset user failed: {e}")
-        await message.answer(f"❌ Ошибка: {e}")
+        await answer_error(message, f"❌ Ошибка: {e}")
+
+
+
+@router.message(Command("funnel"))
+async def funnel_stats(message: types.Message):
+    """Show today's registration funnel (drop-off by step)."""
+    if message.from_user.id not in current_campaign().admin_ids:
+        await message.answer("⛔️ Команда доступна только администратору.")
+        return
+    
+    from bot.database import get_funnel_stats
+    from bot.utils.funnel import FUNNEL_STEPS, get_pending_counts
+    
+    try:
+        counts = await get_funnel_stats()
+        # Include counts not yet flushed to the database
+        for step, count in get_pending_counts().items():
+            counts[step] = counts.get(step, 0) + count
+        
+        lines = [f"{step}: {counts.get(step, 0)}" for step in FUNNEL_STEPS]
+        await message.answer(
+            f"<b>Воронка за сегодня:</b>\n\n<code>" + "\n".join(lines) + "</code>",
+            parse_mode="HTML"
+        )
+    except Exception as e:
+        logger.error(f"Funnel stats failed: {e}")
+        await answer_error(message, f"❌ Ошибка: {e}")
+
+
+@router.message(Command("backup"))
+async def backup_now(message: types.Message, background_bot: Bot):
+    """Upload a database backup to the storage channel right away."""
+    if message.from_user.id not in current_campaign().admin_ids:
+        await message.answer("⛔️ Команда доступна только администратору.")
+        return
+    
+    from bot.utils import run_backup
+    
+    try:
+        if await run_backup(background_bot, force=True):
+            await message.answer("💾 Бэкап загружен в канал-хранилище.")
+        else:
+            await message.answer("⚠️ Бэкап не выполнен: STORAGE_CHANNEL_ID не настроен.")
+    except Exception as e:
+        logger.error(f"Backup failed: {e}")
+        await answer_error(message, f"❌ Ошибка бэкапа: {e}")
+
+
+@router.message(Command("dead_letters"))
+async def dead_letters(message: types.Message):
+    """Show messages the outbox gave up on."""
+    if message.from_user.id not in current_campaign().admin_ids:
+        await message.answer("⛔️ Команда доступна только администратору.")
+        return
+    
+    from bot.database import get_dead_letters
+    import html
+    
+    try:
+        total, entries = await get_dead_letters()
+        if not total:
+            await message.answer("📭 Недоставленных сообщений нет.")
+            return
+        
+        lines = [
+            f"#{entry['id']} {entry['method']} ({entry['attempts']} попыток): "
+            f"{html.escape((entry['last_error'] or '')[:80])}"
+            for entry in entries
+        ]
+        await message.answer(
+            f"<b>Недоставленные сообщения: {total}</b>\n\n" + "\n".join(lines) +
+            "\n\nПовторить: /replay <id> или /replay all",
+            parse_mode="HTML"
+        )
+    except Exception as e:
+        logger.error(f"Dead letters listing failed: {e}")
+        await answer_error(message, f"❌ Ошибка: {e}")
+
+
+@router.message(Command("replay"))
+async def replay(message: types.Message):
+    """Put dead letters back into the outbox queue."""
+    if message.from_user.id not in current_campaign().admin_ids:
+        await message.answer("⛔️ Команда доступна только администратору.")
+        return
+    
+    from bot.database import replay_dead_letters
+    
+    args = message.text.split()
+    if len(args) != 2:
+        await message.answer("ℹ️ Использование: /replay <id> или /replay all")
+        return
+    
+    try:
+        entry_id = None if args[1] == "all" else int(args[1])
+        count = await replay_dead_letters(entry_id)
+        await message.answer(f"🔁 Возвращено в очередь: {count}")
+    except ValueError:
+        await message.answer("❌ ID должен быть числом.")
+    except Exception as e:
+        logger.error(f"Replay failed: {e}")
+        await answer_error(message, f"❌ Ошибка: {e}")
+
+
+@router.message(Command("broadcast"))
+async def broadcast(message: types.Message):
+    """Prepare a broadcast to a participant segment: /broadcast <segment> <text>."""
+    if message.from_user.id not in current_campaign().admin_ids:
+        await message.answer("⛔️ Команда доступна только администратору.")
+        return
+    
+    from bot.database import BROADCAST_SEGMENTS, create_broadcast
+    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+    
+    # html_text keeps the admin's formatting (bot sends with HTML parse mode)
+    args = message.html_text.split(maxsplit=2)
+    if len(args) < 3 or args[1] not in BROADCAST_SEGMENTS:
+        await message.answer(
+            "ℹ️ Использование: /broadcast &lt;сегмент&gt; &lt;текст&gt;\n"
+            f"Сегменты: {', '.join(BROADCAST_SEGMENTS)}",
+            parse_mode="HTML"
+        )
+        return
+    
+    try:
+        broadcast_id, total = await create_broadcast(args[2], args[1], message.chat.id)
+        await message.answer(
+            f"📨 Рассылка #{broadcast_id} — сегмент <b>{args[1]}</b>, получателей: {total}\n\n{args[2]}",
+            parse_mode="HTML",
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
+                InlineKeyboardButton(text="✅ Отправить", callback_data=f"broadcast_start:{broadcast_id}"),
+                InlineKeyboardButton(text="✖️ Отмена", callback_data=f"broadcast_cancel:{broadcast_id}")
+            ]])
+        )
+    except Exception as e:
+        logger.error(f"Broadcast creation failed: {e}")
+        await answer_error(message, f"❌ Ошибка: {e}")
+
 
+@router.callback_query(lambda c: c.data and c.data.startswith(("broadcast_start:", "broadcast_cancel:")))
+async def broadcast_control(callback: types.CallbackQuery, background_bot: Bot):
+    """Start or cancel a broadcast from its preview buttons."""
+    if callback.from_user.id not in current_campaign().admin_ids:
+        await callback.answer("⛔️ Нет прав.", show_alert=True)
+        return
+    
+    from bot.database import claim_broadcast
+    from bot.utils.broadcast import start_broadcast, cancel_broadcast
+    
+    action, broadcast_id = callback.data.split(":")
+    broadcast_id = int(broadcast_id)
+    
+    if action == "broadcast_cancel":
+        await cancel_broadcast(broadcast_id)
+        await callback.message.edit_text(f"✖️ Рассылка #{broadcast_id} отменена.")
+        return
+    
+    # Claimed atomically: a double tap must not start the same broadcast twice
+    if not await claim_broadcast(broadcast_id):
+        await callback.answer("Рассылка уже запущена или отменена.", show_alert=True)
+        return
+    
+    status_message = await callback.message.answer(f"📨 Рассылка #{broadcast_id} запущена...")
+    # Button stays for cancelling
+    await callback.message.edit_reply_markup(
+        reply_markup=types.InlineKeyboardMarkup(inline_keyboard=[[
+            types.InlineKeyboardButton(text="⏹ Остановить", callback_data=f"broadcast_cancel:{broadcast_id}")
+        ]])
+    )
+    # Sent through the background pool, so user replies never wait behind it
+    start_broadcast(background_bot, broadcast_id, status_message.message_id)
+    await callback.answer()
+
+
+@router.message(Command("broadcast_status"))
+async def broadcast_status(message: types.Message):
+    """Show delivery state of a broadcast (latest by default)."""
+    if message.from_user.id not in current_campaign().admin_ids:
+        await message.answer("⛔️ Команда доступна только администратору.")
+        return
+    
+    from bot.database import get_broadcast
+    
+    try:
+        args = message.text.split()
+        broadcast_row = await get_broadcast(int(args[1]) if len(args) > 1 else None)
+        if not broadcast_row:
+            await message.answer("📭 Рассылок ещё не было.")
+            return
+        
+        counts = broadcast_row["counts"]
+        await message.answer(
+            f"<b>Рассылка #{broadcast_row['id']}</b> ({broadcast_row['segment']}) — {broadcast_row['status']}\n\n"
+            f"⏳ В очереди: {counts.get('pending', 0)}\n"
+            f"✅ Доставлено: {counts.get('sent', 0)}\n"
+            f"🚫 Заблокировали бота: {counts.get('blocked', 0)}\n"
+            f"❌ Ошибки: {counts.get('failed', 0)}\n"
+            f"📊 Всего: {broadcast_row['total']}",
+            parse_mode="HTML"
+        )
+    except ValueError:
+        await message.answer("❌ ID должен быть числом.")
+    except Exception as e:
+        logger.error(f"Broadcast status failed: {e}")
+        await answer_error(message, f"❌ Ошибка: {e}")
+
+
+_profile_tasks: set = set()
+
+
+def _profile_seconds(message: types.Message) -> float | None:
+    """Duration argument of /profile and /memsnap, 30s by default."""
+    args = message.text.split()
+    try:
+        seconds = float(args[1]) if len(args) > 1 else 30.0
+    except ValueError:
+        return None
+    return seconds if seconds > 0 else None
+
+
+@router.message(Command("profile"))
+async def profile_cpu(message: types.Message):
+    """Sample the live process for N seconds, send collapsed stacks and a top report: /profile [N]."""
+    if message.from_user.id not in current_campaign().admin_ids:
+        await message.answer("⛔️ Команда доступна только администратору.")
+        return
+
+    import asyncio
+    from bot.config import PROFILE_MAX_SECONDS
+    from bot.utils.profiler import profile, ProfilerBusy
+
+    seconds = _profile_seconds(message)
+    if seconds is None:
+        await message.answer("ℹ️ Использование: /profile [секунды]")
+        return
+    seconds = min(seconds, PROFILE_MAX_SECONDS)
+
+    async def run():
+        try:
+            profiler = await profile(seconds)
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            await message.answer_document(
+                BufferedInputFile(profiler.report().encode(), filename=f"profile_{stamp}_top.txt"),
+                caption=f"🔬 Профиль за {seconds:g} с: {profiler.samples} замеров"
+            )
+            await message.answer_document(
+                BufferedInputFile(profiler.collapsed().encode(), filename=f"profile_{stamp}.collapsed"),
+                caption="🔥 Стеки для flamegraph.pl / speedscope.app"
+            )
+        except ProfilerBusy:
+            await message.answer("⏳ Профилирование уже идёт, дождитесь результата.")
+        except Exception as e:
+            logger.error(f"Profiling failed: {e}")
+            await answer_error(message, f"❌ Ошибка профилирования: {e}")
+
+    await message.answer(f"🔬 Профилирую {seconds:g} с, результат придёт файлами.")
+    # In the background: the admin's own updates are not held for the duration
+    task = asyncio.create_task(run())
+    _profile_tasks.add(task)
+    task.add_done_callback(_profile_tasks.discard)
+
+
+@router.message(Command("memsnap"))
+async def memory_snapshot(message: types.Message):
+    """Trace allocations for N seconds and send the growth report: /memsnap [N]."""
+    if message.from_user.id not in current_campaign().admin_ids:
+        await message.answer("⛔️ Команда доступна только администратору.")
+        return
+
+    import asyncio
+    from bot.config import PROFILE_MAX_SECONDS
+    from bot.utils.profiler import memory_snapshot as take_snapshot, ProfilerBusy
+
+    seconds = _profile_seconds(message)
+    if seconds is None:
+        await message.answer("ℹ️ Использование: /memsnap [секунды]")
+        return
+    seconds = min(seconds, PROFILE_MAX_SECONDS)
+
+    async def run():
+        try:
+            report = await take_snapshot(seconds)
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            await message.answer_document(
+                BufferedInputFile(report.encode(), filename=f"memsnap_{stamp}.txt"),
+                caption=f"🧠 Память: аллокации за {seconds:g} с"
+            )
+        except ProfilerBusy:
+            await message.answer("⏳ Профилирование уже идёт, дождитесь результата.")
+        except Exception as e:
+            logger.error(f"Memory snapshot failed: {e}")
+            await answer_error(message, f"❌ Ошибка снимка памяти: {e}")
+
+    await message.answer(
+        f"🧠 Отслеживаю аллокации {seconds:g} с, результат придёт файлом.\n"
+        "⚠️ На это время бот работает медленнее (tracemalloc)."
+    )
+    task = asyncio.create_task(run())
+    _profile_tasks.add(task)
+    task.add_done_callback(_profile_tasks.discard)
+
+
+@router.message(Command("settings"))
+async def show_settings(message: types.Message):
+    """Show live settings of the admin's campaign and the latest changes."""
+    if message.from_user.id not in current_campaign().admin_ids:
+        await message.answer("⛔️ Команда доступна только администратору.")
+        return
+
+    import html
+    from bot.database import get_settings_audit
+    from bot.utils.settings_store import SETTINGS, current_settings, format_setting
+
+    try:
+        settings = current_settings()
+        lines = [
+            f"<b>{key}</b>{' ✏️' if key in settings.overridden else ''} — {description}:\n"
+            f"{html.escape(format_setting(key, settings))}"
+            for key, description in SETTINGS.items()
+        ]
+        audit = await get_settings_audit(5)
+        if audit:
+            lines.append("<b>Последние изменения:</b>")
+            lines += [
+                f"{entry['changed_at']} {entry['key']} ← {html.escape((entry['new_value'] or 'по умолчанию')[:60])} "
+                f"(<code>{entry['admin_id']}</code>)"
+                for entry in audit
+            ]
+        await message.answer(
+            f"<b>Настройки ({html.escape(current_campaign().name)}):</b>\n\n" + "\n\n".join(lines) +
+            "\n\n✏️ — изменено командой\nИзменить: /set &lt;ключ&gt; &lt;значение&gt;, вернуть: /unset &lt;ключ&gt;",
+            parse_mode="HTML"
+        )
+    except Exception as e:
+        logger.error(f"Settings listing failed: {e}")
+        await answer_error(message, f"❌ Ошибка: {e}")
+
+
+@router.message(Command("set", "unset"))
+async def change_setting(message: types.Message):
+    """Change a live setting without a restart: /set <key> <value>, /unset <key> restores the startup value."""
+    if message.from_user.id not in current_campaign().admin_ids:
+        await message.answer("⛔️ Команда доступна только администратору.")
+        return
+
+    import html
+    from bot.utils.settings_store import SETTINGS, parse_setting, update_setting, format_setting
+
+    args = message.text.split(maxsplit=2)
+    unset = args[0].split("@", 1)[0] == "/unset"
+    if len(args) != (2 if unset else 3):
+        await message.answer(
+            "ℹ️ Использование: /set &lt;ключ&gt; &lt;значение&gt; или /unset &lt;ключ&gt;\n"
+            f"Ключи: {', '.join(SETTINGS)}",
+            parse_mode="HTML"
+        )
+        return
+
+    key = args[1]
+    try:
+        value = None if unset else parse_setting(key, args[2])
+        if unset and key not in SETTINGS:
+            raise ValueError(f"неизвестная настройка {key}")
+    except ValueError as e:
+        await message.answer(f"❌ {html.escape(str(e))}", parse_mode="HTML")
+        return
+
+    try:
+        settings = await update_setting(key, value, message.from_user.id)
+        await message.answer(
+            f"✅ <b>{key}</b>{' возвращено к значению из конфигурации' if unset else ''}:\n"
+            f"{html.escape(format_setting(key, settings))}",
+            parse_mode="HTML"
+        )
+    except Exception as e:
+        logger.error(f"Setting {key} change failed: {e}")
+        await answer_error(message, f"❌ Ошибка: {e}")
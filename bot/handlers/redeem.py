@@ -0,0 +1,136 @@
+import html
+import logging
+import time
+
+from aiogram import Router, F, types
+from aiogram.filters import Command, StateFilter
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from bot.campaigns import current_campaign
+from bot.database import get_participant_by_number, redeem_prize
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+# Lookup cache shared by all staff devices: (campaign slug, number) -> (fetched_at, participant).
+# Numbers restart at 1 in every campaign, so the campaign is part of the key
+LOOKUP_TTL = 30
+_lookup_cache: dict[tuple[str, int], tuple[float, dict | None]] = {}
+
+
+def is_staff(user_id: int) -> bool:
+    """Staff of the current campaign (global staff and admins included)."""
+    return user_id in current_campaign().staff_ids
+
+
+async def lookup_participant(participant_number: int) -> dict | None:
+    """Participant by number, cached for LOOKUP_TTL seconds."""
+    key = (current_campaign().slug, participant_number)
+    cached = _lookup_cache.get(key)
+    if cached and time.monotonic() - cached[0] < LOOKUP_TTL:
+        return cached[1]
+
+    participant = await get_participant_by_number(participant_number)
+    _lookup_cache[key] = (time.monotonic(), participant)
+    return participant
+
+
+def format_participant_card(participant: dict) -> str:
+    """Winner card shown to staff."""
+    prize_type = participant.get("prize_type")
+    if prize_type == "big":
+        prize_kind = "🎁 Подарочный набор"
+    elif prize_type == "small":
+        prize_kind = "🔑 Брелок"
+    else:
+        prize_kind = "— (розыгрыш не пройден)"
+
+    if participant.get("redeemed_at"):
+        status = f"✅ Выдан {participant['redeemed_at']}"
+    else:
+        status = "⏳ Не выдан"
+
+    return (
+        f"<b>Участник #{participant['participant_number']}</b>\n\n"
+        f"👤 Имя: {html.escape(participant.get('name') or 'Не указано')}\n"
+        f"🎁 Приз: {html.escape(participant.get('prize') or '—')}\n"
+        f"📦 Тип: {prize_kind} ({prize_type})\n"
+        f"📋 Статус: {status}"
+    )
+
+
+def get_redeem_keyboard(participant_number: int) -> InlineKeyboardMarkup:
+    """Button to hand out the prize."""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="✅ Выдать приз", callback_data=f"redeem:{participant_number}")]
+        ]
+    )
+
+
+async def show_participant(message: types.Message, participant_number: int):
+    """Reply with the participant card and a redeem button if the prize is still due."""
+    participant = await lookup_participant(participant_number)
+
+    if participant is None:
+        await message.answer(f"⚠️ Участник #{participant_number} не найден.")
+        return
+
+    can_redeem = participant.get("prize_type") is not None and not participant.get("redeemed_at")
+    await message.answer(
+        format_participant_card(participant),
+        parse_mode="HTML",
+        reply_markup=get_redeem_keyboard(participant_number) if can_redeem else None
+    )
+
+
+@router.message(Command("redeem"))
+async def cmd_redeem(message: types.Message):
+    """Look up a winner by participant number: /redeem <number>."""
+    if not is_staff(message.from_user.id):
+        await message.answer("⛔️ Команда доступна только сотрудникам бренд-зоны.")
+        return
+
+    args = message.text.split()
+    if len(args) != 2 or not args[1].isdigit():
+        await message.answer("ℹ️ Использование: /redeem <номер участника>")
+        return
+
+    await show_participant(message, int(args[1]))
+
+
+@router.message(StateFilter(None), F.text.regexp(r"^\d{1,7}$"), F.from_user.id.func(is_staff))
+async def staff_number_lookup(message: types.Message):
+    """Staff redemption mode: a bare number is a lookup."""
+    await show_participant(message, int(message.text))
+
+
+@router.callback_query(F.data.startswith("redeem:"))
+async def redeem_callback(callback: types.CallbackQuery):
+    """Hand out the prize - marked atomically, so it is never given twice."""
+    if not is_staff(callback.from_user.id):
+        await callback.answer("⛔️ Нет прав.", show_alert=True)
+        return
+
+    participant_number = int(callback.data.split(":")[1])
+    status, participant = await redeem_prize(participant_number, callback.from_user.id)
+    # The cached card still says "not redeemed"
+    _lookup_cache.pop((current_campaign().slug, participant_number), None)
+
+    if status == "redeemed":
+        logger.info(f"Prize of #{participant_number} redeemed by {callback.from_user.id}")
+        await callback.message.edit_text(
+            format_participant_card(participant) + "\n\n🎉 Приз выдан!",
+            parse_mode="HTML"
+        )
+        await callback.answer("Приз выдан")
+    elif status == "already_redeemed":
+        await callback.message.edit_text(
+            format_participant_card(participant) + "\n\n⛔️ Приз уже был выдан ранее!",
+            parse_mode="HTML"
+        )
+        await callback.answer("Приз уже выдан!", show_alert=True)
+    elif status == "no_prize":
+        await callback.answer("У участника нет приза.", show_alert=True)
+    else:
+        await callback.answer("Участник не найден.", show_alert=True)
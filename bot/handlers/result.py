@@ -1,21 +1,27 @@
 from aiogram import Router, Bot
-from aiogram.types import CallbackQuery, FSInputFile
+from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
+from aiogram.exceptions import TelegramRetryAfter
 import asyncio
-import os
+import logging
 
 from bot.handlers.states import TaskStates
 from bot.database import (
     update_participant,
-    get_next_participant_number,
+    assign_participant_number,
     increment_daily_stats,
     get_or_create_participant,
     get_participant_by_phone
 )
-from bot.utils import check_win
-from bot.config import EXEED_CHANNEL_URL
+from bot.utils import check_win, record_step
+from bot.utils.membership import membership_index
+from bot.utils.admission import admission
+from bot.utils import media
+from bot.campaigns import current_campaign
+from bot.config import EXEED_CHANNEL_URL, BUFFER_REGISTRATION
 
 router = Router()
+logger = logging.getLogger(__name__)
 
 
 async def show_slot_animation(callback: CallbackQuery):
@@ -35,8 +41,19 @@ async def show_slot_animation(callback: CallbackQuery):
         try:
             await callback.message.edit_text(frame)
             await asyncio.sleep(0.4)
-        except Exception:
-            pass
+        except TelegramRetryAfter as e:
+            # Animation is cosmetic - stop instead of waiting out flood control
+            logger.warning(f"Slot animation stopped for {callback.from_user.id}: retry after {e.retry_after}s")
+            return
+        except Exception as e:
+            # Frames are interactive and stale a moment later, so they are not retried
+            logger.debug(f"Slot animation frame failed for {callback.from_user.id}: {e}")
+
+
+async def finish_journey(user_id: int, state: FSMContext):
+    """Journey is over: clear state and free the waiting-room slot."""
+    await state.clear()
+    admission.release(user_id)
 
 
 @router.callback_query(lambda c: c.data == "get_result")
@@ -48,8 +65,15 @@ async def get_result_callback(callback: CallbackQuery, state: FSMContext):
         await callback.answer("❌ Пожалуйста, сначала выполните все задания!", show_alert=True)
         return
     
+    membership = membership_index()
+    pickup = current_campaign().text("pickup")
+    
     # Get participant data
-    participant = await get_or_create_participant(callback.from_user.id)
+    if BUFFER_REGISTRATION and not membership.has_user(callback.from_user.id):
+        # Not in the membership index: no draw yet for this ID, FSM data has everything
+        participant = await state.get_data()
+    else:
+        participant = await get_or_create_participant(callback.from_user.id)
     existing_number = participant.get("participant_number")
     existing_prize = participant.get("prize")
     existing_prize_type = participant.get("prize_type")  # Only set after actual participation
@@ -61,8 +85,6 @@ async def get_result_callback(callback: CallbackQuery, state: FSMContext):
         # User already participated - show their existing result
         if participant.get("is_winner"):
             # Send photo with win reminder
-            brand_zone_photo = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "brand_zone.jpg")
-            
             # Show prize type for duplicate winners
             existing_prize_type = participant.get("prize_type")
             if existing_prize_type == "big":
@@ -75,18 +97,11 @@ async def get_result_callback(callback: CallbackQuery, state: FSMContext):
                 f"Ваш номер: {existing_number} 🎉\n\n"
                 f"Вы выиграли:\n"
                 f"{prize_text}\n\n"
-                f"Чтобы получить подарок, подойдите на бренд-зону EXEED возле павильона №1 и назовите свой номер участника."
+                f"{pickup}"
             )
             
             await callback.message.delete()
-            
-            if os.path.exists(brand_zone_photo):
-                await callback.message.answer_photo(
-                    photo=FSInputFile(brand_zone_photo),
-                    caption=win_caption
-                )
-            else:
-                await callback.message.answer(win_caption)
+            await media.answer_photo(callback.message, media.BRAND_ZONE, win_caption)
         else:
             await callback.message.edit_text(
                 f"Вы уже участвовали!\n"
@@ -95,12 +110,13 @@ async def get_result_callback(callback: CallbackQuery, state: FSMContext):
                 f"Но не расстраивайтесь — впереди ещё много активностей от EXEED!\n"
                 f"Следите за новостями в @exeedrussia."
             )
-        await state.clear()
+        await finish_journey(callback.from_user.id, state)
         return
     
     # --- DUPLICATE CHECK BY PHONE NUMBER ---
     phone = participant.get("phone")
-    if phone:
+    # Index miss means no one with this phone has drawn yet - skip the query
+    if phone and membership.has_phone(phone):
         phone_duplicate = await get_participant_by_phone(phone)
         if phone_duplicate and phone_duplicate.get("telegram_id") != callback.from_user.id:
             # Someone with this phone already participated
@@ -108,24 +124,15 @@ async def get_result_callback(callback: CallbackQuery, state: FSMContext):
             dup_winner = phone_duplicate.get("is_winner")
             
             if dup_winner:
-                brand_zone_photo = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "brand_zone.jpg")
-                
                 win_caption = (
                     f"Этот номер телефона уже участвовал!\n"
                     f"Номер участника: {dup_number} 🎉\n\n"
                     f"Вы выиграли приз от EXEED — фирменный мерч.\n"
-                    f"Чтобы получить подарок, подойдите на бренд-зону EXEED возле павильона №1 и назовите свой номер участника."
+                    f"{pickup}"
                 )
                 
                 await callback.message.delete()
-                
-                if os.path.exists(brand_zone_photo):
-                    await callback.message.answer_photo(
-                        photo=FSInputFile(brand_zone_photo),
-                        caption=win_caption
-                    )
-                else:
-                    await callback.message.answer(win_caption)
+                await media.answer_photo(callback.message, media.BRAND_ZONE, win_caption)
             else:
                 await callback.message.edit_text(
                     f"Этот номер телефона уже участвовал!\n"
@@ -134,7 +141,7 @@ async def get_result_callback(callback: CallbackQuery, state: FSMContext):
                     f"Но не расстраивайтесь — впереди ещё много активностей от EXEED!\n"
                     f"Следите за новостями в @exeedrussia."
                 )
-            await state.clear()
+            await finish_journey(callback.from_user.id, state)
             return
     
     # --- NEW PARTICIPANT ---
@@ -142,7 +149,7 @@ async def get_result_callback(callback: CallbackQuery, state: FSMContext):
     await show_slot_animation(callback)
     
     # Get new participant number
-    participant_number = existing_number or await get_next_participant_number()
+    participant_number = existing_number or await assign_participant_number(callback.from_user.id)
     
     # Check if winner
     is_winner, prize, prize_type = await check_win()
@@ -156,6 +163,9 @@ async def get_result_callback(callback: CallbackQuery, state: FSMContext):
         prize_type=prize_type
     )
     
+    membership.add(callback.from_user.id, phone)
+    record_step("result")
+    
     # Update daily stats
     await increment_daily_stats(
         small_prizes=1 if prize_type == "small" else 0,
@@ -164,9 +174,7 @@ async def get_result_callback(callback: CallbackQuery, state: FSMContext):
     )
     
     if is_winner:
-        # Send photo of brand zone with win message
-        brand_zone_photo = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "brand_zone.jpg")
-        
+        # Send photo of brand zone with win message (uploaded once, then by file_id)
         # Different message for big vs small prize
         if prize_type == "big":
             prize_text = "🎁 ПОДАРОЧНЫЙ НАБОР от EXEED!"
@@ -178,19 +186,12 @@ async def get_result_callback(callback: CallbackQuery, state: FSMContext):
             f"Ваш номер: {participant_number} 🎉\n\n"
             f"Поздравляем! Вы выиграли:\n"
             f"{prize_text}\n\n"
-            f"Чтобы получить подарок, подойдите на бренд-зону EXEED возле павильона №1 и назовите свой номер участника.\n\n"
+            f"{pickup}\n\n"
             f"Хорошего отдыха и с наступающим!"
         )
         
         await callback.message.delete()
-        
-        if os.path.exists(brand_zone_photo):
-            await callback.message.answer_photo(
-                photo=FSInputFile(brand_zone_photo),
-                caption=win_caption
-            )
-        else:
-            await callback.message.answer(win_caption)
+        await media.answer_photo(callback.message, media.BRAND_ZONE, win_caption)
     else:
         await callback.message.edit_text(
             f"Спасибо за участие!\n"
@@ -201,5 +202,5 @@ async def get_result_callback(callback: CallbackQuery, state: FSMContext):
             f"Хорошего отдыха и с наступающим!"
         )
     
-    await state.clear()
+    await finish_journey(callback.from_user.id, state)
 
@@ -1,33 +1,100 @@
-from aiogram import Router, F
+from aiogram import Router, Bot, F
 from aiogram.types import Message, ReplyKeyboardRemove
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
 
 from bot.handlers.states import RegistrationStates, TaskStates
 from bot.keyboards import get_phone_keyboard, get_subscription_keyboard
 from bot.database import get_or_create_participant, update_participant
+from bot.utils import record_step
+from bot.utils.admission import admission, queue_text, QueuedUser
+from bot.utils.membership import membership_index
+from bot.campaigns import current_campaign, use_campaign
+from bot.utils.user_campaigns import user_campaign
+from bot.config import BUFFER_REGISTRATION
 
 router = Router()
 
 
-@router.message(CommandStart())
-async def cmd_start(message: Message, state: FSMContext):
-    """Handle /start command."""
+async def save_phone(telegram_id: int, phone: str, state: FSMContext):
+    """Buffer phone in FSM data or save it to database right away."""
+    record_step("phone")
+    
+    if BUFFER_REGISTRATION:
+        await state.update_data(phone=phone)
+    else:
+        await update_participant(telegram_id, phone=phone)
+
+
+async def begin_registration(bot: Bot, chat_id: int, user_id: int, username: str | None, state: FSMContext):
+    """Start the journey: reset state and ask for the name."""
     # Clear any previous state
     await state.clear()
     
-    # Get or create participant
-    user = message.from_user
-    await get_or_create_participant(user.id, user.username)
+    record_step("start")
     
-    await message.answer(
-        "Здравствуйте! Как вас зовут?\n"
-        "В ответе должно быть не менее 2 символов."
-    )
+    # Buffered mode skips the database unless the index says this ID may have drawn already
+    participant = None
+    if not BUFFER_REGISTRATION or membership_index().has_user(user_id):
+        participant = await get_or_create_participant(user_id, username)
+    if participant and participant.get("prize_type") is not None:
+        # Already drew: a second run would overwrite the finished record
+        # (and on a previous day the row is archived, with nothing to write to)
+        text = f"Вы уже участвовали!\nВаш номер: {participant['participant_number']}"
+        if participant.get("is_winner"):
+            text += f"\n\n{current_campaign().text('pickup')}"
+        await bot.send_message(chat_id, text)
+        admission.release(user_id)
+        return
+    
+    if BUFFER_REGISTRATION:
+        # Registration fields stay in FSM data until the photo step
+        await state.update_data(username=username)
+    
+    await bot.send_message(chat_id, current_campaign().text("welcome"))
     
     await state.set_state(RegistrationStates.waiting_for_name)
 
 
+async def admit_from_queue(bot: Bot, queued: QueuedUser, storage: BaseStorage):
+    """Waiting room let the user in - continue with registration."""
+    if queued.message_id:
+        try:
+            await bot.edit_message_text(
+                text="Ваша очередь подошла! 🎉",
+                chat_id=queued.chat_id,
+                message_id=queued.message_id
+            )
+        except Exception:
+            # Message may be gone - the name prompt below is what matters
+            pass
+    
+    state = FSMContext(
+        storage=storage,
+        key=StorageKey(bot_id=bot.id, chat_id=queued.chat_id, user_id=queued.user_id)
+    )
+    # Runs from the waiting room's task, outside any update
+    with use_campaign(user_campaign(queued.user_id)):
+        await begin_registration(bot, queued.chat_id, queued.user_id, queued.username, state)
+
+
+@router.message(CommandStart())
+async def cmd_start(message: Message, state: FSMContext, bot: Bot):
+    """Handle /start command."""
+    user = message.from_user
+    
+    # Waiting room: above capacity new users get a queue position instead
+    if not admission.try_admit(user.id):
+        await state.clear()
+        position = admission.enqueue(user.id, message.chat.id, user.username)
+        queue_message = await message.answer(queue_text(position))
+        admission.set_message(user.id, queue_message.message_id, position)
+        return
+    
+    await begin_registration(bot, message.chat.id, user.id, user.username, state)
+
+
 @router.message(RegistrationStates.waiting_for_name)
 async def process_name(message: Message, state: FSMContext):
     """Process user's name."""
@@ -41,8 +108,13 @@ async def process_name(message: Message, state: FSMContext):
         await message.answer("Пожалуйста, укажите корректное имя. В ответе должно быть не менее 2 символов.")
         return
     
-    # Save name to database
-    await update_participant(message.from_user.id, name=name)
+    record_step("name")
+    
+    if BUFFER_REGISTRATION:
+        await state.update_data(name=name)
+    else:
+        # Save name to database
+        await update_participant(message.from_user.id, name=name)
     
     await message.answer(
         f"Приятно познакомиться, <b>{name}</b>!\n"
@@ -60,13 +132,10 @@ async def process_phone_contact(message: Message, state: FSMContext):
     """Process shared contact."""
     phone = message.contact.phone_number
     
-    # Save phone to database
-    await update_participant(message.from_user.id, phone=phone)
+    await save_phone(message.from_user.id, phone, state)
     
     await message.answer(
-        "Отлично, номер сохранён.\n"
-        "Подпишитесь на телеграм-каналы EXEED и «Лужников».\n"
-        "Как закончите, нажмите «Готово».",
+        current_campaign().text("subscribe"),
         reply_markup=ReplyKeyboardRemove()
     )
     
@@ -97,13 +166,10 @@ async def process_phone_text(message: Message, state: FSMContext):
 
     
     if len(digits) >= 10 and len(digits) <= 15:
-        # Save phone to database
-        await update_participant(message.from_user.id, phone=text)
+        await save_phone(message.from_user.id, text, state)
         
         await message.answer(
-            "Отлично, номер сохранён.\n"
-            "Подпишитесь на телеграм-каналы EXEED и «Лужников».\n"
-            "Как закончите, нажмите «Готово».",
+            current_campaign().text("subscribe"),
             reply_markup=ReplyKeyboardRemove()
         )
         
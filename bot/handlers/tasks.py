@@ -1,3 +1,5 @@
+import html
+import logging
 import os
 from datetime import datetime
 from aiogram import Router, Bot, F
@@ -6,20 +8,21 @@ from aiogram.fsm.context import FSMContext
 
 from bot.handlers.states import TaskStates
 from bot.keyboards import get_finish_keyboard
-from bot.database import update_participant
-from bot.config import PHOTOS_DIR
+from bot.database import update_participant, save_registration
+from bot.utils import record_step
+from bot.utils.storage_forwarder import forward_to_storage
+from bot.utils.phash import schedule_photo_check
+from bot.campaigns import current_campaign
+from bot.config import BUFFER_REGISTRATION
 
 router = Router()
-
-
-import logging
-
 logger = logging.getLogger(__name__)
 
+
 @router.message(TaskStates.waiting_for_photo, F.photo | F.document)
 async def process_photo(message: Message, state: FSMContext, bot: Bot):
     """Handle photo upload (compressed or document)."""
-    logger.info(f"Photo received from user {message.from_user.id}")
+    logger.debug(f"Photo received from user {message.from_user.id}")
     
     # Check if key is photo or document
     if message.photo:
@@ -33,58 +36,64 @@ async def process_photo(message: Message, state: FSMContext, bot: Bot):
     # Create filename with user_id and timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"{message.from_user.id}_{timestamp}.jpg"
-    filepath = os.path.join(PHOTOS_DIR, filename)
+    photos_dir = current_campaign().photos_dir
+    filepath = os.path.join(photos_dir, filename)
     
     # Ensure photos directory exists
-    os.makedirs(PHOTOS_DIR, exist_ok=True)
+    os.makedirs(photos_dir, exist_ok=True)
     
     # Download and save photo
     file = await bot.get_file(photo.file_id)
     await bot.download_file(file.file_path, filepath)
     
-    # Get participant data (name, phone)
-    from bot.database import get_or_create_participant, get_next_participant_number
-    participant = await get_or_create_participant(message.from_user.id)
+    record_step("photo")
     
-    # Generate participant number immediately
-    participant_number = await get_next_participant_number()
+    if BUFFER_REGISTRATION:
+        # Persist buffered name/phone together with photo and number in one write
+        participant = await state.get_data()
+        participant_number = await save_registration(
+            message.from_user.id,
+            username=participant.get("username"),
+            name=participant.get("name"),
+            phone=participant.get("phone"),
+            photo_path=filepath
+        )
+        await state.update_data(participant_number=participant_number)
+    else:
+        # Get participant data (name, phone)
+        from bot.database import get_or_create_participant, assign_participant_number
+        participant = await get_or_create_participant(message.from_user.id)
+        
+        # Save photo path to database
+        await update_participant(message.from_user.id, photo_path=filepath)
+        
+        # Generate participant number immediately (atomic - numbers are unique)
+        participant_number = await assign_participant_number(message.from_user.id)
     
-    # Save photo path and number to database
-    await update_participant(
-        message.from_user.id, 
-        photo_path=filepath,
-        participant_number=participant_number
-    )
+    # Perceptual hash + duplicate check run in the background
+    schedule_photo_check(bot, message.from_user.id, participant_number, filepath)
     
     # Forward to storage channel if configured
     from bot.config import STORAGE_CHANNEL_ID
-    logger.info(f"DEBUG: STORAGE_CHANNEL_ID value is '{STORAGE_CHANNEL_ID}'")
     
     if STORAGE_CHANNEL_ID:
-        try:
-            user = message.from_user
-            name = participant.get("name", "Не указано")
-            phone = participant.get("phone", "Не указано")
-            username = f"@{user.username}" if user.username else "Нет"
-            
-            caption = (
-                f"👤 <b>Новый участник #{participant_number}</b>\n\n"
-                f"🆔 ID: <code>{user.id}</code>\n"
-                f"👤 Имя: {name}\n"
-                f"📱 Телефон: {phone}\n"
-                f"🔗 Username: {username}\n\n"
-                f"📁 Файл: {filename}"
-            )
-            
-            await bot.send_photo(
-                chat_id=STORAGE_CHANNEL_ID,
-                photo=photo.file_id,
-                caption=caption
-            )
-        except Exception as e:
-            # Debugging: Show error to user
-            logger.error(f"Failed to forward photo: {e}")
-            await message.answer(f"⚠️ <b>Debug:</b> Не удалось переслать фото в канал.\nОшибка: {str(e)}", parse_mode="HTML")
+        user = message.from_user
+        # The caption is HTML: user input must not be able to break (or inject) the markup
+        name = html.escape(participant.get("name") or "Не указано")
+        phone = html.escape(participant.get("phone") or "Не указано")
+        username = html.escape(f"@{user.username}") if user.username else "Нет"
+        
+        caption = (
+            f"👤 <b>Новый участник #{participant_number}</b>\n\n"
+            f"🆔 ID: <code>{user.id}</code>\n"
+            f"👤 Имя: {name}\n"
+            f"📱 Телефон: {phone}\n"
+            f"🔗 Username: {username}\n\n"
+            f"📁 Файл: {filename}"
+        )
+        
+        # Sent in albums by the storage forwarder (one API call per up to 10 photos)
+        forward_to_storage(photo.file_id, caption, is_document=not message.photo)
 
     await message.answer(
         "Есть! Осталось совсем чуть-чуть.\n"
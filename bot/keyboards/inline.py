@@ -4,7 +4,12 @@ from aiogram.types import (
     ReplyKeyboardMarkup,
     KeyboardButton
 )
-from bot.config import EXEED_CHANNEL_URL, LUZHNIKI_CHANNEL_URL
+from bot.campaigns import current_campaign
+from bot.utils.settings_store import current_settings
+from bot.utils.subscriptions import campaign_channels
+
+# Campaign slug -> (settings version, its subscription keyboard)
+_subscription_keyboards: dict[str, tuple[int, InlineKeyboardMarkup]] = {}
 
 
 def get_phone_keyboard() -> ReplyKeyboardMarkup:
@@ -19,14 +24,18 @@ def get_phone_keyboard() -> ReplyKeyboardMarkup:
 
 
 def get_subscription_keyboard() -> InlineKeyboardMarkup:
-    """Keyboard with channel links and check button."""
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="📢 EXEED Russia", url=EXEED_CHANNEL_URL)],
-            [InlineKeyboardButton(text="🏟 Лужники", url=LUZHNIKI_CHANNEL_URL)],
-            [InlineKeyboardButton(text="✅ Готово", callback_data="check_subscription")]
-        ]
-    )
+    """Keyboard with channel links and check button (rebuilt only when the channel settings change)."""
+    slug = current_campaign().slug
+    version = current_settings().version
+    cached = _subscription_keyboards.get(slug)
+    if cached is None or cached[0] != version:
+        cached = _subscription_keyboards[slug] = (version, InlineKeyboardMarkup(
+            inline_keyboard=[
+                *([InlineKeyboardButton(text=channel.button, url=channel.url)] for channel in campaign_channels()),
+                [InlineKeyboardButton(text="✅ Готово", callback_data="check_subscription")]
+            ]
+        ))
+    return cached[1]
 
 
 def get_finish_keyboard() -> InlineKeyboardMarkup:
@@ -1,28 +1,90 @@
+import time
+
+# The boot clock starts before the heavy imports (aiogram, aiohttp, pydantic models)
+BOOT_STARTED = time.monotonic()
+
 import asyncio
 import logging
 import sys
 import os
+from functools import partial
 
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.memory import MemoryStorage, SimpleEventIsolation
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiohttp import web
 
-from bot.config import BOT_TOKEN
-from bot.database import init_db
+from bot.config import (
+    BOT_TOKEN,
+    USE_UVLOOP,
+    HTTP_POOL_SIZE,
+    HTTP_BACKGROUND_POOL_SIZE,
+    RECORD_UPDATES,
+    PREWARM_DATABASE,
+    POLLING_TASK_LIMIT
+)
+from bot.database import init_db, prewarm_database
 from bot.handlers import setup_routers
+from bot.handlers.start import admit_from_queue
+from bot.campaigns import CAMPAIGNS, use_campaign, for_each_campaign
+from bot.middlewares import UpdateScheduler, LogContextMiddleware, UpdateRecorder, InFlightTracker, CampaignMiddleware
+from bot.utils import run_funnel_flusher, run_backup_loop, run_archiver
+from bot.utils.storage_forwarder import run_storage_forwarder
+from bot.utils.outbox import run_outbox_dispatcher
+from bot.utils.broadcast import resume_broadcasts
+from bot.utils.phash import load_photo_hashes, start_executor, shutdown_executor
+from bot.utils.membership import load_membership
+from bot.utils.user_campaigns import load_user_campaigns
+from bot.utils.settings_store import load_settings
+from bot.utils.admission import admission
+from bot.utils.logging_setup import setup_logging, stop_logging, dropped_records
+from bot.utils.watchdog import watchdog
+from bot.utils.http_session import TunedSession, session_metrics
+from bot.utils.lifecycle import graceful_shutdown
+from bot.utils.media import preload_media
+from bot.utils.startup import startup, check_config, ConfigError
+
+IMPORTS_DONE = time.monotonic()
 
 
 async def handle_health_check(request):
-    """Simple health check endpoint."""
+    """Liveness: the process is up and serving HTTP."""
     return web.Response(text="OK", status=200)
 
 
-async def start_health_check_server():
-    """Start a background HTTP server for Render health checks."""
+async def handle_readiness(request):
+    """Readiness: initialized and polling; not ready while starting up or shutting down."""
+    if startup.ready:
+        return web.Response(text="READY", status=200)
+    return web.Response(text=startup.status, status=503)
+
+
+async def handle_metrics(request):
+    """Event loop lag percentiles and logging drops in Prometheus text format."""
+    lag = watchdog.percentiles()
+    lines = [
+        f'loop_lag_seconds{{quantile="{quantile}"}} {lag[key]:.6f}'
+        for quantile, key in (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99"))
+    ]
+    lines += [
+        f"loop_lag_max_seconds {watchdog.max_lag:.6f}",
+        f"loop_stalls_total {watchdog.stalls}",
+        f"log_records_dropped_total {dropped_records()}",
+        f"ready {int(startup.ready)}",
+    ]
+    if startup.boot_seconds is not None:
+        lines.append(f"startup_seconds {startup.boot_seconds:.3f}")
+    lines += session_metrics()
+    return web.Response(text="\n".join(lines) + "\n")
+
+
+async def start_health_check_server() -> web.AppRunner:
+    """Start the HTTP server for Render health checks (liveness, readiness, metrics)."""
     app = web.Application()
     app.router.add_get("/", handle_health_check)
+    app.router.add_get("/ready", handle_readiness)
+    app.router.add_get("/metrics", handle_metrics)
     runner = web.AppRunner(app)
     await runner.setup()
     
@@ -32,57 +94,164 @@ async def start_health_check_server():
     
     logging.info(f"Health check server starting on port {port}...")
     await site.start()
-    
-    # Keep it running
-    while True:
-        await asyncio.sleep(3600)
+    return runner
 
 
-async def main():
+async def init_databases() -> int:
+    """Schema of every campaign's database (a failure stops the startup)."""
+    for campaign in CAMPAIGNS.values():
+        with use_campaign(campaign):
+            await init_db()
+    return len(CAMPAIGNS)
+
+
+def _total(results: dict | None) -> int:
+    """Sum of per-campaign counts (failed campaigns give None)."""
+    return sum(count or 0 for count in (results or {}).values())
+
+
+async def main(uvloop_missing: bool = False):
     """Main entry point for the bot."""
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        stream=sys.stdout
-    )
+    # Logging goes through a queue to a writer thread, never blocking the loop on stdout
+    setup_logging()
     logger = logging.getLogger(__name__)
+    if uvloop_missing:
+        logger.warning("USE_UVLOOP is set but uvloop is not installed, using asyncio")
+    
+    startup.started = BOOT_STARTED
+    startup.phases["imports"] = IMPORTS_DONE - BOOT_STARTED
     
-    # Check token
-    if not BOT_TOKEN:
-        logger.error("BOT_TOKEN is not set! Please configure .env file.")
+    # Fail fast on settings the bot cannot run with
+    try:
+        for warning in check_config():
+            logger.warning(f"Config: {warning}")
+    except ConfigError as e:
+        logger.error(f"{e}! Please configure .env file.")
+        stop_logging()
         sys.exit(1)
     
-    # Initialize database
-    await init_db()
-    logger.info("Database initialized")
-
-    from bot.config import STORAGE_CHANNEL_ID
-
-    logger.info(f"Configured STORAGE_CHANNEL_ID: '{STORAGE_CHANNEL_ID}'")
+    # Liveness right away; readiness once polling runs
+    health = await startup.run("health server", start_health_check_server())
     
-    # Create bot and dispatcher
+    campaigns = await startup.run("schema", init_databases())
+    logger.info(f"Database initialized for {campaigns} campaigns")
+
+    # Create bots and dispatcher: handler replies and background traffic get separate connection pools
     bot = Bot(
         token=BOT_TOKEN,
+        session=TunedSession("interactive", limit=HTTP_POOL_SIZE),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+    background_bot = Bot(
+        token=BOT_TOKEN,
+        session=TunedSession("background", limit=HTTP_BACKGROUND_POOL_SIZE),
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    dp = Dispatcher(storage=MemoryStorage())
+    # Event isolation serializes updates per user (FIFO), the scheduler bounds and prioritizes them
+    dp = Dispatcher(storage=MemoryStorage(), events_isolation=SimpleEventIsolation())
+    dp["background_bot"] = background_bot
+    # Outermost: shutdown waits for every update that got this far
+    in_flight = InFlightTracker()
+    dp.update.outer_middleware(in_flight)
+    dp.update.outer_middleware(LogContextMiddleware())
+    # Opt-in traffic recording for replay
+    recorder = UpdateRecorder() if RECORD_UPDATES else None
+    if recorder:
+        dp.update.outer_middleware(recorder)
+    # Everything below runs in the sender's campaign
+    dp.update.outer_middleware(CampaignMiddleware())
+    dp.update.outer_middleware(UpdateScheduler())
     
     # Setup routers
     main_router = setup_routers()
     dp.include_router(main_router)
     
-    logger.info("Bot starting...")
+    # Independent of each other once the schema exists
+    results = await startup.gather(**{
+        # Participation index for dedup checks without queries (per campaign)
+        "membership": for_each_campaign(load_membership),
+        # Known photo hashes for duplicate detection, hashing workers started ahead of the first photo
+        "photo hashes": for_each_campaign(load_photo_hashes),
+        "hash workers": start_executor(),
+        "user campaigns": load_user_campaigns(),
+        # Prize and channel overrides set by admins at runtime
+        "settings": for_each_campaign(load_settings),
+        # Bot identity (cached for polling) over a warm connection; static media file_ids
+        "bot identity": bot.me(),
+        "media": preload_media(background_bot),
+        **({"prewarm": for_each_campaign(prewarm_database)} if PREWARM_DATABASE else {}),
+    })
+    if results["bot identity"] is None:
+        logger.error("Bot API is unreachable or BOT_TOKEN was rejected")
+    logger.info(
+        f"Loaded {_total(results['membership'])} participants, {_total(results['photo hashes'])} photo hashes, "
+        f"{results['user campaigns']} users in campaigns, {results['media']} cached media"
+    )
+    
+    # Continue broadcasts interrupted by a restart
+    await startup.run("broadcasts", for_each_campaign(lambda: resume_broadcasts(background_bot)))
+    dp.startup.register(startup.mark_ready)
     
-    # Start health check server and bot polling concurrently
-    try:
-        await asyncio.gather(
-            dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types()),
-            start_health_check_server()
+    logger.info(f"Bot starting on {type(asyncio.get_running_loop()).__module__} event loop...")
+    
+    # Background work runs beside polling; polling returns on SIGTERM/SIGINT
+    background = [
+        asyncio.create_task(work) for work in (
+            run_funnel_flusher(),
+            run_backup_loop(background_bot),
+            run_archiver(),
+            run_storage_forwarder(background_bot),
+            run_outbox_dispatcher(background_bot),
+            watchdog.run(),
+            admission.run(bot, partial(admit_from_queue, storage=dp.storage))
+        )
+    ]
+    polling = asyncio.create_task(
+        dp.start_polling(
+            bot,
+            allowed_updates=dp.resolve_used_update_types(),
+            close_bot_session=False,
+            # The scheduler limits running handlers, this the tasks waiting for it
+            tasks_concurrency_limit=POLLING_TASK_LIMIT or None
         )
+    )
+    failed = []
+    try:
+        # Until polling stops or a background task crashes (disabled ones just return)
+        running = {polling, *background}
+        while polling in running and not failed:
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            failed = [task for task in done if task.exception()]
     finally:
+        startup.mark_stopping()
+        if not polling.done():
+            await dp.stop_polling()
+        await graceful_shutdown(in_flight, background, background_bot)
+        await health.cleanup()
+        shutdown_executor()
         await bot.session.close()
+        await background_bot.session.close()
+        if recorder:
+            recorder.close()
+        stop_logging()
+
+    for task in failed:
+        task.result()
+
+
+def run():
+    """Run the bot, on uvloop if USE_UVLOOP is set and it is installed."""
+    uvloop_missing = False
+    if USE_UVLOOP:
+        try:
+            import uvloop
+        except ImportError:
+            # Logging is set up inside main(): the warning is logged from there
+            uvloop_missing = True
+        else:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    asyncio.run(main(uvloop_missing=uvloop_missing))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
@@ -0,0 +1,8 @@
+from .scheduler import UpdateScheduler, Priority
+from .log_context import LogContextMiddleware
+from .recorder import UpdateRecorder
+from .in_flight import InFlightTracker
+from .campaign import CampaignMiddleware
+
+__all__ = ["UpdateScheduler", "Priority", "LogContextMiddleware", "UpdateRecorder", "InFlightTracker",
+           "CampaignMiddleware"]
@@ -0,0 +1,45 @@
+"""
+Outer update middleware that routes every update to the sender's campaign.
+"""
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from bot.campaigns import get_campaign, use_campaign
+from bot.utils.user_campaigns import user_campaign, join_campaign
+
+
+def start_payload(update: Update) -> str | None:
+    """Deep-link parameter of a /start message, if any."""
+    text = update.message.text if update.message else None
+    if not text or not text.startswith("/start"):
+        return None
+    command, _, payload = text.partition(" ")
+    if command.split("@", 1)[0] != "/start":
+        return None
+    return payload.strip() or None
+
+
+class CampaignMiddleware(BaseMiddleware):
+    """Handles the update in the sender's campaign; /start <slug> of a known campaign switches it first."""
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        payload = start_payload(event)
+        joined = get_campaign(payload) if payload else None
+        if joined:
+            await join_campaign(user.id, joined)
+
+        campaign = joined or user_campaign(user.id)
+        data["campaign"] = campaign
+        with use_campaign(campaign):
+            return await handler(event, data)
@@ -0,0 +1,57 @@
+"""
+Outer update middleware counting updates being handled, so shutdown can wait for them.
+Once closed, updates that have not started yet (queued behind the same user's event
+isolation lock) are dropped: their FSM state would not survive the restart anyway.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+
+class InFlightTracker(BaseMiddleware):
+    """Counts handlers in progress (including those waiting for a scheduler slot)."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.dropped = 0
+        self.accepting = True
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def close(self) -> None:
+        """Stop starting new updates."""
+        self.accepting = False
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """Wait until nothing is being handled. Returns False if `timeout` ran out first."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                await asyncio.wait_for(self._idle.wait(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                return False
+            # A user's next update enters right after the previous one releases the event isolation lock
+            await asyncio.sleep(0.05)
+            if self._idle.is_set():
+                return True
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any]
+    ) -> Any:
+        if not self.accepting:
+            self.dropped += 1
+            return None
+        self.in_flight += 1
+        self._idle.clear()
+        try:
+            return await handler(event, data)
+        finally:
+            self.in_flight -= 1
+            if not self.in_flight:
+                self._idle.set()
@@ -0,0 +1,30 @@
+"""
+Outer update middleware that tags log records with the update being handled.
+"""
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from bot.utils.logging_setup import log_context
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """Sets user_id, state and update_id for every log record written while handling an update."""
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        token = log_context.set({
+            "user_id": user.id if user else None,
+            "state": data.get("raw_state"),
+            "update_id": event.update_id,
+        })
+        try:
+            return await handler(event, data)
+        finally:
+            log_context.reset(token)
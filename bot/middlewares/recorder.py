@@ -0,0 +1,122 @@
+"""
+Opt-in recording of incoming updates for replay (python -m bot.replay).
+- One JSON line per update: arrival time, FSM state (replay restores it for users whose
+  journey began before the recording) and the redacted update
+- Names, usernames and phone numbers are replaced with stable pseudonyms, so the
+  same person still looks the same across a recording (dedup paths replay faithfully)
+- Written through a bounded queue to a size-rotated, append-only file in a writer thread
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from bot.config import RECORD_PATH, RECORD_MAX_BYTES, RECORD_BACKUPS
+from bot.handlers.states import RegistrationStates
+from bot.utils.logging_setup import DroppingQueueHandler
+
+# Digit runs long enough to be a phone number, with the usual separators inside
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s\-()]{8,}\d")
+NAME_FIELDS = ("first_name", "last_name")
+PERSON_KEYS = ("from", "chat", "user", "contact", "sender_chat")
+
+
+def _pseudo_digits(value: str, count: int) -> str:
+    digest = hashlib.blake2b(value.encode(), digest_size=16).hexdigest()
+    return "".join(str(int(char, 16) % 10) for char in digest)[:count].ljust(count, "0")
+
+
+def redact_phone(text: str) -> str:
+    """Replace the digits of a phone (keeping its formatting and first digit) with stable fake ones."""
+    digits = re.sub(r"\D", "", text)
+    fake = iter(digits[:1] + _pseudo_digits(digits, len(digits) - 1))
+    return re.sub(r"\d", lambda _: next(fake), text)
+
+
+def redact_name(name: str) -> str:
+    return f"Name{_pseudo_digits(name, 6)}"
+
+
+def _redact_person(person: dict) -> None:
+    for field in NAME_FIELDS:
+        if person.get(field):
+            person[field] = redact_name(person[field])
+    if person.get("username"):
+        person["username"] = f"user{_pseudo_digits(person['username'], 8)}"
+    if person.get("phone_number"):
+        person["phone_number"] = redact_phone(person["phone_number"])
+
+
+def redact_text(text: str, raw_state: str | None) -> str:
+    """Message text or caption: the whole answer to the name question, phone numbers anywhere."""
+    if raw_state == RegistrationStates.waiting_for_name.state:
+        return redact_name(text)
+    return PHONE_PATTERN.sub(lambda m: redact_phone(m.group()), text)
+
+
+def redact_update(data: dict, raw_state: str | None) -> dict:
+    """Strip personal data from a dumped update (in place)."""
+    for event in data.values():
+        if not isinstance(event, dict):
+            continue
+        # Callback queries carry their message one level down
+        for container in (event, event.get("message")):
+            if not isinstance(container, dict):
+                continue
+            for key in PERSON_KEYS:
+                if isinstance(container.get(key), dict):
+                    _redact_person(container[key])
+
+        for field in ("text", "caption"):
+            if event.get(field):
+                event[field] = redact_text(event[field], raw_state)
+    return data
+
+
+class UpdateRecorder(BaseMiddleware):
+    """Outer update middleware writing redacted updates to a rotating JSONL file."""
+
+    def __init__(self, path: str = RECORD_PATH, max_bytes: int = RECORD_MAX_BYTES, backups: int = RECORD_BACKUPS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        output = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        output.setFormatter(logging.Formatter("%(message)s"))
+
+        self._queue_handler = DroppingQueueHandler(queue.Queue(maxsize=10000))
+        self._listener = QueueListener(self._queue_handler.queue, output)
+        self._listener.start()
+
+    @property
+    def dropped(self) -> int:
+        return self._queue_handler.dropped
+
+    def record(self, update: Update, raw_state: str | None) -> None:
+        data = update.model_dump(mode="json", by_alias=True, exclude_none=True, exclude_unset=True)
+        line = json.dumps(
+            {"t": round(time.time(), 3), "state": raw_state, "update": redact_update(data, raw_state)},
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        self._queue_handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+
+    def close(self) -> None:
+        self._listener.stop()
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any]
+    ) -> Any:
+        try:
+            self.record(event, data.get("raw_state"))
+        except Exception as e:
+            logging.getLogger(__name__).debug(f"Update {event.update_id} not recorded: {e}")
+        return await handler(event, data)
@@ -0,0 +1,126 @@
+"""
+Bounded worker pool with priority classes for incoming updates.
+- At most SCHEDULER_WORKERS updates are handled at once, the rest wait for a slot
+- Waiting updates are admitted by class: admin, draw results, registration, chatter
+- Per-user FIFO comes from the dispatcher's SimpleEventIsolation (this middleware runs inside its lock)
+- When more than SCHEDULER_SHED_DEPTH updates wait, new chatter is dropped
+- This bounds handler concurrency only: aiogram still creates a task per update before the
+  middleware runs, and a waiting update holds its user's isolation lock. Intake itself is
+  bounded at polling (POLLING_TASK_LIMIT), so queued tasks and their memory stay finite
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+from enum import IntEnum
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from bot.campaigns import current_campaign
+from bot.config import SCHEDULER_WORKERS, SCHEDULER_SHED_DEPTH
+from bot.handlers.states import RegistrationStates, TaskStates
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    ADMIN = 0
+    RESULT = 1
+    REGISTRATION = 2
+    CHATTER = 3
+
+
+REGISTRATION_STATES = {state.state for state in RegistrationStates.__all_states__}
+STAFF_CALLBACK_PREFIXES = ("broadcast_", "redeem:")
+
+
+def classify(update: Update, raw_state: str | None) -> Priority:
+    """Priority class of an update."""
+    if update.callback_query:
+        callback = update.callback_query
+        data = callback.data or ""
+        if callback.from_user.id in current_campaign().staff_ids and data.startswith(STAFF_CALLBACK_PREFIXES):
+            return Priority.ADMIN
+        if data == "get_result":
+            return Priority.RESULT
+        if data == "check_subscription":
+            return Priority.REGISTRATION
+        return Priority.CHATTER
+
+    message = update.message
+    if message is None:
+        return Priority.CHATTER
+
+    text = message.text or ""
+    if message.from_user and message.from_user.id in current_campaign().staff_ids and (text.startswith("/") or raw_state is None):
+        return Priority.ADMIN
+    if text.startswith("/start"):
+        return Priority.REGISTRATION
+    if raw_state in REGISTRATION_STATES:
+        return Priority.REGISTRATION
+    if raw_state == TaskStates.waiting_for_photo.state and (message.photo or message.document):
+        return Priority.REGISTRATION
+    return Priority.CHATTER
+
+
+class UpdateScheduler(BaseMiddleware):
+    """Outer update middleware that admits handlers into a bounded pool by priority."""
+
+    def __init__(self, workers: int = SCHEDULER_WORKERS, shed_depth: int = SCHEDULER_SHED_DEPTH):
+        self.workers = workers
+        self.shed_depth = shed_depth
+        self.active = 0
+        self.shed = 0
+        self._waiting: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    @property
+    def depth(self) -> int:
+        """Updates waiting for a worker slot."""
+        return len(self._waiting)
+
+    async def _acquire(self, priority: Priority) -> None:
+        if self.active < self.workers and not self._waiting:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before cancellation
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        # Hand the slot straight to the most important waiter
+        while self._waiting:
+            _, _, future = heapq.heappop(self._waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any]
+    ) -> Any:
+        priority = classify(event, data.get("raw_state"))
+
+        if priority == Priority.CHATTER and self.depth >= self.shed_depth:
+            self.shed += 1
+            if self.shed % 100 == 1:
+                logger.warning(f"Scheduler overloaded ({self.depth} waiting), shed {self.shed} chatter updates")
+            return None
+
+        await self._acquire(priority)
+        try:
+            return await handler(event, data)
+        finally:
+            self._release()
@@ -0,0 +1,270 @@
+"""
+Replay recorded updates through the bot's routers against a fake Bot API.
+
+Feeds a recording made with RECORD_UPDATES=true into a dispatcher configured like
+bot.main (same routers and middlewares), on a scratch database and photo directory
+(campaigns from CAMPAIGNS_FILE included).
+Bot API calls are answered locally, optionally with simulated network latency.
+
+Usage:
+    python -m bot.replay recordings/updates.jsonl                 # original timing
+    python -m bot.replay recordings/updates.jsonl* --fast         # as fast as possible
+    python -m bot.replay updates.jsonl --speed 10 --api-latency 50
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from dotenv import load_dotenv
+
+
+def load_recording(paths: list[str]) -> list[dict]:
+    """Recorded entries from one or more (rotated) files, in arrival order."""
+    entries = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            entries.extend(json.loads(line) for line in f if line.strip())
+    entries.sort(key=lambda entry: entry["t"])
+    return entries
+
+
+def scratch_campaigns(path: str, work_dir: str) -> str:
+    """A copy of the campaigns file whose campaigns keep their data in the scratch directory."""
+    with open(path, encoding="utf-8") as f:
+        campaigns = json.load(f)
+    for slug, settings in campaigns.items():
+        data_dir = os.path.join(work_dir, "campaigns", slug)
+        settings["database_path"] = os.path.join(data_dir, "database.db")
+        settings["archive_dir"] = os.path.join(data_dir, "archive")
+        settings["photos_dir"] = os.path.join(data_dir, "photos")
+    scratch = os.path.join(work_dir, "campaigns.json")
+    with open(scratch, "w", encoding="utf-8") as f:
+        json.dump(campaigns, f, ensure_ascii=False)
+    return scratch
+
+
+def fake_photo() -> bytes:
+    """A small valid JPEG, so photo hashing runs as in production."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return b"\xff\xd8\xff\xd9"
+    output = io.BytesIO()
+    Image.new("RGB", (64, 64), (200, 30, 30)).save(output, format="JPEG")
+    return output.getvalue()
+
+
+def build_fake_session(api_latency: float):
+    """BaseSession answering every Bot API method locally."""
+    from aiogram.client.session.base import BaseSession
+    from aiogram.types import Message, User, File, ChatMemberMember
+
+    class FakeSession(BaseSession):
+        def __init__(self):
+            super().__init__()
+            self.calls: Counter = Counter()
+            self._message_id = 0
+            self._photo = fake_photo()
+
+        def _message(self, bot, method) -> Message:
+            self._message_id += 1
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message.model_validate({
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id if isinstance(chat_id, int) else 0, "type": "private"},
+                "text": getattr(method, "text", None),
+            }, context={"bot": bot})
+
+        async def make_request(self, bot, method, timeout=None):
+            name = method.__api_method__
+            self.calls[name] += 1
+            if api_latency:
+                await asyncio.sleep(api_latency)
+
+            returning = method.__returning__
+            if name == "getMe":
+                return User(id=bot.id, is_bot=True, first_name="Replay", username="replay_bot")
+            if name == "getChatMember":
+                user = User(id=method.user_id, is_bot=False, first_name="Replay")
+                return ChatMemberMember(user=user)
+            if name == "getFile":
+                return File(
+                    file_id=method.file_id, file_unique_id=method.file_id[-16:],
+                    file_size=len(self._photo), file_path=f"photos/{method.file_id[-16:]}.jpg"
+                )
+            if returning is Message:
+                return self._message(bot, method)
+            if name == "sendMediaGroup":
+                return [self._message(bot, method) for _ in method.media]
+            return True
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            self.calls["download"] += 1
+            if api_latency:
+                await asyncio.sleep(api_latency)
+            yield self._photo
+
+        async def close(self):
+            pass
+
+    return FakeSession()
+
+
+async def replay(entries: list[dict], speed: float | None, api_latency: float) -> dict:
+    """Feed entries through a dispatcher like bot.main's. speed=None replays as fast as possible."""
+    from aiogram import Bot, Dispatcher
+    from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+    from aiogram.fsm.storage.base import StorageKey
+    from aiogram.fsm.storage.memory import MemoryStorage, SimpleEventIsolation
+    from aiogram.types import Update
+
+    from bot.config import POLLING_TASK_LIMIT
+    from bot.database import init_db
+    from bot.handlers import setup_routers
+    from bot.campaigns import for_each_campaign
+    from bot.middlewares import UpdateScheduler, LogContextMiddleware, CampaignMiddleware
+    from bot.utils.membership import load_membership
+    from bot.utils.phash import load_photo_hashes, shutdown_executor
+    from bot.utils.user_campaigns import load_user_campaigns
+    from bot.utils.settings_store import load_settings
+
+    await for_each_campaign(init_db)
+    await for_each_campaign(load_membership)
+    await for_each_campaign(load_photo_hashes)
+    await load_user_campaigns()
+    await for_each_campaign(load_settings)
+
+    session = build_fake_session(api_latency)
+    bot = Bot(token="123456:REPLAY", session=session)
+    dp = Dispatcher(storage=MemoryStorage(), events_isolation=SimpleEventIsolation())
+    dp["background_bot"] = bot
+    dp.update.outer_middleware(LogContextMiddleware())
+    dp.update.outer_middleware(CampaignMiddleware())
+    scheduler = UpdateScheduler()
+    dp.update.outer_middleware(scheduler)
+    dp.include_router(setup_routers())
+
+    latencies: list[float] = []
+    errors = 0
+    seen_users: set[tuple[int, int]] = set()
+
+    async def restore_state(update: Update, state: str | None):
+        """A user's first update in the recording gets the FSM state it was recorded in."""
+        context = UserContextMiddleware.resolve_event_context(update)
+        if context.chat is None or context.user is None:
+            return
+        key = (context.chat.id, context.user.id)
+        if key in seen_users:
+            return
+        seen_users.add(key)
+        # Users who started before the recording (or its rotated-out part) resume mid-journey
+        if state:
+            await dp.storage.set_state(StorageKey(bot_id=bot.id, chat_id=key[0], user_id=key[1]), state)
+
+    intake = asyncio.Semaphore(POLLING_TASK_LIMIT) if POLLING_TASK_LIMIT else None
+
+    async def feed(update: Update):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await dp.feed_update(bot, update)
+        except Exception as e:
+            errors += 1
+            logging.getLogger("bot.replay").warning(f"Update {update.update_id} failed: {e!r}")
+        finally:
+            if intake:
+                intake.release()
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    first = entries[0]["t"] if entries else 0
+    started = time.perf_counter()
+    for entry in entries:
+        if speed:
+            delay = (entry["t"] - first) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        update = Update.model_validate(entry["update"], context={"bot": bot})
+        await restore_state(update, entry.get("state"))
+        # Like polling: each update is handled in its own task, at most POLLING_TASK_LIMIT at once
+        if intake:
+            await intake.acquire()
+        tasks.append(asyncio.create_task(feed(update)))
+        if not speed:
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    shutdown_executor()
+
+    latencies.sort()
+    return {
+        "updates": len(entries),
+        "elapsed": elapsed,
+        "errors": errors,
+        "shed": scheduler.shed,
+        "p50": statistics.median(latencies) if latencies else 0,
+        "p99": latencies[int((len(latencies) - 1) * 0.99)] if latencies else 0,
+        "calls": session.calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", nargs="+", help="recording files (rotated parts are merged by time)")
+    timing = parser.add_mutually_exclusive_group()
+    timing.add_argument("--fast", action="store_true", help="no delays between updates")
+    timing.add_argument("--speed", type=float, default=1.0, help="time scale, 2 = twice as fast (default 1)")
+    parser.add_argument("--api-latency", type=float, default=0, help="simulated Bot API latency, ms")
+    parser.add_argument("--db", help="database to replay into (default: fresh scratch database)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(name)s - %(levelname)s - %(message)s")
+
+    # Never touch production data: scratch database and photos unless a database is given
+    work_dir = tempfile.mkdtemp(prefix="bot_replay_")
+    if not args.db:
+        os.environ["DATABASE_PATH"] = os.path.join(work_dir, "replay.db")
+        os.environ["ARCHIVE_DIR"] = os.path.join(work_dir, "archive")
+    else:
+        os.environ["DATABASE_PATH"] = args.db
+    os.environ["PHOTOS_DIR"] = os.path.join(work_dir, "photos")
+    os.environ["STORAGE_CHANNEL_ID"] = ""
+    os.environ["RECORD_UPDATES"] = "false"
+    # Campaigns may name their own database paths (and .env is only read on import of the
+    # config): replay them into the scratch directory as well, whatever --db says
+    load_dotenv()
+    campaigns_file = os.getenv("CAMPAIGNS_FILE", "")
+    os.environ["CAMPAIGNS_FILE"] = scratch_campaigns(campaigns_file, work_dir) if campaigns_file else ""
+
+    entries = load_recording(args.recordings)
+    if not entries:
+        print("Recording is empty")
+        return 1
+
+    span = entries[-1]["t"] - entries[0]["t"]
+    mode = "as fast as possible" if args.fast else f"x{args.speed:g} original timing"
+    print(f"▶️  Replaying {len(entries)} updates ({span:.0f}s recorded), {mode}")
+
+    result = asyncio.run(replay(entries, None if args.fast else args.speed, args.api_latency / 1000))
+
+    print(f"   Time:        {result['elapsed']:.2f}s ({result['updates'] / max(result['elapsed'], 1e-9):.1f} updates/s)")
+    print(f"   Handling:    p50 {result['p50'] * 1000:.1f}ms, p99 {result['p99'] * 1000:.1f}ms")
+    print(f"   Errors:      {result['errors']}, shed: {result['shed']}")
+    print("   API calls:   " + ", ".join(f"{name} {count}" for name, count in result["calls"].most_common()))
+
+    import shutil
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,7 @@
 from .randomizer import check_win
+from .funnel import record_step, flush_funnel, run_funnel_flusher
+from .backup import run_backup, run_backup_loop
+from .archiver import run_archiver
 
-__all__ = ["check_win"]
+__all__ = ["check_win", "record_step", "flush_funnel", "run_funnel_flusher",
+           "run_backup", "run_backup_loop", "run_archiver"]
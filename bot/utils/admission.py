@@ -0,0 +1,157 @@
+"""
+Waiting-room admission control for peak load.
+- At most ADMISSION_CAPACITY users are in the journey (/start ... draw) at once
+- Others get a queue position message that is edited as they advance
+- Queued users are admitted automatically in arrival order as journeys finish or time out
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+
+from bot.config import (
+    ADMISSION_CAPACITY,
+    ADMISSION_JOURNEY_TIMEOUT,
+    ADMISSION_UPDATE_INTERVAL,
+    ADMISSION_EDITS_PER_TICK
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueuedUser:
+    user_id: int
+    chat_id: int
+    username: str | None
+    queued_at: float
+    message_id: int | None = None
+    shown_position: int | None = None
+
+
+def queue_text(position: int) -> str:
+    return (
+        "Сейчас очень много желающих 🙌\n"
+        f"Вы в очереди, позиция {position}.\n"
+        "Мы напишем, как только подойдёт ваша очередь — ничего нажимать не нужно."
+    )
+
+
+class AdmissionController:
+    """Tracks in-flight journeys and the virtual queue."""
+
+    def __init__(self, capacity: int = ADMISSION_CAPACITY, journey_timeout: int = ADMISSION_JOURNEY_TIMEOUT):
+        self.capacity = capacity
+        self.journey_timeout = journey_timeout
+        self._journeys: dict[int, float] = {}
+        self._queue: OrderedDict[int, QueuedUser] = OrderedDict()
+        self.admitted_total = 0
+        self.max_wait = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._journeys)
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def try_admit(self, user_id: int) -> bool:
+        """Admit a user into the journey if there is room (users already inside stay inside)."""
+        if not self.enabled:
+            return True
+        if user_id in self._journeys:
+            self._journeys[user_id] = time.monotonic()
+            return True
+        if len(self._journeys) < self.capacity and not self._queue:
+            self._journeys[user_id] = time.monotonic()
+            self.admitted_total += 1
+            return True
+        return False
+
+    def enqueue(self, user_id: int, chat_id: int, username: str | None) -> int:
+        """Put a user in the queue (keeps their place if already queued). Returns position."""
+        if user_id not in self._queue:
+            self._queue[user_id] = QueuedUser(user_id, chat_id, username, time.monotonic())
+        return self.position(user_id)
+
+    def set_message(self, user_id: int, message_id: int, position: int) -> None:
+        """Remember the queue message to edit as the user advances."""
+        queued = self._queue.get(user_id)
+        if queued:
+            queued.message_id = message_id
+            queued.shown_position = position
+
+    def position(self, user_id: int) -> int:
+        for position, queued_id in enumerate(self._queue, start=1):
+            if queued_id == user_id:
+                return position
+        return 0
+
+    def release(self, user_id: int) -> None:
+        """The user's journey is over (draw done)."""
+        self._journeys.pop(user_id, None)
+
+    def _expire(self) -> None:
+        """Free slots of users who dropped off mid-journey."""
+        deadline = time.monotonic() - self.journey_timeout
+        for user_id in [u for u, started in self._journeys.items() if started < deadline]:
+            del self._journeys[user_id]
+
+    def _admit_waiting(self) -> list[QueuedUser]:
+        admitted = []
+        now = time.monotonic()
+        while self._queue and len(self._journeys) < self.capacity:
+            _, queued = self._queue.popitem(last=False)
+            self._journeys[queued.user_id] = now
+            self.admitted_total += 1
+            self.max_wait = max(self.max_wait, now - queued.queued_at)
+            admitted.append(queued)
+        return admitted
+
+    async def _update_positions(self, bot: Bot) -> None:
+        """Edit queue messages whose position changed (bounded per tick)."""
+        edits = 0
+        for position, queued in enumerate(self._queue.values(), start=1):
+            if edits >= ADMISSION_EDITS_PER_TICK:
+                break
+            if queued.message_id is None or queued.shown_position == position:
+                continue
+            try:
+                await bot.edit_message_text(
+                    text=queue_text(position), chat_id=queued.chat_id, message_id=queued.message_id
+                )
+                queued.shown_position = position
+            except Exception as e:
+                logger.debug(f"Queue position edit failed for {queued.user_id}: {e}")
+            edits += 1
+
+    async def run(self, bot: Bot, on_admit: Callable[[Bot, QueuedUser], Awaitable[None]]) -> None:
+        """Background task: expire journeys, admit queued users, refresh positions."""
+        if not self.enabled:
+            return
+
+        while True:
+            await asyncio.sleep(ADMISSION_UPDATE_INTERVAL)
+            try:
+                self._expire()
+                for queued in self._admit_waiting():
+                    try:
+                        await on_admit(bot, queued)
+                    except Exception as e:
+                        logger.error(f"Admission of {queued.user_id} failed: {e}")
+                        self.release(queued.user_id)
+                await self._update_positions(bot)
+            except Exception as e:
+                logger.error(f"Admission loop failed: {e}")
+
+
+admission = AdmissionController()
@@ -0,0 +1,25 @@
+"""
+Day rollover archival.
+Completed participants of previous days are moved out of the hot table
+into per-day archive databases (see `archive_participants`), for every campaign.
+"""
+import asyncio
+import logging
+
+from bot.config import ARCHIVE_CHECK_INTERVAL
+from bot.campaigns import for_each_campaign
+from bot.database import archive_participants
+
+logger = logging.getLogger(__name__)
+
+
+async def run_archiver(interval: int = ARCHIVE_CHECK_INTERVAL) -> None:
+    """Background task: archive finished days at startup and every `interval` seconds."""
+    while True:
+        # Failures are logged per campaign
+        results = await for_each_campaign(archive_participants)
+        for slug, archived in results.items():
+            if archived:
+                logger.info(f"Archived {archived} participants of {slug} from previous days")
+        
+        await asyncio.sleep(interval)
@@ -0,0 +1,143 @@
+"""
+Online database backup to the storage channel.
+- SQLite online backup API in a single step: one read transaction on a WAL database, so
+  writers keep committing meanwhile and the copy is a consistent snapshot
+- Snapshot is gzipped in a worker thread and uploaded as a document
+- Scheduled backups are skipped when the database files did not change
+- Every campaign's database is backed up separately (the file name carries its slug)
+- Day archives are backed up too: once when sealed, again whenever a redemption changes them
+"""
+import asyncio
+import gzip
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from aiogram import Bot
+from aiogram.types import BufferedInputFile
+
+from bot.campaigns import current_campaign, for_each_campaign
+from bot.config import STORAGE_CHANNEL_ID, BACKUP_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Database or archive file -> fingerprint of its last uploaded backup
+_last_fingerprints: dict[str, tuple] = {}
+_backup_lock = asyncio.Lock()
+
+
+def _fingerprint(path: str) -> tuple:
+    """Size and mtime of the database file and its WAL - changes on every commit."""
+    parts = []
+    for suffix in ("", "-wal"):
+        try:
+            st = os.stat(path + suffix)
+        except FileNotFoundError:
+            continue
+        parts.append((suffix, st.st_mtime_ns, st.st_size))
+    return tuple(parts)
+
+
+def _make_snapshot(path: str) -> bytes:
+    """Copy the live database and return it gzipped (runs in a thread)."""
+    source = sqlite3.connect(path)
+    target = sqlite3.connect(":memory:")
+    try:
+        # All pages in one step. Copied in steps, every commit by another connection between
+        # two steps restarts the copy - under steady registrations it might never finish
+        source.backup(target, pages=-1)
+        data = target.serialize()
+    finally:
+        target.close()
+        source.close()
+    
+    return gzip.compress(data, compresslevel=6)
+
+
+def _archive_files(campaign) -> list[tuple[str, str]]:
+    """(day, path) of the campaign's day archives, oldest first."""
+    if not os.path.isdir(campaign.archive_dir):
+        return []
+    archives = []
+    for filename in sorted(os.listdir(campaign.archive_dir)):
+        if filename.startswith("participants_") and filename.endswith(".db"):
+            archives.append((filename[len("participants_"):-len(".db")], os.path.join(campaign.archive_dir, filename)))
+    return archives
+
+
+async def _upload(bot: Bot, path: str, filename: str, caption: str) -> int:
+    """Snapshot one database file and send it to the storage channel; returns the gzipped size."""
+    data = await asyncio.to_thread(_make_snapshot, path)
+    await bot.send_document(
+        chat_id=STORAGE_CHANNEL_ID,
+        document=BufferedInputFile(data, filename=filename),
+        caption=f"{caption}\nРазмер: {len(data) / 1024:.1f} КБ"
+    )
+    return len(data)
+
+
+async def run_backup(bot: Bot, force: bool = False) -> bool:
+    """
+    Snapshot the current campaign's database and upload it to the storage channel,
+    followed by every day archive that changed since its last upload.
+    
+    Args:
+        force: upload the database even if it did not change (archives are uploaded only when changed)
+    
+    Returns:
+        bool: True if anything was uploaded, False if everything was skipped
+    """
+    campaign = current_campaign()
+    
+    if not STORAGE_CHANNEL_ID:
+        logger.warning("Backup skipped: STORAGE_CHANNEL_ID is not set")
+        return False
+    
+    async with _backup_lock:
+        uploaded = False
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        fingerprint = _fingerprint(campaign.database_path)
+        if not force and fingerprint == _last_fingerprints.get(campaign.database_path):
+            logger.info(f"Backup of {campaign.slug} skipped: database unchanged")
+        else:
+            started = time.perf_counter()
+            size = await _upload(
+                bot,
+                campaign.database_path,
+                f"database_{campaign.slug}_{timestamp}.db.gz",
+                f"💾 Бэкап базы данных ({campaign.name})"
+            )
+            _last_fingerprints[campaign.database_path] = fingerprint
+            uploaded = True
+            logger.info(f"Backup of {campaign.slug} uploaded: {size} bytes in {time.perf_counter() - started:.2f}s")
+        
+        # Archived rows exist nowhere else: a sealed day and every later redemption in it
+        for day, path in _archive_files(campaign):
+            fingerprint = _fingerprint(path)
+            if fingerprint == _last_fingerprints.get(path):
+                continue
+            size = await _upload(
+                bot,
+                path,
+                f"archive_{campaign.slug}_{day}_{timestamp}.db.gz",
+                f"💾 Архив за {day} ({campaign.name})"
+            )
+            _last_fingerprints[path] = fingerprint
+            uploaded = True
+            logger.info(f"Backup of the {campaign.slug} archive {day} uploaded: {size} bytes")
+        
+        return uploaded
+
+
+async def run_backup_loop(bot: Bot, interval: int = BACKUP_INTERVAL) -> None:
+    """Background task: back up every campaign's database every `interval` seconds."""
+    if interval <= 0:
+        return
+    
+    while True:
+        await asyncio.sleep(interval)
+        # Failures are logged per campaign
+        await for_each_campaign(lambda: run_backup(bot))
@@ -0,0 +1,195 @@
+"""
+Broadcast engine: message a segment of participants at the maximum safe rate.
+- A pool of BROADCAST_WORKERS senders shares one rate limiter (BROADCAST_RATE msg/s)
+- RetryAfter pauses the whole pool; blocked users are recorded and skipped
+- Delivery state is saved per recipient in batches, so a restart resumes where it stopped
+- Progress (sent/total, throughput, ETA) is edited into the admin's status message
+"""
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+
+from bot.campaigns import current_campaign
+from bot.config import BROADCAST_RATE, BROADCAST_WORKERS, BROADCAST_PROGRESS_INTERVAL
+from bot.database import (
+    get_broadcast,
+    set_broadcast_status,
+    get_running_broadcasts,
+    get_pending_recipients,
+    save_recipient_results
+)
+
+logger = logging.getLogger(__name__)
+
+# Transient failures per recipient before it is marked as failed
+MAX_RECIPIENT_ATTEMPTS = 3
+# Results are written to the database in batches of this size
+RESULTS_BATCH = 200
+
+# Running broadcast tasks by (campaign slug, id) - every campaign numbers its broadcasts from 1
+_active: dict[tuple[str, int], asyncio.Task] = {}
+
+
+class RateLimiter:
+    """Spaces calls evenly at `rate` per second across all workers."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def pause(self, seconds: float) -> None:
+        """Push every following slot back (flood control)."""
+        self._next = max(self._next, asyncio.get_running_loop().time() + seconds)
+
+
+def format_progress(broadcast_id: int, done: int, total: int, started: float, finished: bool = False) -> str:
+    """Progress text with throughput and ETA."""
+    elapsed = max(time.monotonic() - started, 0.001)
+    rate = done / elapsed
+    remaining = total - done
+    eta = remaining / rate if rate > 0 else 0
+    status = "✅ Рассылка завершена" if finished else "📨 Рассылка идёт"
+    return (
+        f"{status} #{broadcast_id}\n\n"
+        f"Обработано: {done}/{total}\n"
+        f"Скорость: {rate:.1f} сообщ./с\n"
+        f"Осталось: ~{int(eta // 60)} мин {int(eta % 60)} с"
+    )
+
+
+async def run_broadcast(bot: Bot, broadcast_id: int, status_message_id: int = None) -> None:
+    """Send a broadcast to all of its pending recipients."""
+    broadcast = await get_broadcast(broadcast_id)
+    text = broadcast["text"]
+    admin_chat_id = broadcast["admin_chat_id"]
+    total = broadcast["total"]
+    already_done = total - broadcast["counts"].get("pending", 0)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for telegram_id in await get_pending_recipients(broadcast_id):
+        queue.put_nowait((telegram_id, 1))
+
+    limiter = RateLimiter(BROADCAST_RATE)
+    results: list[tuple[int, str, str | None]] = []
+    done = 0
+    started = time.monotonic()
+
+    async def flush_results():
+        batch = results[:]
+        results.clear()
+        await save_recipient_results(broadcast_id, batch)
+
+    async def record(telegram_id: int, status: str, error: str = None):
+        nonlocal done
+        results.append((telegram_id, status, error))
+        done += 1
+        if len(results) >= RESULTS_BATCH:
+            await flush_results()
+
+    async def worker():
+        while True:
+            try:
+                telegram_id, attempt = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            await limiter.wait()
+            try:
+                await bot.send_message(chat_id=telegram_id, text=text)
+            except TelegramRetryAfter as e:
+                limiter.pause(e.retry_after)
+                queue.put_nowait((telegram_id, attempt))
+            except TelegramForbiddenError as e:
+                await record(telegram_id, "blocked", str(e))
+            except TelegramBadRequest as e:
+                await record(telegram_id, "failed", str(e))
+            except Exception as e:
+                if attempt >= MAX_RECIPIENT_ATTEMPTS:
+                    await record(telegram_id, "failed", str(e))
+                else:
+                    queue.put_nowait((telegram_id, attempt + 1))
+            else:
+                await record(telegram_id, "sent")
+
+    async def report_progress():
+        while True:
+            await asyncio.sleep(BROADCAST_PROGRESS_INTERVAL)
+            text_progress = format_progress(broadcast_id, already_done + done, total, started)
+            logger.info(text_progress.replace("\n", " | "))
+            if status_message_id:
+                try:
+                    await bot.edit_message_text(
+                        text=text_progress, chat_id=admin_chat_id, message_id=status_message_id
+                    )
+                except Exception as e:
+                    logger.debug(f"Broadcast progress edit failed: {e}")
+
+    reporter = asyncio.create_task(report_progress())
+    try:
+        await asyncio.gather(*(worker() for _ in range(BROADCAST_WORKERS)))
+    finally:
+        reporter.cancel()
+        await flush_results()
+
+    await set_broadcast_status(broadcast_id, "done")
+    final = await get_broadcast(broadcast_id)
+    counts = final["counts"]
+    summary = (
+        format_progress(broadcast_id, already_done + done, total, started, finished=True) +
+        f"\n\n✅ Доставлено: {counts.get('sent', 0)}\n"
+        f"🚫 Заблокировали бота: {counts.get('blocked', 0)}\n"
+        f"❌ Ошибки: {counts.get('failed', 0)}"
+    )
+    logger.info(summary.replace("\n", " | "))
+    try:
+        await bot.send_message(chat_id=admin_chat_id, text=summary)
+    except Exception as e:
+        logger.error(f"Broadcast summary failed: {e}")
+
+
+def start_broadcast(bot: Bot, broadcast_id: int, status_message_id: int = None) -> None:
+    """Run a broadcast (of the current campaign) in the background."""
+    key = (current_campaign().slug, broadcast_id)
+    task = asyncio.create_task(run_broadcast(bot, broadcast_id, status_message_id))
+    _active[key] = task
+    task.add_done_callback(lambda _: _active.pop(key, None))
+
+
+async def cancel_broadcast(broadcast_id: int) -> bool:
+    """Stop a running broadcast; already sent messages stay recorded."""
+    task = _active.pop((current_campaign().slug, broadcast_id), None)
+    await set_broadcast_status(broadcast_id, "cancelled")
+    if task is None:
+        return False
+    task.cancel()
+    return True
+
+
+async def stop_broadcasts() -> int:
+    """
+    Interrupt running broadcasts for shutdown.
+    Results sent so far are saved and the status stays running, so they resume on the next start.
+    """
+    tasks = list(_active.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return len(tasks)
+
+
+async def resume_broadcasts(bot: Bot) -> None:
+    """Restart broadcasts that were running when the bot stopped."""
+    for broadcast in await get_running_broadcasts():
+        logger.info(f"Resuming broadcast #{broadcast['id']}")
+        start_broadcast(bot, broadcast["id"])
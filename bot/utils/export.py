@@ -0,0 +1,18 @@
+"""
+Participant export helpers.
+"""
+import csv
+import io
+
+
+def build_participants_csv(rows: list[dict]) -> bytes:
+    """CSV of participant rows (header from the newest row's columns)."""
+    output = io.StringIO()
+    # Older archives may lack columns added later - those cells stay empty
+    writer = csv.DictWriter(output, fieldnames=list(rows[-1].keys()), restval="", extrasaction="ignore")
+
+    # Write header and data
+    writer.writeheader()
+    writer.writerows(rows)
+
+    return output.getvalue().encode()
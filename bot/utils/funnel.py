@@ -0,0 +1,65 @@
+"""
+Registration funnel counters.
+- Step hits are aggregated in memory (no DB write per user)
+- A background task flushes the totals to `funnel_stats` periodically
+- Counts are kept per campaign and flushed to that campaign's database
+"""
+import asyncio
+import logging
+from collections import Counter
+
+from bot.config import FUNNEL_FLUSH_INTERVAL
+from bot.campaigns import current_campaign, get_campaign, use_campaign
+from bot.database import increment_funnel_stats
+
+logger = logging.getLogger(__name__)
+
+# Funnel steps in journey order
+FUNNEL_STEPS = ("start", "name", "phone", "photo", "result")
+
+# Campaign slug -> step counts
+_pending: dict[str, Counter] = {}
+
+
+def record_step(step: str) -> None:
+    """Count one user reaching a funnel step (in the current campaign)."""
+    slug = current_campaign().slug
+    counts = _pending.get(slug)
+    if counts is None:
+        counts = _pending[slug] = Counter()
+    counts[step] += 1
+
+
+def get_pending_counts() -> dict[str, int]:
+    """Counts of the current campaign recorded since the last flush."""
+    return dict(_pending.get(current_campaign().slug, ()))
+
+
+async def flush_funnel() -> None:
+    """Write aggregated counts of every campaign to its database."""
+    failed = None
+    for slug, pending in list(_pending.items()):
+        counts = dict(pending)
+        if not counts:
+            continue
+        pending.clear()
+
+        try:
+            with use_campaign(get_campaign(slug)):
+                await increment_funnel_stats(counts)
+        except Exception as e:
+            # Put the counts back so the next flush retries them
+            pending.update(counts)
+            failed = e
+    if failed:
+        raise failed
+
+
+async def run_funnel_flusher(interval: int = FUNNEL_FLUSH_INTERVAL) -> None:
+    """Background task: flush funnel counters every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_funnel()
+        except Exception as e:
+            logger.error(f"Funnel flush failed: {e}")
@@ -0,0 +1,149 @@
+"""
+Tuned Bot API HTTP sessions.
+- Sized connection pool, DNS cache and keep-alive per session
+- Per-method timeouts: fast for edits and callback answers, long for uploads and downloads
+- Interactive (handler replies) and background (broadcasts, storage, outbox, backups)
+  traffic use separate sessions, so a broadcast never queues a user's reply
+- Pool utilization (in flight, peak, queued for a connection) is exported on /metrics
+"""
+import time
+from typing import Any, AsyncGenerator
+
+from aiohttp import ClientSession, ClientTimeout, TraceConfig
+from aiohttp.hdrs import USER_AGENT
+from aiohttp.http import SERVER_SOFTWARE
+from aiogram import Bot, __version__
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from bot.config import (
+    HTTP_DNS_TTL,
+    HTTP_KEEPALIVE,
+    HTTP_TIMEOUT,
+    HTTP_FAST_TIMEOUT,
+    HTTP_UPLOAD_TIMEOUT
+)
+
+# Quick calls a user is waiting on - a hung one should fail fast, not after a minute
+FAST_METHODS = {
+    "answerCallbackQuery",
+    "editMessageText",
+    "editMessageReplyMarkup",
+    "editMessageCaption",
+    "deleteMessage",
+    "sendChatAction",
+    "getChatMember",
+}
+# File transfers
+UPLOAD_METHODS = {"sendDocument", "sendPhoto", "sendMediaGroup"}
+
+_sessions: list["TunedSession"] = []
+
+
+class TunedSession(AiohttpSession):
+    """AiohttpSession with pool tuning, per-method timeouts and utilization counters."""
+
+    def __init__(self, name: str, limit: int, **kwargs: Any) -> None:
+        super().__init__(limit=limit, timeout=HTTP_TIMEOUT, **kwargs)
+        self.name = name
+        self.limit = limit
+        self._connector_init.update({
+            "ttl_dns_cache": HTTP_DNS_TTL,
+            "keepalive_timeout": HTTP_KEEPALIVE,
+        })
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.queued = 0
+        self.queue_wait = 0.0
+        _sessions.append(self)
+
+    def method_timeout(self, api_method: str) -> ClientTimeout | float:
+        if api_method in FAST_METHODS:
+            # Bounds a hung socket only - waiting for a pooled connection in a burst is not a failure
+            return ClientTimeout(sock_connect=HTTP_FAST_TIMEOUT, sock_read=HTTP_FAST_TIMEOUT)
+        if api_method in UPLOAD_METHODS:
+            return HTTP_UPLOAD_TIMEOUT
+        return self.timeout
+
+    def _trace_config(self) -> TraceConfig:
+        """Counts requests that had to wait for a free pooled connection."""
+        trace = TraceConfig()
+
+        async def queued_start(session, context, params):
+            context.queued_at = time.monotonic()
+
+        async def queued_end(session, context, params):
+            self.queued += 1
+            self.queue_wait += time.monotonic() - context.queued_at
+
+        trace.on_connection_queued_start.append(queued_start)
+        trace.on_connection_queued_end.append(queued_end)
+        return trace
+
+    async def create_session(self) -> ClientSession:
+        if self._should_reset_connector:
+            await self.close()
+
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=self._connector_type(**self._connector_init),
+                headers={USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{__version__}"},
+                trace_configs=[self._trace_config()],
+            )
+            self._should_reset_connector = False
+
+        return self._session
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        timeout: int | None = None,
+    ) -> TelegramType:
+        # Explicit timeouts (long polling) are kept
+        if timeout is None:
+            timeout = self.method_timeout(method.__api_method__)
+
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await super().make_request(bot, method, timeout)
+        finally:
+            self.in_flight -= 1
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: dict[str, Any] | None = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        # bot.download_file passes a fixed 30s - photos on a slow link need longer
+        async for chunk in super().stream_content(
+            url, headers, max(timeout, HTTP_UPLOAD_TIMEOUT), chunk_size, raise_for_status
+        ):
+            yield chunk
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests_total": self.requests,
+            "queued_total": self.queued,
+            "queue_wait_seconds_total": self.queue_wait,
+        }
+
+
+def session_metrics() -> list[str]:
+    """Prometheus lines with the utilization of every session."""
+    lines = []
+    for session in _sessions:
+        for key, value in session.stats().items():
+            lines.append(f'http_pool_{key}{{pool="{session.name}"}} {value:g}')
+    return lines
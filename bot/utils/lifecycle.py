@@ -0,0 +1,85 @@
+"""
+Graceful shutdown (SIGTERM on a redeploy, SIGINT locally).
+- Polling is already stopped by aiogram's signal handler, so no new updates come in
+- Handlers in progress get SHUTDOWN_DRAIN_TIMEOUT to finish: a draw that has shown its
+  animation also records its prize. Updates not started yet are dropped
+- Background loops are cancelled; running broadcasts save their results and resume on the next start
+- Pending writes are flushed: funnel counters, storage channel forwards, due outbox entries
+- Every campaign's WAL is checkpointed into its database file
+- Every step runs within what is left of SHUTDOWN_TIMEOUT and is logged with its duration
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable
+
+from aiogram import Bot
+
+from bot.campaigns import for_each_campaign
+from bot.config import SHUTDOWN_TIMEOUT, SHUTDOWN_DRAIN_TIMEOUT
+from bot.database import checkpoint_wal
+from bot.middlewares import InFlightTracker
+from bot.utils.funnel import flush_funnel
+from bot.utils.storage_forwarder import flush_storage_forwarder, pending_forwards
+from bot.utils.outbox import process_all_outboxes
+from bot.utils.broadcast import stop_broadcasts
+from bot.utils.phash import wait_photo_checks
+
+logger = logging.getLogger(__name__)
+
+
+async def _step(name: str, work: Awaitable, deadline: float) -> None:
+    """Run one shutdown step within the overall deadline; a failed step does not stop the others."""
+    started = time.monotonic()
+    remaining = deadline - started
+    if remaining <= 0:
+        logger.error(f"Shutdown: {name} skipped, out of time")
+        if asyncio.iscoroutine(work):
+            work.close()
+        return
+    try:
+        result = await asyncio.wait_for(work, remaining)
+    except asyncio.TimeoutError:
+        logger.error(f"Shutdown: {name} timed out")
+    except Exception as e:
+        logger.error(f"Shutdown: {name} failed: {e}")
+    else:
+        suffix = f" ({result})" if result is not None else ""
+        logger.info(f"Shutdown: {name} done in {(time.monotonic() - started) * 1000:.0f}ms{suffix}")
+
+
+async def graceful_shutdown(
+    in_flight: InFlightTracker,
+    background: list[asyncio.Task],
+    background_bot: Bot,
+    timeout: float = SHUTDOWN_TIMEOUT,
+    drain_timeout: float = SHUTDOWN_DRAIN_TIMEOUT
+) -> None:
+    """Drain handlers, stop background work and flush everything pending."""
+    started = time.monotonic()
+    deadline = started + timeout
+    logger.info(f"Shutdown: draining {in_flight.in_flight} updates in progress")
+
+    in_flight.close()
+    if await in_flight.wait_idle(min(drain_timeout, timeout)):
+        logger.info(
+            f"Shutdown: handlers drained in {(time.monotonic() - started) * 1000:.0f}ms, "
+            f"{in_flight.dropped} queued updates dropped"
+        )
+    else:
+        logger.error(f"Shutdown: {in_flight.in_flight} handlers still running after {drain_timeout:g}s, abandoned")
+    await _step("photo checks", wait_photo_checks(), deadline)
+
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await _step("broadcasts", stop_broadcasts(), deadline)
+
+    await _step("funnel counters", flush_funnel(), deadline)
+    forwards = pending_forwards()
+    await _step(f"storage forwards ({forwards})", flush_storage_forwarder(background_bot), deadline)
+    # After the forwarder: its failed sends land in the outbox
+    await _step("outbox", process_all_outboxes(background_bot), deadline)
+    await _step("WAL checkpoint", for_each_campaign(checkpoint_wal), deadline)
+
+    logger.info(f"Shutdown complete in {time.monotonic() - started:.2f}s")
@@ -0,0 +1,157 @@
+"""
+Non-blocking structured logging.
+- Handlers on the event loop only put records on a bounded queue; formatting and
+  stdout writes happen in a QueueListener thread
+- When the queue is full (log drain backed up) records are dropped and counted
+- Records carry user_id, state and update_id of the update being handled (see LogContextMiddleware)
+- Warnings and errors are rate limited per logger, suppressed records are counted into the next one
+"""
+import json
+import logging
+import queue
+import sys
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from bot.config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_RATE_LIMIT, LOG_RATE_BURST
+
+# Update being handled: {"user_id": ..., "state": ..., "update_id": ...}
+log_context: ContextVar[dict] = ContextVar("log_context", default={})
+
+CONTEXT_FIELDS = ("user_id", "state", "update_id")
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_handler: "DroppingQueueHandler | None" = None
+_output: logging.Handler | None = None
+_listener: QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Classic text lines with the update context appended."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = " ".join(
+            f"{field}={getattr(record, field)}" for field in CONTEXT_FIELDS
+            if getattr(record, field, None) is not None
+        )
+        if getattr(record, "suppressed", 0):
+            context += f" (+{record.suppressed} suppressed)"
+        return f"{line} [{context.strip()}]" if context else line
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per logger for WARNING and above: `rate` records/s with `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        # logger name -> [tokens, last refill, suppressed since last emitted]
+        self._buckets: dict[str, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.rate <= 0:
+            return True
+
+        now = time.monotonic()
+        bucket = self._buckets.get(record.name)
+        if bucket is None:
+            bucket = self._buckets[record.name] = [self.burst, now, 0]
+
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            return False
+
+        bucket[0] -= 1
+        record.suppressed, bucket[2] = bucket[2], 0
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the loop: a full queue drops the record."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the listener thread; only the update context is captured here
+        for field, value in log_context.get().items():
+            setattr(record, field, value)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(QueueListener):
+    """Waits for room for the stop sentinel instead of failing on a full queue."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def setup_logging() -> QueueListener:
+    """Route all logging through a bounded queue to a stdout writer thread."""
+    global _handler, _output, _listener
+
+    _output = logging.StreamHandler(sys.stdout)
+    _output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter(TEXT_FORMAT))
+
+    _handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    _handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT, LOG_RATE_BURST))
+
+    root = logging.getLogger()
+    root.handlers[:] = [_handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = DrainingQueueListener(_handler.queue, _output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Write out queued records, stop the writer thread and log directly from now on."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+
+    logging.getLogger().handlers[:] = [_output]
+    if _handler.dropped:
+        logging.getLogger(__name__).warning(f"{_handler.dropped} log records dropped (queue full)")
+
+
+def dropped_records() -> int:
+    """Records dropped because the log queue was full."""
+    return _handler.dropped if _handler else 0
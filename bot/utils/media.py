@@ -0,0 +1,105 @@
+"""
+Telegram file_id cache for static media (bot/assets).
+- An asset is uploaded once; later sends reuse its file_id instead of uploading it for every winner
+- file_ids are stored in the media_cache table keyed by name and content hash, so restarts reuse
+  them and a changed asset is uploaded again
+- At startup uncached assets are uploaded to the storage channel in advance when it is configured
+"""
+import hashlib
+import logging
+import os
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from bot.config import STORAGE_CHANNEL_ID
+from bot.database import get_media_file_ids, save_media_file_id
+
+logger = logging.getLogger(__name__)
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets")
+BRAND_ZONE = "brand_zone.jpg"
+PRELOADED = (BRAND_ZONE,)
+
+_keys: dict[str, str] = {}
+_file_ids: dict[str, str] = {}
+
+
+def asset_path(name: str) -> str:
+    return os.path.join(ASSETS_DIR, name)
+
+
+def _content_key(name: str) -> str | None:
+    """name:sha1 of the asset, None if the file is missing."""
+    if name not in _keys:
+        try:
+            with open(asset_path(name), "rb") as f:
+                _keys[name] = f"{name}:{hashlib.sha1(f.read()).hexdigest()}"
+        except FileNotFoundError:
+            return None
+    return _keys[name]
+
+
+def photo(name: str) -> str | FSInputFile | None:
+    """What to pass as `photo=`: the cached file_id, the file to upload, or None if there is no such asset."""
+    if name in _file_ids:
+        return _file_ids[name]
+    if _content_key(name) is None:
+        return None
+    return FSInputFile(asset_path(name))
+
+
+async def remember(name: str, sent: Message) -> None:
+    """Cache the file_id Telegram assigned to an uploaded asset."""
+    if name in _file_ids or not sent.photo:
+        return
+    _file_ids[name] = sent.photo[-1].file_id
+    try:
+        await save_media_file_id(_content_key(name), _file_ids[name])
+    except Exception as e:
+        logger.warning(f"Could not store file_id of {name}: {e}")
+
+
+async def answer_photo(message: Message, name: str, caption: str) -> Message:
+    """Reply with an asset and a caption (text only if the asset is missing)."""
+    media = photo(name)
+    if media is None:
+        return await message.answer(caption)
+    try:
+        sent = await message.answer_photo(photo=media, caption=caption)
+    except TelegramBadRequest:
+        if not isinstance(media, str):
+            raise
+        # A file_id of another bot token - upload again
+        logger.warning(f"Cached file_id of {name} rejected, uploading the file")
+        _file_ids.pop(name, None)
+        media = photo(name)
+        sent = await message.answer_photo(photo=media, caption=caption)
+    if not isinstance(media, str):
+        await remember(name, sent)
+    return sent
+
+
+async def load_media_cache() -> int:
+    """Pick up file_ids stored by earlier runs for the current asset contents."""
+    stored = await get_media_file_ids()
+    for name in PRELOADED:
+        key = _content_key(name)
+        if key in stored:
+            _file_ids[name] = stored[key]
+    return len(_file_ids)
+
+
+async def preload_media(bot: Bot) -> int:
+    """Load stored file_ids and upload the assets still missing one to the storage channel (startup)."""
+    await load_media_cache()
+    if not STORAGE_CHANNEL_ID:
+        return len(_file_ids)
+    for name in PRELOADED:
+        media = photo(name)
+        if media is None or isinstance(media, str):
+            continue
+        sent = await bot.send_photo(chat_id=STORAGE_CHANNEL_ID, photo=media, caption=f"📎 {name}")
+        await remember(name, sent)
+    return len(_file_ids)
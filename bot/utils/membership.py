@@ -0,0 +1,81 @@
+"""
+In-memory "already participated" index.
+- Sorted int64 arrays of telegram_ids and phone digests (8 bytes per entry)
+- A negative answer is final: no database query is needed
+- A positive answer may be stale (deleted/reset participants) and is confirmed by a query
+- One index per campaign
+"""
+import hashlib
+from array import array
+from bisect import bisect_left
+
+from bot.campaigns import current_campaign
+from bot.database import normalize_phone, get_participation_keys
+
+
+def phone_digest(phone: str) -> int:
+    """Fixed-width (64-bit) digest of the canonical phone number."""
+    digest = hashlib.blake2b(normalize_phone(phone).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _contains(values: array, value: int) -> bool:
+    i = bisect_left(values, value)
+    return i < len(values) and values[i] == value
+
+
+def _insert(values: array, value: int) -> None:
+    i = bisect_left(values, value)
+    if i == len(values) or values[i] != value:
+        values.insert(i, value)
+
+
+class MembershipIndex:
+    """Telegram IDs and phones of everyone who already got a draw result."""
+
+    def __init__(self):
+        self._users = array("q")
+        self._phones = array("q")
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def load(self, keys: list[tuple[int, str | None]]) -> None:
+        """Replace the index contents with (telegram_id, phone) pairs."""
+        self._users = array("q", sorted({telegram_id for telegram_id, _ in keys}))
+        self._phones = array("q", sorted({phone_digest(phone) for _, phone in keys if phone}))
+
+    def add(self, telegram_id: int, phone: str | None = None) -> None:
+        _insert(self._users, telegram_id)
+        if phone:
+            _insert(self._phones, phone_digest(phone))
+
+    def has_user(self, telegram_id: int) -> bool:
+        return _contains(self._users, telegram_id)
+
+    def has_phone(self, phone: str) -> bool:
+        return _contains(self._phones, phone_digest(phone))
+
+    def memory_bytes(self) -> int:
+        """Approximate payload size of both arrays."""
+        return (len(self._users) + len(self._phones)) * self._users.itemsize
+
+
+# Campaign slug -> its index
+_indexes: dict[str, MembershipIndex] = {}
+
+
+def membership_index() -> MembershipIndex:
+    """Index of the current campaign."""
+    slug = current_campaign().slug
+    index = _indexes.get(slug)
+    if index is None:
+        index = _indexes[slug] = MembershipIndex()
+    return index
+
+
+async def load_membership() -> int:
+    """Fill the current campaign's index from participants (startup)."""
+    index = membership_index()
+    index.load(await get_participation_keys())
+    return len(index)
@@ -0,0 +1,100 @@
+"""
+Durable outbox for non-interactive Bot API sends.
+- A failed send is stored in the `outbox` table instead of being lost
+- The dispatcher retries due entries with exponential backoff and jitter
+- Flood control `retry_after` is honored; after OUTBOX_MAX_ATTEMPTS an entry is dead-lettered
+- Dead letters can be inspected and replayed by the admin (/dead_letters, /replay)
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+
+from bot.config import OUTBOX_POLL_INTERVAL, OUTBOX_MAX_ATTEMPTS, OUTBOX_BASE_DELAY, OUTBOX_MAX_DELAY
+from bot.campaigns import for_each_campaign
+from bot.database import enqueue_outbox, get_due_outbox, update_outbox, delete_outbox
+
+logger = logging.getLogger(__name__)
+
+# Errors that will not go away by retrying (bot blocked, chat gone, malformed request)
+PERMANENT_ERRORS = (TelegramForbiddenError, TelegramBadRequest)
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the given number of failed attempts."""
+    delay = min(OUTBOX_MAX_DELAY, OUTBOX_BASE_DELAY * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.5)
+
+
+async def send_or_enqueue(bot: Bot, method: str, **params) -> bool:
+    """
+    Call a Bot API method; if it fails, store it in the outbox for retry.
+
+    Params must be JSON-serializable (chat ids, texts, file ids).
+
+    Returns:
+        bool: True if delivered right away
+    """
+    try:
+        await getattr(bot, method)(**params)
+        return True
+    except PERMANENT_ERRORS as e:
+        logger.error(f"{method} to {params.get('chat_id')} failed permanently: {e}")
+        return False
+    except Exception as e:
+        logger.warning(f"{method} to {params.get('chat_id')} failed, queued in outbox: {e}")
+        await enqueue_outbox(method, params, last_error=str(e))
+        return False
+
+
+async def _deliver(bot: Bot, entry: dict) -> None:
+    """Try one outbox entry and record the outcome."""
+    attempts = entry["attempts"] + 1
+    try:
+        await getattr(bot, entry["method"])(**json.loads(entry["payload"]))
+    except TelegramRetryAfter as e:
+        await update_outbox(
+            entry["id"],
+            attempts=attempts,
+            next_attempt_at=time.time() + e.retry_after,
+            last_error=str(e)
+        )
+    except Exception as e:
+        if isinstance(e, PERMANENT_ERRORS) or attempts >= OUTBOX_MAX_ATTEMPTS:
+            logger.error(f"Outbox entry {entry['id']} dead-lettered after {attempts} attempts: {e}")
+            await update_outbox(entry["id"], status="dead", attempts=attempts, last_error=str(e))
+        else:
+            await update_outbox(
+                entry["id"],
+                attempts=attempts,
+                next_attempt_at=time.time() + backoff_delay(attempts),
+                last_error=str(e)
+            )
+    else:
+        await delete_outbox(entry["id"])
+
+
+async def process_outbox(bot: Bot) -> int:
+    """Deliver all due outbox entries once. Returns number of entries tried."""
+    entries = await get_due_outbox(time.time())
+    for entry in entries:
+        await _deliver(bot, entry)
+    return len(entries)
+
+
+async def process_all_outboxes(bot: Bot) -> int:
+    """process_outbox for every campaign (each has its own outbox). Returns number of entries tried."""
+    results = await for_each_campaign(lambda: process_outbox(bot))
+    return sum(tried or 0 for tried in results.values())
+
+
+async def run_outbox_dispatcher(bot: Bot, interval: float = OUTBOX_POLL_INTERVAL) -> None:
+    """Background task: retry due outbox entries every `interval` seconds."""
+    while True:
+        # Failures are logged per campaign
+        await process_all_outboxes(bot)
+        await asyncio.sleep(interval)
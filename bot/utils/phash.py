@@ -0,0 +1,201 @@
+"""
+Duplicate photo detection with perceptual hashes.
+- A 64-bit difference hash (dHash) is computed in a process pool when a photo is saved
+- An in-memory BK-tree finds hashes within PHASH_RADIUS bits without comparing every photo
+- Matches from other accounts are flagged on the participant row (`duplicate_of`) and reported to admins
+- Each campaign has its own tree; the worker processes are shared
+"""
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from aiogram import Bot
+
+from bot.campaigns import current_campaign
+from bot.config import PHASH_RADIUS, PHASH_WORKERS
+from bot.database import update_participant, get_photo_hashes
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional - detection is disabled without it
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 8
+
+
+def compute_dhash(path: str) -> int:
+    """Difference hash: compare neighbouring pixels of a 9x8 grayscale thumbnail."""
+    with Image.open(path) as image:
+        image.draft("L", (HASH_SIZE * 16, HASH_SIZE * 16))  # fast JPEG downscale on decode
+        pixels = list(image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).getdata())
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def to_signed(value: int) -> int:
+    """Unsigned 64-bit hash -> SQLite INTEGER range."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance."""
+
+    def __init__(self):
+        # node: [hash, items, {distance: child}]
+        self._root = None
+        self.size = 0
+
+    def add(self, value: int, item) -> None:
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+
+        node = self._root
+        while True:
+            distance = (value ^ node[0]).bit_count()
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> list[tuple[int, object]]:
+        """Items whose hash is within `radius` bits of `value`, as (distance, item)."""
+        if self._root is None:
+            return []
+
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = (value ^ node[0]).bit_count()
+            if distance <= radius:
+                found.extend((distance, item) for item in node[1])
+            # Triangle inequality: only children in [d - r, d + r] can match
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return sorted(found, key=lambda match: match[0])
+
+
+# Campaign slug -> its tree
+_trees: dict[str, BKTree] = {}
+_executor: ProcessPoolExecutor | None = None
+_tasks: set[asyncio.Task] = set()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PHASH_WORKERS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _warm_worker() -> None:
+    """No-op run in the executor so its worker processes exist before the first photo."""
+
+
+async def start_executor() -> int:
+    """Start the hashing worker processes (startup). Returns number of workers."""
+    if Image is None:
+        return 0
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    await asyncio.gather(*(loop.run_in_executor(executor, _warm_worker) for _ in range(PHASH_WORKERS)))
+    return PHASH_WORKERS
+
+
+def _campaign_tree() -> BKTree:
+    slug = current_campaign().slug
+    tree = _trees.get(slug)
+    if tree is None:
+        tree = _trees[slug] = BKTree()
+    return tree
+
+
+def reset_photo_hashes() -> None:
+    """Forget the current campaign's tree (participants deleted); the next use starts empty."""
+    _trees.pop(current_campaign().slug, None)
+
+
+async def load_photo_hashes() -> int:
+    """Fill the current campaign's BK-tree from stored hashes (startup)."""
+    tree = _campaign_tree()
+    for telegram_id, photo_hash in await get_photo_hashes():
+        tree.add(to_unsigned(photo_hash), telegram_id)
+    return tree.size
+
+
+async def check_photo(bot: Bot, telegram_id: int, participant_number: int, filepath: str) -> None:
+    """Hash a freshly saved photo, store the hash and flag near-duplicates from other accounts."""
+    if Image is None:
+        return
+
+    loop = asyncio.get_running_loop()
+    try:
+        photo_hash = await loop.run_in_executor(_get_executor(), compute_dhash, filepath)
+    except Exception as e:
+        logger.warning(f"Photo hash failed for {telegram_id}: {e}")
+        return
+
+    tree = _campaign_tree()
+    matches = [
+        (distance, other_id)
+        for distance, other_id in tree.search(photo_hash, PHASH_RADIUS)
+        if other_id != telegram_id
+    ]
+    tree.add(photo_hash, telegram_id)
+
+    duplicate_of = matches[0][1] if matches else None
+    await update_participant(telegram_id, photo_hash=to_signed(photo_hash), duplicate_of=duplicate_of)
+
+    if matches:
+        from bot.utils.outbox import send_or_enqueue
+
+        others = ", ".join(f"<code>{other_id}</code> (расст. {distance})" for distance, other_id in matches[:5])
+        logger.warning(f"Duplicate photo: participant #{participant_number} ({telegram_id}) matches {others}")
+        for admin_id in current_campaign().admin_ids:
+            await send_or_enqueue(
+                bot, "send_message",
+                chat_id=admin_id,
+                text=(
+                    f"⚠️ <b>Подозрение на повторное фото</b>\n\n"
+                    f"Участник #{participant_number}, ID <code>{telegram_id}</code>\n"
+                    f"Похоже на фото: {others}"
+                )
+            )
+
+
+async def wait_photo_checks() -> None:
+    """Let scheduled photo checks finish (shutdown)."""
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
+
+
+def schedule_photo_check(bot: Bot, telegram_id: int, participant_number: int, filepath: str) -> None:
+    """Run `check_photo` in the background without delaying the user."""
+    task = asyncio.create_task(check_photo(bot, telegram_id, participant_number, filepath))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
@@ -0,0 +1,108 @@
+"""
+Export of participant photos as ZIP parts.
+- Photos are streamed from disk into the archive (never loaded into memory whole)
+- Images are stored uncompressed (JPEG does not compress further), the manifest is deflated
+- Parts are planned by file size so each one fits PHOTO_EXPORT_PART_SIZE
+- Every part carries a manifest.csv mapping its files to participant numbers
+"""
+import csv
+import io
+import os
+import zipfile
+from dataclasses import dataclass
+
+from bot.campaigns import current_campaign
+from bot.config import PHOTO_EXPORT_PART_SIZE
+
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_FIELDS = ["file", "participant_number", "telegram_id", "name", "prize_type", "created_at"]
+
+# Local header + central directory record per entry, on top of the file name twice
+ENTRY_OVERHEAD = 128
+# Room reserved for the manifest row of each entry
+MANIFEST_ROW_RESERVE = 256
+
+
+@dataclass
+class PhotoEntry:
+    path: str
+    arcname: str
+    size: int
+    participant: dict
+
+
+def resolve_photo_path(photo_path: str | None) -> str | None:
+    """Existing file for a stored photo path (falls back to the campaign's photos dir if the disk moved)."""
+    if not photo_path:
+        return None
+    if os.path.isfile(photo_path):
+        return photo_path
+    fallback = os.path.join(current_campaign().photos_dir, os.path.basename(photo_path))
+    return fallback if os.path.isfile(fallback) else None
+
+
+def collect_photos(rows: list[dict], day: str = None, winners_only: bool = False) -> tuple[list[PhotoEntry], int]:
+    """
+    Photos of the given participants, optionally of one day (YYYY-MM-DD) or winners only.
+
+    Returns:
+        tuple: (entries, number of photos missing on disk)
+    """
+    entries = []
+    missing = 0
+    for row in rows:
+        if not row.get("photo_path"):
+            continue
+        if day and not str(row.get("created_at") or "").startswith(day):
+            continue
+        if winners_only and not row.get("is_winner"):
+            continue
+
+        path = resolve_photo_path(row["photo_path"])
+        if path is None:
+            missing += 1
+            continue
+
+        number = row.get("participant_number") or "no_number"
+        arcname = f"{number}_{os.path.basename(path)}"
+        entries.append(PhotoEntry(path, arcname, os.path.getsize(path), row))
+
+    return entries, missing
+
+
+def plan_parts(entries: list[PhotoEntry], limit: int = PHOTO_EXPORT_PART_SIZE) -> list[list[PhotoEntry]]:
+    """Split entries into parts whose ZIP size stays under `limit`."""
+    parts = []
+    current = []
+    current_size = 0
+    for entry in entries:
+        size = entry.size + ENTRY_OVERHEAD + 2 * len(entry.arcname.encode()) + MANIFEST_ROW_RESERVE
+        if current and current_size + size > limit:
+            parts.append(current)
+            current = []
+            current_size = 0
+        current.append(entry)
+        current_size += size
+    if current:
+        parts.append(current)
+    return parts
+
+
+def build_manifest(entries: list[PhotoEntry]) -> bytes:
+    """CSV mapping archive files to participants."""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=MANIFEST_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for entry in entries:
+        writer.writerow({**entry.participant, "file": entry.arcname})
+    return output.getvalue().encode()
+
+
+def write_part(path: str, entries: list[PhotoEntry]) -> int:
+    """Write one ZIP part to `path` (runs in a thread). Returns its size in bytes."""
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for entry in entries:
+            # Copied from disk in chunks
+            archive.write(entry.path, entry.arcname)
+        archive.writestr(MANIFEST_NAME, build_manifest(entries), compress_type=zipfile.ZIP_DEFLATED)
+    return os.path.getsize(path)
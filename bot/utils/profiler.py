@@ -0,0 +1,213 @@
+"""
+On-demand profiling of the live process (admin /profile and /memsnap).
+- CPU: a sampling thread reads every busy thread's stack PROFILE_INTERVAL apart for N seconds.
+  Nothing is hooked into the interpreter (unlike cProfile), so the cost is one stack
+  walk per sample and the bot can be profiled at peak
+- Reports: collapsed stacks (flamegraph.pl / speedscope) and a top-N of functions
+  by own and total time
+- Memory: two tracemalloc snapshots N seconds apart; top growth by line and the
+  current largest allocation sites. Tracing runs only for the duration of the snapshot
+- One profile or snapshot at a time
+"""
+import asyncio
+import linecache
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from bot.config import PROFILE_INTERVAL, PROFILE_MAX_SECONDS, MEMSNAP_FRAMES
+
+TOP_N = 30
+
+# A worker thread whose innermost Python line blocks on one of these is waiting, not working
+# (a lock, a queue such as the database worker's)
+IDLE_CALL = re.compile(r"\.(get|wait|select|poll|acquire|join)\(")
+
+_busy = asyncio.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Another profile or memory snapshot is already running."""
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if "site-packages" in path:
+        path = path.split("site-packages" + os.sep, 1)[1]
+    elif path.startswith(os.getcwd()):
+        path = os.path.relpath(path)
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Stack sampler over all threads; stacks are collected root first."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self.loop_idle = 0
+        self.elapsed = 0.0
+        self._labels: dict = {}
+        self._idle_lines: dict = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def _is_idle(self, frame) -> bool:
+        key = (frame.f_code, frame.f_lineno)
+        idle = self._idle_lines.get(key)
+        if idle is None:
+            line = linecache.getline(frame.f_code.co_filename, frame.f_lineno)
+            idle = self._idle_lines[key] = bool(IDLE_CALL.search(line))
+        return idle
+
+    def _sample(self, names: dict[int, str]) -> None:
+        own = threading.get_ident()
+        main_id = threading.main_thread().ident
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            if thread_id == main_id:
+                # The loop waiting for I/O; blocking on a lock on the loop thread is not idle
+                if frame.f_code.co_filename.endswith("selectors.py"):
+                    self.loop_idle += 1
+            elif self._is_idle(frame):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, "thread"))
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+
+    def _run(self) -> None:
+        started = time.monotonic()
+        while not self._stop.wait(self.interval):
+            # Worker threads are numbered (one per database connection) - group them by role
+            names = {thread.ident: re.sub(r"-\d+", "", thread.name) for thread in threading.enumerate()}
+            self._sample(names)
+            self.samples += 1
+        self.elapsed = time.monotonic() - started
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """One `frame;frame;frame count` line per distinct stack."""
+        return "\n".join(
+            f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()
+        ) + "\n"
+
+    def report(self, top: int = TOP_N) -> str:
+        """Per-thread sample share and the top functions by own and total samples."""
+        threads: Counter[str] = Counter()
+        own: Counter[tuple[str, str]] = Counter()
+        total: Counter[tuple[str, str]] = Counter()
+        for stack, count in self.stacks.items():
+            thread = stack[0]
+            threads[thread] += count
+            if len(stack) > 1:
+                own[thread, stack[-1]] += count
+            # Recursive functions are counted once per sample
+            for frame in set(stack[1:]):
+                total[thread, frame] += count
+
+        lines = [
+            f"Samples: {self.samples} over {self.elapsed:.1f}s "
+            f"(every {self.interval * 1000:g}ms), distinct stacks: {len(self.stacks)}",
+            "",
+            f"Event loop idle (waiting for I/O): {self.loop_idle / max(self.samples, 1):.1%}",
+            "",
+            "Busy threads (average number per sample, a group of threads can exceed 1):",
+        ]
+        for thread, count in threads.most_common():
+            lines.append(f"  {count / max(self.samples, 1):7.2f}  {thread}")
+
+        for title, counter in (("Own time", own), ("Total time (including callees)", total)):
+            lines += ["", f"{title}, top {top} (share of samples, summed over a thread group):"]
+            for (thread, frame), count in counter.most_common(top):
+                lines.append(f"  {count / max(self.samples, 1):7.1%}  {frame}  [{thread}]")
+        return "\n".join(lines) + "\n"
+
+
+async def profile(seconds: float, interval: float = PROFILE_INTERVAL) -> SamplingProfiler:
+    """Sample the whole process for `seconds` (capped at PROFILE_MAX_SECONDS)."""
+    if _busy.locked():
+        raise ProfilerBusy()
+    async with _busy:
+        profiler = SamplingProfiler(interval)
+        profiler.start()
+        try:
+            await asyncio.sleep(min(seconds, PROFILE_MAX_SECONDS))
+        finally:
+            profiler.stop()
+        return profiler
+
+
+def _snapshot_report(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, seconds: float, top: int) -> str:
+    # The tracer's own bookkeeping is noise
+    ignore = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ]
+    after = after.filter_traces(ignore)
+    current = after.statistics("lineno")
+    lines = [
+        f"Traced memory: {sum(stat.size for stat in current) / 1024 / 1024:.1f} MiB "
+        f"in {sum(stat.count for stat in current)} blocks (allocations made while tracing)",
+    ]
+
+    lines += ["", f"Growth over {seconds:g}s by line, top {top}:"]
+    for stat in after.compare_to(before.filter_traces(ignore), "lineno")[:top]:
+        lines.append(f"  {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  {stat.traceback}")
+
+    lines += ["", f"Largest allocation sites, top {top}:"]
+    for stat in current[:top]:
+        lines.append(f"  {stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {stat.traceback}")
+
+    lines += ["", f"Largest tracebacks, top {min(top, 10)}:"]
+    for stat in after.statistics("traceback")[:min(top, 10)]:
+        lines.append(f"  {stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        lines += [f"      {line}" for line in stat.traceback.format()]
+    return "\n".join(lines) + "\n"
+
+
+async def memory_snapshot(seconds: float, top: int = TOP_N) -> str:
+    """
+    Trace allocations for `seconds` and report what grew and what is held.
+    Only allocations made while tracing are visible, so the window should cover the suspect traffic.
+    """
+    if _busy.locked():
+        raise ProfilerBusy()
+    async with _busy:
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(MEMSNAP_FRAMES)
+        try:
+            before = tracemalloc.take_snapshot()
+            await asyncio.sleep(min(seconds, PROFILE_MAX_SECONDS))
+            after = tracemalloc.take_snapshot()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+        # Grouping thousands of traces takes a while - keep it off the loop
+        return await asyncio.to_thread(_snapshot_report, before, after, seconds, top)
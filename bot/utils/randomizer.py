@@ -4,11 +4,7 @@ Contest day randomizer.
 - 5 gift sets available (5% chance while remaining)
 """
 import random
-from bot.config import (
-    DAILY_BIG_PRIZES, 
-    BIG_PRIZE_LIST,
-    SMALL_PRIZE_LIST
-)
+from bot.utils.settings_store import current_settings
 from bot.database import get_daily_stats
 
 
@@ -22,15 +18,17 @@ async def check_win() -> tuple[bool, str | None, str | None]:
         tuple: (True, prize_name, prize_type: 'big'/'small')
     """
     stats = await get_daily_stats()
+    # Read after the query: a stock change made meanwhile already counts
+    settings = current_settings()
     big_given = stats.get("big_prizes_given", 0)
-    remaining_big = DAILY_BIG_PRIZES - big_given
+    remaining_big = settings.daily_big_prizes - big_given
     
     # Big prize check: 5% chance if available
     if remaining_big > 0:
         if random.random() < 0.05:  # 5% for big prize
-            prize = random.choice(BIG_PRIZE_LIST)
+            prize = random.choice(settings.big_prize_list)
             return True, prize, "big"
     
     # Everyone else wins a keychain (UNLIMITED)
-    prize = random.choice(SMALL_PRIZE_LIST)
+    prize = random.choice(settings.small_prize_list)
     return True, prize, "small"
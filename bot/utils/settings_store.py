@@ -0,0 +1,164 @@
+"""
+Live event settings (/settings, /set, /unset): prize stock, prize lists and subscription channels.
+- Startup values come from the config (or the campaign); admins override them at runtime
+- Overrides are stored in the campaign's `settings` table, every change in `settings_audit`
+- Readers (check_win, channels, keyboards) get an immutable snapshot: a change builds a new one
+  and swaps it in with a single assignment, so reads take no lock and never see half an update
+- Snapshots carry a version, so caches built from them (keyboards) know when to rebuild
+"""
+import asyncio
+import itertools
+import json
+import logging
+from dataclasses import dataclass
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from pydantic import ValidationError
+
+from bot.campaigns import Campaign, current_campaign
+from bot.database import get_settings, save_setting
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_KEYS = {"id", "url", "name", "button"}
+CHANNEL_URL_SCHEMES = ("https://", "http://", "tg://")
+
+# Setting -> description shown by /settings
+SETTINGS = {
+    "daily_big_prizes": "больших призов в день",
+    "big_prize_list": "большие призы (через запятую)",
+    "small_prize_list": "маленькие призы (через запятую)",
+    "channels": "каналы подписки (JSON)",
+}
+
+
+@dataclass(frozen=True)
+class Settings:
+    version: int
+    daily_big_prizes: int
+    big_prize_list: tuple[str, ...]
+    small_prize_list: tuple[str, ...]
+    channels: tuple[dict, ...]
+    overridden: frozenset[str]
+
+
+_versions = itertools.count(1)
+# Campaign slug -> its current snapshot
+_snapshots: dict[str, Settings] = {}
+# Writers only: a change and its rebuild must not interleave with another change
+_write_lock = asyncio.Lock()
+
+
+def _build(campaign: Campaign, stored: dict) -> Settings:
+    """Snapshot of the campaign's startup values with the stored overrides applied."""
+    return Settings(
+        version=next(_versions),
+        daily_big_prizes=int(stored.get("daily_big_prizes", campaign.daily_big_prizes)),
+        big_prize_list=tuple(stored.get("big_prize_list", campaign.big_prize_list)),
+        small_prize_list=tuple(stored.get("small_prize_list", campaign.small_prize_list)),
+        channels=tuple(stored.get("channels", campaign.channels)),
+        overridden=frozenset(stored) & frozenset(SETTINGS)
+    )
+
+
+def current_settings(campaign: Campaign = None) -> Settings:
+    """Settings of a campaign (the current one by default)."""
+    campaign = campaign or current_campaign()
+    snapshot = _snapshots.get(campaign.slug)
+    if snapshot is None:
+        # Not loaded yet - the startup values
+        snapshot = _snapshots[campaign.slug] = _build(campaign, {})
+    return snapshot
+
+
+def _parse_channels(text: str) -> list[dict]:
+    try:
+        channels = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"некорректный JSON: {e.msg}")
+    return validate_channels(channels)
+
+
+def validate_channels(channels) -> list[dict]:
+    """
+    Check a channel list (the `channels` setting, SUBSCRIPTION_CHANNELS or a campaign's own).
+
+    Raises:
+        ValueError: a channel the subscription step cannot use (the message is shown to the admin)
+    """
+    if not isinstance(channels, list) or not channels:
+        raise ValueError("нужен непустой JSON-список каналов")
+    for channel in channels:
+        if not isinstance(channel, dict) or not CHANNEL_KEYS <= set(channel):
+            raise ValueError(f"у каждого канала должны быть ключи {', '.join(sorted(CHANNEL_KEYS))}")
+        unknown = set(channel) - CHANNEL_KEYS - {"verify"}
+        if unknown:
+            raise ValueError(f"неизвестные ключи канала: {', '.join(sorted(unknown))}")
+        if isinstance(channel["id"], bool) or not isinstance(channel["id"], (str, int)):
+            raise ValueError("id канала должен быть строкой (@username) или числом")
+        if not isinstance(channel["url"], str) or not channel["url"].startswith(CHANNEL_URL_SCHEMES):
+            raise ValueError(f"url канала должен начинаться с {', '.join(CHANNEL_URL_SCHEMES)}")
+        for key in ("name", "button"):
+            if not isinstance(channel[key], str) or not channel[key].strip():
+                raise ValueError(f"{key} канала должен быть непустой строкой")
+        if not isinstance(channel.get("verify", True), bool):
+            raise ValueError("verify должен быть true или false")
+    # The subscription keyboard is built from these: anything Telegram's types reject
+    # must be refused here, not at every user's phone step
+    try:
+        InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text=channel["button"], url=channel["url"])] for channel in channels
+        ])
+    except ValidationError as e:
+        raise ValueError(f"кнопки каналов не собираются: {e.errors()[0]['msg']}")
+    return channels
+
+
+def parse_setting(key: str, text: str):
+    """
+    Value of a setting from an admin's input.
+
+    Raises:
+        ValueError: unknown setting or invalid value (the message is shown to the admin)
+    """
+    if key not in SETTINGS:
+        raise ValueError(f"неизвестная настройка {key}")
+    if key == "daily_big_prizes":
+        if not text.strip().isdigit():
+            raise ValueError("нужно целое неотрицательное число")
+        return int(text)
+    if key == "channels":
+        return _parse_channels(text)
+    prizes = [prize.strip() for prize in text.split(",") if prize.strip()]
+    if not prizes:
+        raise ValueError("нужен хотя бы один приз")
+    return prizes
+
+
+def format_setting(key: str, settings: Settings) -> str:
+    value = getattr(settings, key)
+    if key == "channels":
+        return ", ".join(f"{channel['name']}{'' if channel.get('verify', True) else ' (без проверки)'}" for channel in value)
+    if isinstance(value, tuple):
+        return ", ".join(value)
+    return str(value)
+
+
+async def load_settings() -> int:
+    """Load the current campaign's overrides (startup). Returns number of overridden settings."""
+    campaign = current_campaign()
+    snapshot = _snapshots[campaign.slug] = _build(campaign, await get_settings())
+    return len(snapshot.overridden)
+
+
+async def update_setting(key: str, value, admin_id: int) -> Settings:
+    """Store an override (value=None restores the startup value), log it and swap in a new snapshot."""
+    campaign = current_campaign()
+    async with _write_lock:
+        await save_setting(key, value, admin_id)
+        snapshot = _snapshots[campaign.slug] = _build(campaign, await get_settings())
+    logger.info(
+        f"Setting {key} of {campaign.slug} changed by {admin_id}: "
+        f"{'restored to startup value' if value is None else json.dumps(value, ensure_ascii=False)}"
+    )
+    return snapshot
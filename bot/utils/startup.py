@@ -0,0 +1,135 @@
+"""
+Startup: readiness gating, config checks and a measured boot.
+- Liveness (/) answers as soon as the health server is up; readiness (/ready) only once
+  polling has started, and is withdrawn again when shutdown begins
+- Independent initialization steps run concurrently once the schema exists
+- Every phase is timed; the report is logged at boot with a warning over STARTUP_BUDGET
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Awaitable
+
+from bot.config import (
+    BOT_TOKEN,
+    ADMIN_IDS,
+    STORAGE_CHANNEL_ID,
+    DAILY_SMALL_PRIZES,
+    DAILY_BIG_PRIZES,
+    DAILY_VISITORS,
+    STARTUP_BUDGET
+)
+from bot.campaigns import CAMPAIGNS
+from bot.utils.settings_store import validate_channels
+from bot.utils.subscriptions import campaign_channels, verified_channels
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"^\d+:[\w-]{30,}$")
+CHANNEL_PATTERN = re.compile(r"^(@\w{4,}|-100\d+)$")
+
+
+class ConfigError(Exception):
+    """Configuration the bot cannot start with."""
+
+
+def check_config() -> list[str]:
+    """
+    Validate settings before anything connects anywhere.
+
+    Returns:
+        list[str]: warnings (the bot can run, but something looks wrong)
+
+    Raises:
+        ConfigError: the bot cannot run with this configuration
+    """
+    if not TOKEN_PATTERN.match(BOT_TOKEN):
+        raise ConfigError("BOT_TOKEN is not set or malformed")
+
+    for campaign in CAMPAIGNS.values():
+        for path in (campaign.photos_dir, os.path.dirname(os.path.abspath(campaign.database_path)), campaign.archive_dir):
+            os.makedirs(path, exist_ok=True)
+            if not os.access(path, os.W_OK):
+                raise ConfigError(f"{path} is not writable")
+        try:
+            validate_channels(list(campaign.channels))
+        except ValueError as e:
+            raise ConfigError(f"Campaign {campaign.slug}: subscription channels are invalid: {e}")
+
+    warnings = []
+    if not ADMIN_IDS:
+        warnings.append("ADMIN_IDS is empty - admin commands are unavailable")
+    for campaign in CAMPAIGNS.values():
+        for channel in campaign_channels(campaign):
+            if not CHANNEL_PATTERN.match(str(channel.id)):
+                warnings.append(
+                    f"Campaign {campaign.slug}: channel {channel.name} id {channel.id!r} is neither @username nor -100... id"
+                )
+        if not verified_channels(campaign):
+            warnings.append(f"Campaign {campaign.slug}: no subscription channel is verified - the step accepts everyone")
+    if STORAGE_CHANNEL_ID and not STORAGE_CHANNEL_ID.lstrip("-").isdigit():
+        warnings.append(f"STORAGE_CHANNEL_ID={STORAGE_CHANNEL_ID!r} should be a numeric channel id")
+    if DAILY_SMALL_PRIZES + DAILY_BIG_PRIZES > DAILY_VISITORS:
+        warnings.append("More daily prizes than expected visitors")
+    return warnings
+
+
+class Startup:
+    """Boot phases with their durations and the readiness flag."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.phases: dict[str, float] = {}
+        self.status = "starting"
+        self.ready = False
+        self.boot_seconds: float | None = None
+
+    def record(self, name: str, since: float) -> None:
+        self.phases[name] = time.monotonic() - since
+
+    async def run(self, name: str, work: Awaitable):
+        """Run and time one phase."""
+        self.status = name
+        since = time.monotonic()
+        try:
+            return await work
+        finally:
+            self.record(name, since)
+
+    async def gather(self, **steps: Awaitable) -> dict:
+        """Run independent phases concurrently; a failed step is logged, the others still finish."""
+        self.status = ", ".join(steps)
+
+        async def timed(name: str, work: Awaitable):
+            since = time.monotonic()
+            try:
+                return await work
+            except Exception as e:
+                logger.error(f"Startup step {name} failed: {e}")
+                return None
+            finally:
+                self.record(name, since)
+
+        results = await asyncio.gather(*(timed(name, work) for name, work in steps.items()))
+        return dict(zip(steps, results))
+
+    def mark_ready(self) -> None:
+        """Polling has started: report the boot and start answering /ready."""
+        self.ready = True
+        self.status = "ready"
+        self.boot_seconds = time.monotonic() - self.started
+        phases = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        message = f"Startup: ready in {self.boot_seconds:.2f}s (budget {STARTUP_BUDGET:g}s): {phases}"
+        if self.boot_seconds > STARTUP_BUDGET:
+            logger.warning(message)
+        else:
+            logger.info(message)
+
+    def mark_stopping(self) -> None:
+        self.ready = False
+        self.status = "shutting down"
+
+
+startup = Startup()
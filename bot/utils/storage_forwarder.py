@@ -0,0 +1,172 @@
+"""
+Batched forwarding of participant photos to the storage channel.
+- Pending forwards are queued and sent as media group albums (up to 10)
+- A batch is flushed when full or after STORAGE_BATCH_TIMEOUT seconds
+- One sender: batches go out in arrival order, a failed batch is retried before the next
+- An album Telegram rejects (one bad file or caption) is not retried: its photos are sent one
+  by one, so only the bad one is lost
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import InputMediaPhoto, InputMediaDocument
+
+from bot.database import enqueue_outbox
+from bot.utils.outbox import PERMANENT_ERRORS
+from bot.config import STORAGE_CHANNEL_ID, STORAGE_BATCH_SIZE, STORAGE_BATCH_TIMEOUT, STORAGE_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingForward:
+    """A photo waiting to be sent to the storage channel."""
+    file_id: str
+    caption: str
+    is_document: bool = False
+
+
+_queue: asyncio.Queue = asyncio.Queue()
+# Item taken from the queue that could not join the current album (photos and documents can't mix)
+_carry: PendingForward | None = None
+
+
+def forward_to_storage(file_id: str, caption: str, is_document: bool = False) -> None:
+    """Queue a photo for the storage channel."""
+    if not STORAGE_CHANNEL_ID:
+        return
+    _queue.put_nowait(PendingForward(file_id, caption, is_document))
+
+
+def pending_forwards() -> int:
+    """Number of queued forwards not yet sent."""
+    return _queue.qsize() + (1 if _carry else 0)
+
+
+async def _next_item(timeout: float | None) -> PendingForward:
+    global _carry
+    if _carry is not None:
+        item, _carry = _carry, None
+        return item
+    if timeout is None:
+        return await _queue.get()
+    return await asyncio.wait_for(_queue.get(), timeout)
+
+
+async def _collect_batch() -> list[PendingForward]:
+    """Wait for the first item, then gather more until the album is full or the timeout passes."""
+    global _carry
+    loop = asyncio.get_running_loop()
+    
+    batch = [await _next_item(None)]
+    deadline = loop.time() + STORAGE_BATCH_TIMEOUT
+    
+    try:
+        while len(batch) < STORAGE_BATCH_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await _next_item(remaining)
+            except asyncio.TimeoutError:
+                break
+            if item.is_document != batch[0].is_document:
+                _carry = item
+                break
+            batch.append(item)
+    except asyncio.CancelledError:
+        _requeue(batch)
+        raise
+    
+    return batch
+
+
+def _requeue(batch: list[PendingForward]) -> None:
+    """Put an interrupted album back, so the shutdown flush sends it."""
+    for item in batch:
+        _queue.put_nowait(item)
+
+
+def _drain_batch() -> list[PendingForward]:
+    """Take whatever is queued right now, without waiting (used on flush)."""
+    global _carry
+    batch = []
+    while len(batch) < STORAGE_BATCH_SIZE:
+        if _carry is not None:
+            item, _carry = _carry, None
+        elif not _queue.empty():
+            item = _queue.get_nowait()
+        else:
+            break
+        if batch and item.is_document != batch[0].is_document:
+            _carry = item
+            break
+        batch.append(item)
+    return batch
+
+
+async def _send(bot: Bot, batch: list[PendingForward]) -> None:
+    if len(batch) == 1:
+        item = batch[0]
+        if item.is_document:
+            await bot.send_document(chat_id=STORAGE_CHANNEL_ID, document=item.file_id, caption=item.caption)
+        else:
+            await bot.send_photo(chat_id=STORAGE_CHANNEL_ID, photo=item.file_id, caption=item.caption)
+        return
+    
+    media_type = InputMediaDocument if batch[0].is_document else InputMediaPhoto
+    await bot.send_media_group(
+        chat_id=STORAGE_CHANNEL_ID,
+        media=[media_type(media=item.file_id, caption=item.caption) for item in batch]
+    )
+
+
+async def _send_batch(bot: Bot, batch: list[PendingForward]) -> bool:
+    """Send one album, retrying on flood control and transient errors; a rejected album is split."""
+    for attempt in range(1, STORAGE_MAX_RETRIES + 1):
+        try:
+            await _send(bot, batch)
+            return True
+        except TelegramRetryAfter as e:
+            logger.warning(f"Storage channel flood control, retry in {e.retry_after}s")
+            await asyncio.sleep(e.retry_after)
+        except PERMANENT_ERRORS as e:
+            if len(batch) == 1:
+                logger.error(f"Storage forward of {batch[0].file_id} rejected, dropped: {e}")
+                return False
+            logger.error(f"Storage album of {len(batch)} rejected, sending one by one: {e}")
+            results = [await _send_batch(bot, [item]) for item in batch]
+            return all(results)
+        except Exception as e:
+            logger.error(f"Storage forward failed (attempt {attempt}/{STORAGE_MAX_RETRIES}): {e}")
+            await asyncio.sleep(min(2 ** attempt, 60))
+    
+    # Hand the photos over to the outbox so they are retried later, one by one
+    logger.error(f"Moving {len(batch)} storage forwards to the outbox")
+    for item in batch:
+        if item.is_document:
+            await enqueue_outbox("send_document", {"chat_id": STORAGE_CHANNEL_ID, "document": item.file_id, "caption": item.caption})
+        else:
+            await enqueue_outbox("send_photo", {"chat_id": STORAGE_CHANNEL_ID, "photo": item.file_id, "caption": item.caption})
+    return False
+
+
+async def run_storage_forwarder(bot: Bot) -> None:
+    """Background task: send queued photos to the storage channel in albums."""
+    while True:
+        batch = await _collect_batch()
+        try:
+            await _send_batch(bot, batch)
+        except asyncio.CancelledError:
+            # Stopped mid-send: better a duplicate in the channel than a lost photo
+            _requeue(batch)
+            raise
+
+
+async def flush_storage_forwarder(bot: Bot) -> None:
+    """Send everything still queued right away."""
+    while batch := _drain_batch():
+        await _send_batch(bot, batch)
@@ -0,0 +1,89 @@
+"""
+Channel registry for the subscription step (SUBSCRIPTION_CHANNELS, the campaign's own channels or
+the live `channels` setting).
+- Every channel gets a button; only "verify" channels are checked with getChatMember
+- A user's channels are checked concurrently under one deadline, so the check takes as
+  long as the slowest channel, not the sum
+- A channel that errors or misses the deadline counts as subscribed: a broken check must not
+  block registration
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.enums import ChatMemberStatus
+
+from bot.campaigns import Campaign, current_campaign
+from bot.utils.settings_store import current_settings
+from bot.config import SUBSCRIPTION_CHECK_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+MEMBER_STATUSES = {ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR}
+
+
+@dataclass(frozen=True)
+class Channel:
+    id: str | int
+    url: str
+    name: str
+    button: str
+    verify: bool = True
+
+
+# Campaign slug -> (settings version, all channels, verified channels)
+_registries: dict[str, tuple[int, tuple[Channel, ...], tuple[Channel, ...]]] = {}
+
+
+def _registry(campaign: Campaign | None) -> tuple[int, tuple[Channel, ...], tuple[Channel, ...]]:
+    campaign = campaign or current_campaign()
+    settings = current_settings(campaign)
+    registry = _registries.get(campaign.slug)
+    if registry is None or registry[0] != settings.version:
+        channels = tuple(Channel(**channel) for channel in settings.channels)
+        registry = _registries[campaign.slug] = (
+            settings.version, channels, tuple(channel for channel in channels if channel.verify)
+        )
+    return registry
+
+
+def campaign_channels(campaign: Campaign = None) -> tuple[Channel, ...]:
+    """Channels of a campaign (the current one by default), in keyboard order."""
+    return _registry(campaign)[1]
+
+
+def verified_channels(campaign: Campaign = None) -> tuple[Channel, ...]:
+    """Channels whose membership is checked."""
+    return _registry(campaign)[2]
+
+
+async def channel_status(bot: Bot, user_id: int, channel: Channel) -> bool | None:
+    """Whether the user is a member of the channel, None if the bot cannot tell."""
+    try:
+        member = await bot.get_chat_member(chat_id=channel.id, user_id=user_id)
+    except Exception as e:
+        logger.debug(f"Membership of {user_id} in {channel.id} unknown: {e}")
+        return None
+    return member.status in MEMBER_STATUSES
+
+
+async def missing_subscriptions(
+    bot: Bot,
+    user_id: int,
+    timeout: float = SUBSCRIPTION_CHECK_TIMEOUT
+) -> list[Channel]:
+    """Verified channels the user is not subscribed to (all checks share one deadline)."""
+    channels = verified_channels()
+    # Started together, so every wait_for ends by the same deadline
+    results = await asyncio.gather(
+        *(asyncio.wait_for(channel_status(bot, user_id, channel), timeout) for channel in channels),
+        return_exceptions=True
+    )
+    missing = []
+    for channel, result in zip(channels, results):
+        if isinstance(result, asyncio.TimeoutError):
+            logger.warning(f"Membership check in {channel.id} timed out after {timeout:g}s, counted as subscribed")
+        elif result is False:
+            missing.append(channel)
+    return missing
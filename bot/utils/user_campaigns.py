@@ -0,0 +1,38 @@
+"""
+Which campaign each user belongs to.
+- Set by a deep-link /start <slug> of a known campaign, kept until another such link
+- Users who never followed a campaign link belong to the default campaign and are not stored
+- Held in memory (loaded at startup) and written through to the default campaign's database
+"""
+import logging
+
+from bot.campaigns import Campaign, DEFAULT_CAMPAIGN, DEFAULT_SLUG, get_campaign
+from bot.database import get_user_campaigns, save_user_campaign
+
+logger = logging.getLogger(__name__)
+
+_user_campaigns: dict[int, str] = {}
+
+
+def user_campaign(user_id: int) -> Campaign:
+    """Campaign the user joined (default if none or if it is no longer configured)."""
+    slug = _user_campaigns.get(user_id)
+    if slug is None:
+        return DEFAULT_CAMPAIGN
+    return get_campaign(slug) or DEFAULT_CAMPAIGN
+
+
+async def join_campaign(user_id: int, campaign: Campaign) -> None:
+    """Move the user to `campaign` (no write if already there)."""
+    if _user_campaigns.get(user_id, DEFAULT_SLUG) == campaign.slug:
+        return
+    _user_campaigns[user_id] = campaign.slug
+    await save_user_campaign(user_id, campaign.slug)
+    logger.info(f"User {user_id} joined campaign {campaign.slug}")
+
+
+async def load_user_campaigns() -> int:
+    """Load stored choices (startup). Returns number of users outside the default campaign."""
+    _user_campaigns.clear()
+    _user_campaigns.update(await get_user_campaigns())
+    return sum(slug != DEFAULT_SLUG for slug in _user_campaigns.values())
@@ -0,0 +1,86 @@
+"""
+Event loop lag watchdog.
+- A loop task wakes every LAG_CHECK_INTERVAL and records how late it was scheduled
+- A monitor thread notices when the loop has not ticked for LAG_THRESHOLD and logs
+  the loop thread's stack once per stall - that is the code blocking the loop
+- Lag percentiles of the recent samples are exported on the health server's /metrics
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from bot.config import LAG_CHECK_INTERVAL, LAG_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# Recent lag samples kept for percentiles (10 minutes at the default interval)
+SAMPLES = 6000
+
+
+class LoopWatchdog:
+    """Measures event loop scheduling lag and captures stacks of stalls."""
+
+    def __init__(self, interval: float = LAG_CHECK_INTERVAL, threshold: float = LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples: deque[float] = deque(maxlen=SAMPLES)
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._stop = threading.Event()
+
+    def percentiles(self) -> dict[str, float]:
+        """p50/p90/p99/max lag of the recent samples in seconds."""
+        if not self.samples:
+            return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {
+            "p50": ordered[int(last * 0.50)],
+            "p90": ordered[int(last * 0.90)],
+            "p99": ordered[int(last * 0.99)],
+            "max": ordered[-1],
+        }
+
+    def _monitor(self) -> None:
+        """Thread: log the loop thread's stack when it stops ticking."""
+        reported_beat = None
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            stalled_for = time.monotonic() - beat
+            if stalled_for < self.threshold or beat == reported_beat:
+                continue
+
+            reported_beat = beat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<no frame>"
+            logger.warning(f"Event loop blocked for {stalled_for * 1000:.0f}ms, stack:\n{stack}")
+
+    async def run(self) -> None:
+        """Background task: sample lag until cancelled."""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        monitor = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        monitor.start()
+
+        try:
+            while True:
+                # time.monotonic(): uvloop's loop.time() has millisecond resolution
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                self._beat = time.monotonic()
+                lag = max(0.0, self._beat - expected)
+                self.samples.append(lag)
+                self.max_lag = max(self.max_lag, lag)
+        finally:
+            self._stop.set()
+
+
+watchdog = LoopWatchdog()
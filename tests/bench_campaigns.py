@@ -0,0 +1,93 @@
+"""
+Benchmark of hosting many campaigns in one process.
+Measures what each extra campaign costs: boot time (schema, index loads), resident memory,
+routing per update, and whether database calls get slower as campaigns are added.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CAMPAIGN_COUNT = 50
+WORK_DIR = tempfile.mkdtemp(prefix="bench_campaigns_")
+os.environ["DATABASE_PATH"] = os.path.join(WORK_DIR, "database.db")
+os.environ["PHOTOS_DIR"] = os.path.join(WORK_DIR, "photos")
+os.environ["ARCHIVE_DIR"] = os.path.join(WORK_DIR, "archive")
+os.environ["CAMPAIGNS_FILE"] = os.path.join(WORK_DIR, "campaigns.json")
+with open(os.environ["CAMPAIGNS_FILE"], "w") as f:
+    json.dump({f"promo{i}": {"name": f"Promo {i}"} for i in range(1, CAMPAIGN_COUNT)}, f)
+
+from aiogram.types import Update
+
+from bot.campaigns import CAMPAIGNS, DEFAULT_CAMPAIGN, use_campaign, for_each_campaign
+from bot.database import init_db, get_or_create_participant, get_daily_stats
+from bot.middlewares import CampaignMiddleware
+from bot.utils.membership import load_membership
+from bot.utils.phash import load_photo_hashes
+from bot.utils.user_campaigns import join_campaign
+
+
+async def timed_per_call(work, calls: int) -> float:
+    started = time.perf_counter()
+    for i in range(calls):
+        await work(i)
+    return (time.perf_counter() - started) / calls * 1_000_000
+
+
+async def main(calls: int = 2000):
+    print(f"🧪 Campaign hosting: {len(CAMPAIGNS)} campaigns in one process")
+    print("=" * 60)
+
+    # Boot: schema plus in-memory indexes of every campaign
+    tracemalloc.start()
+    started = time.perf_counter()
+    await for_each_campaign(init_db)
+    await for_each_campaign(load_membership)
+    await for_each_campaign(load_photo_hashes)
+    boot = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  boot:     {boot * 1000 / len(CAMPAIGNS):7.1f} ms per campaign ({boot:.2f}s total)")
+    print(f"  memory:   {memory / 1024 / len(CAMPAIGNS):7.1f} KiB per campaign (Python heap, idle campaign)")
+
+    # Routing: the middleware resolving the sender's campaign around a no-op handler
+    middleware = CampaignMiddleware()
+    campaigns = list(CAMPAIGNS.values())
+    for user_id, campaign in enumerate(campaigns):
+        await join_campaign(user_id, campaign)
+    update = Update.model_validate({"update_id": 1, "message": {
+        "message_id": 1, "date": 0, "chat": {"id": 1, "type": "private"}, "text": "Иван"
+    }})
+
+    async def handler(event, data):
+        return None
+
+    class Sender:
+        def __init__(self, user_id):
+            self.id = user_id
+
+    senders = [Sender(user_id) for user_id in range(len(campaigns))]
+    routing = await timed_per_call(
+        lambda i: middleware(handler, update, {"event_from_user": senders[i % len(senders)]}), calls * 10
+    )
+    print(f"  routing:  {routing:7.2f} µs per update")
+
+    # Database calls in the first and the last campaign cost the same: one file each, no shared pool
+    async def participant_call(campaign, i):
+        with use_campaign(campaign):
+            await get_or_create_participant(10**6 + i)
+            await get_daily_stats()
+
+    first = await timed_per_call(lambda i: participant_call(DEFAULT_CAMPAIGN, i), calls // 10)
+    last = await timed_per_call(lambda i: participant_call(campaigns[-1], i), calls // 10)
+    mixed = await timed_per_call(lambda i: participant_call(campaigns[i % len(campaigns)], i), calls // 10)
+    print(f"  queries:  {first:7.0f} µs default, {last:7.0f} µs campaign #{len(campaigns)}, "
+          f"{mixed:7.0f} µs round-robin over all")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
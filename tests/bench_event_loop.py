@@ -0,0 +1,72 @@
+"""
+asyncio vs uvloop under the stress test load.
+Runs the stress test user flow on each event loop with the lag watchdog sampling,
+and reports throughput and scheduling lag percentiles.
+
+Usage:
+    python tests/bench_event_loop.py --users 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# stress_test points DATABASE_PATH at a scratch database on import
+from stress_test import simulate_user
+from bot.config import DATABASE_PATH
+from bot.database import init_db
+from bot.utils.watchdog import LoopWatchdog
+
+
+async def run_load(users: int, concurrency: int) -> dict:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DATABASE_PATH + suffix):
+            os.remove(DATABASE_PATH + suffix)
+    await init_db()
+
+    watchdog = LoopWatchdog(interval=0.01, threshold=10)
+    sampler = asyncio.create_task(watchdog.run())
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(user_id: int):
+        async with semaphore:
+            return await simulate_user(user_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(i) for i in range(1, users + 1)))
+    elapsed = time.perf_counter() - start
+
+    sampler.cancel()
+    return {"users_per_second": users / elapsed, **watchdog.percentiles()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    loops = {"asyncio": asyncio.DefaultEventLoopPolicy}
+    try:
+        import uvloop
+        loops["uvloop"] = uvloop.EventLoopPolicy
+    except ImportError:
+        print("⚠️  uvloop is not installed - only asyncio is measured")
+
+    print(f"🧪 Event loop benchmark: {args.users} users, {args.concurrency} concurrent")
+    print("=" * 72)
+    print(f"   {'loop':<10}{'users/s':>10}{'lag p50':>12}{'lag p90':>12}{'lag p99':>12}{'max':>12}")
+    for name, policy in loops.items():
+        asyncio.set_event_loop_policy(policy())
+        result = asyncio.run(run_load(args.users, args.concurrency))
+        print(
+            f"   {name:<10}{result['users_per_second']:>10.1f}"
+            + "".join(f"{result[key] * 1000:>10.2f}ms" for key in ("p50", "p90", "p99", "max"))
+        )
+    asyncio.set_event_loop_policy(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark of the in-memory membership index at 100k participants.
+Measures memory (compared with plain Python sets) and lookup latency.
+"""
+import random
+import sys
+import os
+import time
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.utils.membership import MembershipIndex, phone_digest
+
+
+def make_keys(count: int) -> list[tuple[int, str]]:
+    rng = random.Random(42)
+    return [
+        (rng.randint(10**8, 8 * 10**9), f"+7{rng.randint(9000000000, 9999999999)}")
+        for _ in range(count)
+    ]
+
+
+def measure(build) -> tuple[object, int]:
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def main(count: int = 100_000):
+    keys = make_keys(count)
+    print(f"🧪 Membership index benchmark: {count:,} participants")
+    print("=" * 60)
+
+    def build_index():
+        index = MembershipIndex()
+        index.load(keys)
+        return index
+
+    def build_sets():
+        return {t for t, _ in keys}, {p for _, p in keys}
+
+    index, index_bytes = measure(build_index)
+    (users, phones), set_bytes = measure(build_sets)
+
+    print(f"   Sorted arrays:  {index_bytes / 1024 / 1024:.2f} MB ({index_bytes / count:.1f} B/participant)")
+    print(f"   Python sets:    {set_bytes / 1024 / 1024:.2f} MB ({set_bytes / count:.1f} B/participant)")
+
+    probes = [random.randint(10**8, 8 * 10**9) for _ in range(100_000)]
+    start = time.perf_counter()
+    for telegram_id in probes:
+        index.has_user(telegram_id)
+    user_lookup = (time.perf_counter() - start) / len(probes)
+
+    phone_probes = [f"8{random.randint(9000000000, 9999999999)}" for _ in range(100_000)]
+    start = time.perf_counter()
+    for phone in phone_probes:
+        index.has_phone(phone)
+    phone_lookup = (time.perf_counter() - start) / len(phone_probes)
+
+    start = time.perf_counter()
+    for i in range(1000):
+        index.add(9 * 10**9 + i, f"+7900{i:07d}")
+    insert = (time.perf_counter() - start) / 1000
+
+    print(f"   has_user:       {user_lookup * 1e6:.2f} µs")
+    print(f"   has_phone:      {phone_lookup * 1e6:.2f} µs")
+    print(f"   add:            {insert * 1e6:.2f} µs")
+
+    # Sanity: every loaded key is found
+    assert all(index.has_user(t) and index.has_phone(p) for t, p in keys[:1000])
+    assert phone_digest("+7 (999) 123-45-67") == phone_digest("89991234567")
+    print("\n✅ Benchmark completed!")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
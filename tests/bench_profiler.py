@@ -0,0 +1,75 @@
+"""
+Cost of the on-demand profilers under the stress test load.
+Runs the stress test user flow plain, under the sampling profiler and under tracemalloc,
+alternating rounds to even out noise, and reports throughput of each.
+
+Usage:
+    python tests/bench_profiler.py --users 300 --concurrency 20 --rounds 3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# stress_test points DATABASE_PATH at a scratch database on import
+from stress_test import simulate_user
+from bot.config import DATABASE_PATH, MEMSNAP_FRAMES
+from bot.database import init_db
+from bot.utils.profiler import SamplingProfiler
+
+
+async def run_load(users: int, concurrency: int, first_id: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(user_id: int):
+        async with semaphore:
+            return await simulate_user(user_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(first_id + i) for i in range(users)))
+    return users / (time.perf_counter() - start)
+
+
+async def main(users: int, concurrency: int, rounds: int):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DATABASE_PATH + suffix):
+            os.remove(DATABASE_PATH + suffix)
+    await init_db()
+
+    results: dict[str, list[float]] = {"plain": [], "sampling": [], "tracemalloc": []}
+    first_id = 1
+    for _ in range(rounds):
+        for mode in results:
+            profiler = None
+            if mode == "sampling":
+                profiler = SamplingProfiler()
+                profiler.start()
+            elif mode == "tracemalloc":
+                tracemalloc.start(MEMSNAP_FRAMES)
+            results[mode].append(await run_load(users, concurrency, first_id))
+            first_id += users
+            if profiler:
+                profiler.stop()
+            elif mode == "tracemalloc":
+                tracemalloc.stop()
+
+    plain = sum(results["plain"]) / rounds
+    print(f"   {'mode':<14}{'users/s':>10}{'vs plain':>12}")
+    for mode, values in results.items():
+        average = sum(values) / rounds
+        print(f"   {mode:<14}{average:>10.1f}{average / plain - 1:>+12.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"🧪 Profiler overhead: {args.users} users, {args.concurrency} concurrent, {args.rounds} rounds")
+    print("=" * 40)
+    asyncio.run(main(args.users, args.concurrency, args.rounds))
@@ -0,0 +1,101 @@
+"""
+Writer latency during a concurrent full export.
+Runs `update_participant` in a loop while `get_all_participants` exports the
+whole database over and over, once in the old rollback-journal mode and once
+in WAL mode with the read-only snapshot connection.
+
+Usage:
+    python tests/bench_snapshot_reads.py --count 100000 --writes 300
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORK_DIR = tempfile.mkdtemp(prefix="bot_snapshot_")
+os.environ["DATABASE_PATH"] = os.path.join(WORK_DIR, "unused.db")
+os.environ["ARCHIVE_DIR"] = os.path.join(WORK_DIR, "archive")
+
+from bot.database import init_db, update_participant, get_all_participants
+from seed_participants import seed_participants, use_database, TELEGRAM_ID_BASE
+
+
+async def measure_writes(count: int, writes: int, with_export: bool) -> tuple[list[float], int]:
+    """Latency of each write, optionally with exports running alongside. Returns (latencies, exports)."""
+    rng = random.Random(1)
+    latencies = []
+    exports = 0
+    stop = asyncio.Event()
+
+    async def exporter():
+        nonlocal exports
+        while not stop.is_set():
+            await get_all_participants()
+            exports += 1
+
+    task = asyncio.create_task(exporter()) if with_export else None
+    if task:
+        await asyncio.sleep(0.05)  # let the first export start reading
+
+    try:
+        for _ in range(writes):
+            start = time.perf_counter()
+            await update_participant(TELEGRAM_ID_BASE + rng.randrange(count), name="Бенчмарк")
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.005)
+    finally:
+        stop.set()
+        if task:
+            await task
+
+    return latencies, exports
+
+
+def report(label: str, latencies: list[float], exports: int):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"   {label:<28} p50 {p50 * 1e3:7.2f}ms   p99 {p99 * 1e3:8.2f}ms   "
+        f"max {latencies[-1] * 1e3:8.2f}ms   exports {exports}"
+    )
+
+
+async def run(count: int, writes: int):
+    for mode in ("DELETE", "WAL"):
+        path = os.path.join(WORK_DIR, f"snapshot_{mode.lower()}.db")
+        with use_database(path):
+            await init_db()
+            conn = sqlite3.connect(path)
+            conn.execute(f"PRAGMA journal_mode = {mode}")
+            conn.close()
+            seed_participants(path, count, days=1)
+
+            print(f"\n📒 journal_mode={mode}")
+            report("writes alone", *await measure_writes(count, writes, with_export=False))
+            report("writes during full export", *await measure_writes(count, writes, with_export=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--writes", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"🧪 Writer latency vs. concurrent export: {args.count:,} participants, {args.writes} writes")
+    print("=" * 78)
+    try:
+        asyncio.run(run(args.count, args.writes))
+    finally:
+        import shutil
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
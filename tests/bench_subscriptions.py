@@ -0,0 +1,67 @@
+"""
+Benchmark of the subscription check with several verified channels.
+Compares checking channels one after another with the concurrent check, on a fake Bot API
+with a fixed latency, and shows the deadline cutting off a channel that does not answer.
+"""
+import asyncio
+import json
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHANNEL_COUNT = 4
+os.environ["SUBSCRIPTION_CHANNELS"] = json.dumps([
+    {"id": f"@channel{i}", "url": f"https://t.me/channel{i}", "name": f"Channel {i}", "button": f"Channel {i}"}
+    for i in range(CHANNEL_COUNT)
+])
+
+from aiogram import Bot
+
+from bot.replay import build_fake_session
+from bot.utils.subscriptions import verified_channels, channel_status, missing_subscriptions
+
+
+async def sequential(bot: Bot, user_id: int) -> list:
+    return [channel for channel in verified_channels() if await channel_status(bot, user_id, channel) is False]
+
+
+async def timed(work, users: int) -> float:
+    started = time.perf_counter()
+    for user_id in range(users):
+        await work(user_id)
+    return (time.perf_counter() - started) / users * 1000
+
+
+async def main(latency: float = 0.08, users: int = 10):
+    print(f"🧪 Subscription check: {len(verified_channels())} channels, {latency * 1000:.0f}ms API latency")
+    print("=" * 60)
+    bot = Bot(token="123456:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA", session=build_fake_session(latency))
+
+    one_by_one = await timed(lambda user_id: sequential(bot, user_id), users)
+    together = await timed(lambda user_id: missing_subscriptions(bot, user_id), users)
+    print(f"  sequential:  {one_by_one:7.1f} ms per user")
+    print(f"  concurrent:  {together:7.1f} ms per user  ({one_by_one / together:.1f}x)")
+
+    # One channel hangs: the check ends at the deadline instead of waiting for it
+    slow = build_fake_session(latency)
+    answer = slow.make_request
+
+    async def make_request(bot, method, timeout=None):
+        if getattr(method, "chat_id", None) == verified_channels()[-1].id:
+            await asyncio.sleep(10)
+        return await answer(bot, method, timeout)
+
+    slow.make_request = make_request
+    slow_bot = Bot(token=bot.token, session=slow)
+    deadline = latency * 3
+    started = time.perf_counter()
+    missing = await missing_subscriptions(slow_bot, 1, timeout=deadline)
+    print(
+        f"  one channel hanging, {deadline * 1000:.0f}ms deadline: "
+        f"{(time.perf_counter() - started) * 1000:.0f} ms, {len(missing)} missing"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,256 @@
+"""
+Benchmark regression suite for the bot's hot paths.
+- Every case runs against an isolated temp database seeded with N synthetic participants
+- Reports median time per call and allocations (tracemalloc) per call
+- Compares against stored JSON baselines and fails when a path regresses past the tolerance
+- Times are stored as ratios to a calibration case measured in the same run (a connection,
+  a query and some Python), so a baseline recorded on another machine still compares;
+  allocations are stored as they are
+
+Usage:
+    python tests/benchmark.py                       # compare with baseline
+    python tests/benchmark.py --update-baseline     # store current numbers
+    python tests/benchmark.py --sizes 1000 10000 --tolerance 0.3
+"""
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+
+import aiosqlite
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Never touch the production database: point the bot at a scratch directory before importing it
+WORK_DIR = tempfile.mkdtemp(prefix="bot_bench_")
+os.environ["DATABASE_PATH"] = os.path.join(WORK_DIR, "unused.db")
+os.environ["ARCHIVE_DIR"] = os.path.join(WORK_DIR, "archive")
+
+import bot.database.db as db
+from bot.database import (
+    init_db,
+    get_or_create_participant,
+    get_participant_by_phone,
+    get_participant_by_number,
+    update_participant,
+    save_registration,
+    get_next_participant_number,
+    get_daily_stats,
+    increment_daily_stats,
+    get_all_participants,
+    get_participant_contacts,
+    normalize_phone
+)
+from bot.utils import check_win
+from bot.utils.export import build_participants_csv
+from bot.keyboards import get_phone_keyboard, get_subscription_keyboard, get_finish_keyboard
+from seed_participants import seed_participants, use_database, TELEGRAM_ID_BASE
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# Time budget per case: repeat until this much time is spent (bounded by MIN/MAX runs)
+CASE_BUDGET = 0.3
+MIN_RUNS = 3
+MAX_RUNS = 2000
+
+# Timings below this share of the calibration case are dominated by noise - only allocations are compared
+MIN_COMPARABLE_RATIO = 0.02
+
+
+async def prepare(path: str, count: int):
+    """Fresh database at `path` (must be the current campaign's) with `count` participants."""
+    if os.path.exists(path):
+        os.remove(path)
+    await init_db()
+    # One event day, so every row stays in the hot table
+    seed_participants(path, count, seed=count, days=1)
+
+
+def make_cases(count: int) -> dict:
+    """name -> zero-argument callable returning an awaitable or a value."""
+    rng = random.Random(7)
+    new_ids = iter(range(10**9, 10**9 + 10**6))
+    rows_holder = {}
+
+    conn = sqlite3.connect(db.database_path())
+    hit_phone, = conn.execute(
+        "SELECT phone FROM participants WHERE telegram_id = ?", (TELEGRAM_ID_BASE + count // 2,)
+    ).fetchone()
+    max_number, = conn.execute("SELECT MAX(participant_number) FROM participants").fetchone()
+    conn.close()
+
+    async def all_rows():
+        rows_holder["rows"] = await get_all_participants()
+
+    return {
+        "db.get_or_create_participant.existing": lambda: get_or_create_participant(TELEGRAM_ID_BASE + rng.randrange(count)),
+        "db.get_or_create_participant.new": lambda: get_or_create_participant(next(new_ids)),
+        "db.get_participant_by_phone.hit": lambda: get_participant_by_phone(hit_phone),
+        "db.get_participant_by_phone.miss": lambda: get_participant_by_phone("+70000000000"),
+        "db.get_participant_by_number": lambda: get_participant_by_number(rng.randint(1, max_number)),
+        "db.update_participant": lambda: update_participant(TELEGRAM_ID_BASE + rng.randrange(count), name="Бенчмарк"),
+        "db.save_registration": lambda: save_registration(next(new_ids), "u", "Имя", "+79990000000", "/p.jpg"),
+        "db.get_next_participant_number": get_next_participant_number,
+        "db.get_daily_stats": get_daily_stats,
+        "db.increment_daily_stats": lambda: increment_daily_stats(small_prizes=1, participants=1),
+        "db.get_participant_contacts": get_participant_contacts,
+        "db.get_all_participants": all_rows,
+        "export.build_participants_csv": lambda: build_participants_csv(rows_holder["rows"]),
+        "randomizer.check_win": check_win,
+        "phone.normalize_phone": lambda: normalize_phone("+7 (999) 123-45-67"),
+        "keyboards.get_phone_keyboard": get_phone_keyboard,
+        "keyboards.get_subscription_keyboard": get_subscription_keyboard,
+        "keyboards.get_finish_keyboard": get_finish_keyboard,
+    }
+
+
+async def calibration():
+    """Fixed work shaped like the hot paths: the yardstick the stored ratios are relative to."""
+    async with aiosqlite.connect(":memory:") as conn:
+        cursor = await conn.execute("SELECT ?", (1,))
+        await cursor.fetchone()
+    sorted(str(i) for i in range(500))
+
+
+async def call(fn):
+    result = fn()
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+
+async def measure(fn) -> dict:
+    """Median seconds per call and bytes/blocks allocated by one call."""
+    await call(fn)  # warm-up
+
+    timings = []
+    spent = 0.0
+    while len(timings) < MIN_RUNS or (spent < CASE_BUDGET and len(timings) < MAX_RUNS):
+        start = time.perf_counter()
+        await call(fn)
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        spent += elapsed
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    await call(fn)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+    return {
+        "time": statistics.median(timings),
+        "peak_bytes": peak,
+        "blocks": blocks,
+        "runs": len(timings),
+    }
+
+
+def format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def compare(key: str, result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regression messages for one case (empty if within tolerance)."""
+    base = baseline.get(key)
+    if not base or "ratio" not in base:
+        return []
+
+    problems = []
+    if base["ratio"] >= MIN_COMPARABLE_RATIO and result["ratio"] > base["ratio"] * (1 + tolerance):
+        problems.append(
+            f"{key}: time {result['ratio']:.2f}x calibration vs baseline {base['ratio']:.2f}x"
+        )
+    if base["peak_bytes"] > 4096 and result["peak_bytes"] > base["peak_bytes"] * (1 + tolerance):
+        problems.append(
+            f"{key}: allocations {result['peak_bytes']:,}B vs baseline {base['peak_bytes']:,}B"
+        )
+    return problems
+
+
+async def run(sizes: list[int], tolerance: float, update_baseline: bool) -> int:
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+
+    print("⏱  Bot hot-path benchmarks")
+    print("=" * 78)
+    yardstick = (await measure(calibration))["time"]
+    print(f"   calibration case: {format_time(yardstick)}")
+    for count in sizes:
+        path = os.path.join(WORK_DIR, f"bench_{count}.db")
+        with use_database(path):
+            await prepare(path, count)
+            print(f"\n📦 {count:,} participants")
+            print(f"   {'case':<42}{'time':>10}{'peak alloc':>14}{'blocks':>8}  vs base")
+
+            for name, fn in make_cases(count).items():
+                key = f"{count}:{name}"
+                result = await measure(fn)
+                result["ratio"] = result["time"] / yardstick
+                results[key] = result
+
+                base = baseline.get(key)
+                delta = f"{(result['ratio'] / base['ratio'] - 1) * 100:+.0f}%" if base and base.get("ratio") else "new"
+                print(
+                    f"   {name:<42}{format_time(result['time']):>10}"
+                    f"{result['peak_bytes']:>13,}B{result['blocks']:>8}  {delta}"
+                )
+                regressions.extend(compare(key, result, baseline, tolerance))
+
+    if update_baseline:
+        baseline.update({
+            key: {"ratio": r["ratio"], "peak_bytes": r["peak_bytes"], "blocks": r["blocks"]}
+            for key, r in results.items()
+        })
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\n💾 Baseline saved: {BASELINE_PATH}")
+        return 0
+
+    print("\n" + "=" * 78)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {tolerance:.0%}:")
+        for problem in regressions:
+            print(f"   {problem}")
+        return 1
+
+    print("✅ No regressions")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown, 0.5 = +50%%")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        return asyncio.run(run(args.sizes, args.tolerance, args.update_baseline))
+    finally:
+        import shutil
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Shared fixtures for the unit tests.
+The bot reads its paths from the environment on import, so they point at a scratch
+directory before anything from `bot` is imported - tests never touch real data.
+"""
+import asyncio
+import dataclasses
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="bot_tests_")
+os.environ["DATABASE_PATH"] = os.path.join(SCRATCH_DIR, "database.db")
+os.environ["PHOTOS_DIR"] = os.path.join(SCRATCH_DIR, "photos")
+os.environ["ARCHIVE_DIR"] = os.path.join(SCRATCH_DIR, "archive")
+os.environ["CAMPAIGNS_FILE"] = ""
+
+
+@pytest.fixture
+def campaign(tmp_path):
+    """A fresh campaign with its own initialized database, made current for the test."""
+    from bot.campaigns import DEFAULT_CAMPAIGN, use_campaign
+    from bot.database import init_db
+
+    fresh = dataclasses.replace(
+        DEFAULT_CAMPAIGN,
+        slug=f"test_{tmp_path.name}",
+        database_path=str(tmp_path / "database.db"),
+        archive_dir=str(tmp_path / "archive"),
+        photos_dir=str(tmp_path / "photos")
+    )
+    with use_campaign(fresh):
+        asyncio.run(init_db())
+        yield fresh
+
+
+@pytest.fixture
+def run(campaign):
+    """Run a coroutine in the test's campaign (asyncio.run copies the current context)."""
+    return asyncio.run
@@ -0,0 +1,229 @@
+"""
+Bulk synthetic participants for large-scale database testing.
+- Russian names, phones in the formats accepted by `process_phone_text`
+- Prize distribution like the live randomizer, drop-offs, redeemed prizes
+- `created_at` spread over event days and hours, matching daily_stats rows
+- Deterministic for a given seed; inserted with executemany in large transactions
+
+Usage:
+    python tests/seed_participants.py /tmp/test.db --count 300000 --days 3 --seed 1
+    python tests/seed_participants.py /tmp/test.db --count 300000 --archive
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TELEGRAM_ID_BASE = 100_000_000
+
+MALE_NAMES = [
+    "Александр", "Дмитрий", "Максим", "Сергей", "Андрей", "Алексей", "Артём", "Илья",
+    "Кирилл", "Михаил", "Никита", "Матвей", "Роман", "Егор", "Иван", "Павел",
+]
+FEMALE_NAMES = [
+    "Анастасия", "Мария", "Анна", "Виктория", "Екатерина", "Наталья", "Марина", "Полина",
+    "Дарья", "Алина", "Ольга", "Татьяна", "Ксения", "Елена", "Юлия", "Софья",
+]
+SURNAMES = [
+    "Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов",
+    "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семёнов", "Егоров",
+]
+SMALL_PRIZES = ["Брелок EXEED", "Значок", "Стикерпак", "Ручка", "Магнит"]
+BIG_PRIZES = ["Термокружка", "Шарф", "Шапка", "Перчатки", "Плед"]
+
+# Formats people type (or share as contact) - all pass the 10..15 digits check
+PHONE_FORMATS = [
+    lambda d: f"+7{d}",
+    lambda d: f"8{d}",
+    lambda d: f"7{d}",
+    lambda d: f"+7 {d[:3]} {d[3:6]}-{d[6:8]}-{d[8:]}",
+    lambda d: f"8 ({d[:3]}) {d[3:6]}-{d[6:8]}-{d[8:]}",
+    lambda d: f"+7 ({d[:3]}) {d[3:6]} {d[6:8]} {d[8:]}",
+    lambda d: d,
+    lambda d: f"+7-{d[:3]}-{d[3:6]}-{d[6:8]}-{d[8:]}",
+]
+
+INSERT_SQL = """
+    INSERT INTO participants
+        (telegram_id, username, name, phone, phone_key, photo_path, participant_number,
+         is_winner, prize, prize_type, created_at, redeemed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def generate_rows(count: int, seed: int, days: int, start: date, big_per_day: int, stats: dict):
+    """Yield participant tuples in created_at order; per-day (finished, small, big) go to `stats`."""
+    # int(rand() * n) is several times cheaper than randrange(n) per row
+    rand = random.Random(seed).random
+
+    names = (
+        [f"{first} {last}" for first in MALE_NAMES for last in SURNAMES] +
+        [f"{first} {last}а" for first in FEMALE_NAMES for last in SURNAMES] +
+        MALE_NAMES + FEMALE_NAMES
+    )
+    name_count = len(names)
+    formats = len(PHONE_FORMATS)
+    per_day = count // days
+    seeded = 0
+    participant_number = 0
+
+    for day_index in range(days):
+        day = start + timedelta(days=day_index)
+        day_count = per_day if day_index < days - 1 else count - per_day * (days - 1)
+        # Event hours 12:00-23:00 Moscow = 09:00-20:00 UTC, evenly spread in order
+        day_start = datetime(day.year, day.month, day.day, 9)
+        step = 11 * 3600 / max(day_count, 1)
+        # Many rows share a second at large counts: format each second once
+        timestamps = {}
+        big_left = big_per_day
+        small = big = finished = 0
+
+        for i in range(day_count):
+            telegram_id = TELEGRAM_ID_BASE + seeded + i
+            # Ten digits: already the normalized phone key
+            phone_key = str(9_000_000_000 + int(rand() * 1_000_000_000))
+            phone = PHONE_FORMATS[int(rand() * formats)](phone_key)
+            second = int(i * step)
+            created_at = timestamps.get(second)
+            if created_at is None:
+                created_at = (day_start + timedelta(seconds=second)).strftime("%Y-%m-%d %H:%M:%S")
+                timestamps[second] = created_at
+
+            # ~15% drop off before the draw
+            if rand() < 0.15:
+                yield (telegram_id, None, names[int(rand() * name_count)], phone, phone_key, None, None,
+                       0, None, None, created_at, None)
+                continue
+
+            finished += 1
+            participant_number += 1
+            if big_left > 0 and rand() < 0.05:
+                big_left -= 1
+                big += 1
+                prize, prize_type = BIG_PRIZES[int(rand() * len(BIG_PRIZES))], "big"
+            else:
+                small += 1
+                prize, prize_type = SMALL_PRIZES[int(rand() * len(SMALL_PRIZES))], "small"
+
+            redeemed_at = created_at if rand() < 0.7 else None
+            yield (
+                telegram_id,
+                f"user{telegram_id}" if rand() < 0.6 else None,
+                names[int(rand() * name_count)],
+                phone,
+                phone_key,
+                f"/data/photos/{telegram_id}.jpg",
+                participant_number,
+                1, prize, prize_type, created_at, redeemed_at
+            )
+
+        seeded += day_count
+        stats[day.isoformat()] = (finished, small, big)
+
+
+def seed_participants(
+    path: str,
+    count: int,
+    seed: int = 42,
+    days: int = 2,
+    start: date = None,
+    big_per_day: int = 5,
+    batch_size: int = 50_000
+) -> float:
+    """
+    Insert `count` synthetic participants into an initialized database.
+
+    Returns:
+        float: rows per second
+    """
+    if start is None:
+        start = date.today() - timedelta(days=days - 1)
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(path)
+    # Bulk load: no fsync, rollback journal in memory, large page cache for the indexes.
+    # The journal mode is persistent (WAL), so it is restored afterwards.
+    journal_mode, = conn.execute("PRAGMA journal_mode").fetchone()
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -65536")
+
+    stats = {}
+    rows = generate_rows(count, seed, days, start, big_per_day, stats)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.executemany(INSERT_SQL, batch)
+            conn.commit()
+            batch.clear()
+    if batch:
+        conn.executemany(INSERT_SQL, batch)
+
+    conn.executemany(
+        """INSERT OR REPLACE INTO daily_stats (date, participants_count, small_prizes_given, big_prizes_given)
+           VALUES (?, ?, ?, ?)""",
+        [(day, finished, small, big) for day, (finished, small, big) in stats.items()]
+    )
+    conn.commit()
+    conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    conn.close()
+
+    return count / (time.perf_counter() - started)
+
+
+def use_database(path: str):
+    """
+    Run the block against the database at `path`.
+    The bot's database functions follow the current campaign, so this is the default campaign
+    with its database (and a slug of its own, so per-campaign caches don't mix) replaced.
+    """
+    import dataclasses
+    from bot.campaigns import DEFAULT_CAMPAIGN, use_campaign
+    slug = os.path.splitext(os.path.basename(path))[0]
+    return use_campaign(dataclasses.replace(DEFAULT_CAMPAIGN, slug=slug, database_path=path))
+
+
+async def _init(path: str):
+    from bot.database import init_db
+    with use_database(path):
+        await init_db()
+
+
+async def _archive(path: str) -> int:
+    from bot.database import archive_participants
+    with use_database(path):
+        return await archive_participants()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="database file (created if missing)")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", type=date.fromisoformat, help="first day, YYYY-MM-DD (default: days before today)")
+    parser.add_argument("--big-per-day", type=int, default=5)
+    parser.add_argument("--archive", action="store_true", help="archive previous days afterwards")
+    args = parser.parse_args()
+
+    # Archive files go next to the seeded database unless configured
+    os.environ.setdefault("ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(args.path)), "archive"))
+
+    asyncio.run(_init(args.path))
+    rate = seed_participants(args.path, args.count, args.seed, args.days, args.start, args.big_per_day)
+    print(f"🌱 Seeded {args.count:,} participants over {args.days} day(s): {rate:,.0f} rows/s")
+
+    if args.archive:
+        started = time.perf_counter()
+        archived = asyncio.run(_archive(args.path))
+        print(f"📦 Archived {archived:,} rows in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
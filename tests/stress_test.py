@@ -10,9 +10,13 @@ from datetime import datetime
 
 import sys
 import os
+import tempfile
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from bot.database import init_db, get_or_create_participant, update_participant, get_next_participant_number
+# Run against a scratch database, never the production DATABASE_PATH
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bot_stress_"), "stress.db")
+
+from bot.database import init_db, get_or_create_participant, update_participant, assign_participant_number
 from bot.config import DATABASE_PATH
 
 
@@ -36,8 +40,7 @@ async def simulate_user(user_id: int) -> dict:
     await update_participant(user_id, photo_path=photo_path)
     
     # Step 5: Get participant number
-    number = await get_next_participant_number()
-    await update_participant(user_id, participant_number=number)
+    await assign_participant_number(user_id)
     
     # Step 6: Update prize status
     is_winner = random.choice([True, False])
@@ -0,0 +1,51 @@
+"""
+Backups: the day archives hold rows that exist nowhere else, so they are uploaded too.
+"""
+import sqlite3
+
+from bot.database import save_registration, update_participant, archive_participants, redeem_prize
+from bot.utils import backup
+
+
+class FakeBot:
+    def __init__(self):
+        self.files = []
+
+    async def send_document(self, chat_id, document, caption):
+        self.files.append(document.filename)
+
+
+def uploaded(bot: FakeBot, prefix: str) -> list[str]:
+    return [filename for filename in bot.files if filename.startswith(prefix)]
+
+
+def test_archives_uploaded_when_sealed_and_after_redemption(run, campaign, monkeypatch):
+    monkeypatch.setattr(backup, "STORAGE_CHANNEL_ID", "-1001")
+
+    async def winner():
+        number = await save_registration(1, "user", "Анна", "+79990000001", "/p.jpg")
+        await update_participant(1, is_winner=1, prize="Брелок", prize_type="small")
+        return number
+
+    number = run(winner())
+    conn = sqlite3.connect(campaign.database_path)
+    conn.execute("UPDATE participants SET created_at = datetime('now', '-1 day')")
+    conn.commit()
+    conn.close()
+
+    bot = FakeBot()
+
+    async def scenario():
+        await archive_participants()
+        assert await backup.run_backup(bot)
+        assert len(uploaded(bot, "database_")) == 1 and len(uploaded(bot, "archive_")) == 1
+
+        # Nothing changed: nothing is sent again
+        assert not await backup.run_backup(bot)
+
+        # The redemption is written to the archive, which has to be uploaded again
+        assert (await redeem_prize(number, staff_id=7))[0] == "redeemed"
+        assert await backup.run_backup(bot)
+        assert len(uploaded(bot, "archive_")) == 2
+
+    run(scenario())
@@ -1,70 +1,71 @@
 """
-Test the randomizer with different participant counts.
+Prize draw: everyone wins, big prizes only while the day's stock lasts.
 """
-import asyncio
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-# Mock database stats
-mock_stats = {
-    "small_prizes_given": 0,
-    "big_prizes_given": 0,
-    "participants_count": 0
-}
-
-async def mock_get_daily_stats():
-    return mock_stats
-
-# Patch the module
-import bot.utils.randomizer as randomizer
-randomizer.get_daily_stats = mock_get_daily_stats
-
-from bot.utils.randomizer import check_win, get_day_progress, get_moscow_time
-
-
-async def test_with_participants(count: int):
-    """Test randomizer with specified number of participants."""
-    global mock_stats
-    mock_stats = {"small_prizes_given": 0, "big_prizes_given": 0, "participants_count": 0}
-    
-    small_wins = 0
-    big_wins = 0
-    
-    for i in range(count):
-        is_winner, prize, prize_type = await check_win()
-        
-        if prize_type == "big":
-            big_wins += 1
-            mock_stats["big_prizes_given"] += 1
-        elif prize_type == "small":
-            small_wins += 1
-            mock_stats["small_prizes_given"] += 1
-        
-        mock_stats["participants_count"] += 1
-    
-    print(f"\n👥 {count} participants:")
-    print(f"   🎁 Small: {small_wins}/100  |  🎉 Big: {big_wins}/5  |  Win rate: {(small_wins + big_wins) / count:.1%}")
-    
-    return small_wins, big_wins
-
-
-async def main():
-    moscow_time = get_moscow_time()
-    progress = get_day_progress()
-    
-    print("🎲 RANDOMIZER TEST - Flexible Participant Count")
-    print("="*60)
-    print(f"🕐 Moscow time: {moscow_time.strftime('%H:%M')}")
-    print(f"⏰ Day progress: {progress:.1%}")
-    
-    # Test with various participant counts
-    for count in [200, 500, 1000, 2000]:
-        await test_with_participants(count)
-    
-    print("\n" + "="*60)
-    print("✅ All tests completed!")
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
+import random
+
+import pytest
+
+from bot.utils import randomizer
+from bot.utils.randomizer import check_win
+from bot.utils.settings_store import current_settings
+
+
+@pytest.fixture
+def stats(monkeypatch, campaign):
+    """Today's counters as check_win sees them, updated by the test."""
+    stats = {"participants_count": 0, "small_prizes_given": 0, "big_prizes_given": 0}
+
+    async def get_daily_stats():
+        return stats
+
+    monkeypatch.setattr(randomizer, "get_daily_stats", get_daily_stats)
+    return stats
+
+
+def draw_day(run, stats: dict, participants: int) -> dict:
+    """Draw for `participants` people, counting prizes like the result handler does."""
+    async def scenario():
+        for _ in range(participants):
+            is_winner, prize, prize_type = await check_win()
+            assert is_winner and prize
+            stats[f"{prize_type}_prizes_given"] += 1
+            stats["participants_count"] += 1
+        return stats
+
+    return run(scenario())
+
+
+def test_everyone_wins_a_prize_from_the_lists(run, stats):
+    settings = current_settings()
+    random.seed(1)
+
+    async def scenario():
+        return [await check_win() for _ in range(200)]
+
+    for is_winner, prize, prize_type in run(scenario()):
+        assert is_winner
+        assert prize in (settings.big_prize_list if prize_type == "big" else settings.small_prize_list)
+
+
+@pytest.mark.parametrize("participants", [200, 2000])
+def test_big_prizes_never_exceed_the_daily_stock(run, stats, participants):
+    random.seed(participants)
+    drawn = draw_day(run, stats, participants)
+    assert drawn["big_prizes_given"] <= current_settings().daily_big_prizes
+    assert drawn["small_prizes_given"] + drawn["big_prizes_given"] == participants
+
+
+def test_stock_runs_out_on_a_busy_day(run, stats):
+    random.seed(3)
+    # 5% chance per draw: 2000 people take every big prize
+    assert draw_day(run, stats, 2000)["big_prizes_given"] == current_settings().daily_big_prizes
+
+
+def test_no_big_prize_once_the_stock_is_gone(run, stats, monkeypatch):
+    stats["big_prizes_given"] = current_settings().daily_big_prizes
+    monkeypatch.setattr(randomizer.random, "random", lambda: 0.0)
+
+    async def scenario():
+        return await check_win()
+
+    assert run(scenario())[2] == "small"
@@ -0,0 +1,94 @@
+"""
+Redemption desk: a prize is handed out once, lookups never show a stale card.
+"""
+import asyncio
+import sqlite3
+
+import pytest
+
+from bot.database import init_db, save_registration, update_participant, redeem_prize, archive_participants
+from bot.handlers import redeem
+
+STAFF_ID = next(iter(redeem.current_campaign().staff_ids))
+
+
+class FakeMessage:
+    def __init__(self):
+        self.edits = []
+
+    async def edit_text(self, text, **kwargs):
+        self.edits.append(text)
+
+
+class FakeCallback:
+    def __init__(self, data: str):
+        self.data = data
+        self.from_user = type("User", (), {"id": STAFF_ID})()
+        self.message = FakeMessage()
+        self.answers = []
+
+    async def answer(self, text=None, **kwargs):
+        self.answers.append(text)
+
+
+async def winner(telegram_id: int) -> int:
+    number = await save_registration(telegram_id, "user", "Анна", f"+7999000000{telegram_id}", "/p.jpg")
+    await update_participant(telegram_id, is_winner=1, prize="Брелок", prize_type="small")
+    return number
+
+
+def test_concurrent_redeem_hands_out_once(run):
+    async def scenario():
+        number = await winner(1)
+        results = await asyncio.gather(*(redeem_prize(number, STAFF_ID) for _ in range(5)))
+        return [status for status, _ in results]
+
+    statuses = run(scenario())
+    assert statuses.count("redeemed") == 1
+    assert statuses.count("already_redeemed") == 4
+
+
+def test_archived_winner_redeemed_once(run, campaign):
+    number = run(winner(1))
+    # A winner of a previous day lives in the archive
+    conn = sqlite3.connect(campaign.database_path)
+    conn.execute("UPDATE participants SET created_at = datetime('now', '-1 day')")
+    conn.commit()
+    conn.close()
+
+    async def scenario():
+        assert await archive_participants() == 1
+        return await redeem_prize(number, STAFF_ID), await redeem_prize(number, STAFF_ID)
+
+    (first, card), (second, _) = run(scenario())
+    assert first == "redeemed" and card["redeemed_by"] == STAFF_ID
+    assert second == "already_redeemed"
+
+
+def test_redeem_evicts_cached_card(run):
+    async def scenario():
+        number = await winner(1)
+        card = await redeem.lookup_participant(number)
+        assert card["redeemed_at"] is None
+
+        callback = FakeCallback(f"redeem:{number}")
+        await redeem.redeem_callback(callback)
+        assert callback.answers == ["Приз выдан"]
+
+        # Without eviction the 30s cache would still offer the redeem button
+        assert (await redeem.lookup_participant(number))["redeemed_at"] is not None
+
+    run(scenario())
+
+
+def test_duplicate_numbers_stop_startup(run, campaign):
+    conn = sqlite3.connect(campaign.database_path)
+    conn.execute("DROP INDEX idx_participants_number")
+    conn.executemany(
+        "INSERT INTO participants (telegram_id, participant_number) VALUES (?, 1)", [(1,), (2,)]
+    )
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(RuntimeError, match="#1 x2"):
+        run(init_db())
@@ -0,0 +1,111 @@
+"""
+Registration must never touch the record of someone who already drew.
+"""
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from bot.database import (
+    save_registration,
+    update_participant,
+    get_participant_by_number,
+    get_participant_by_phone,
+    redeem_prize
+)
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+async def draw(telegram_id: int, name: str, phone: str) -> int:
+    number = await save_registration(telegram_id, "user", name, phone, "/photos/first.jpg")
+    await update_participant(telegram_id, is_winner=1, prize="Плед", prize_type="big")
+    return number
+
+
+def test_second_registration_keeps_finished_record(run):
+    async def scenario():
+        number = await draw(1, "Анна", "+79990000001")
+        await save_registration(2, "other", "Иван", "+79990000002", "/photos/other.jpg")
+
+        # The winner runs the journey again with different details
+        again = await save_registration(1, "user", "Подставной", "+79990000099", "/photos/second.jpg")
+
+        assert again == number
+        winner = await get_participant_by_number(number)
+        assert winner["telegram_id"] == 1
+        assert winner["name"] == "Анна"
+        assert winner["photo_path"] == "/photos/first.jpg"
+        assert (await get_participant_by_phone("+79990000001"))["telegram_id"] == 1
+        assert (await redeem_prize(number, staff_id=7))[0] == "redeemed"
+
+    run(scenario())
+
+
+def test_registration_before_draw_keeps_its_number(run):
+    async def scenario():
+        first = await save_registration(1, "user", "Анна", "+79990000001", "/photos/a.jpg")
+        await save_registration(2, "other", "Иван", "+79990000002", "/photos/b.jpg")
+        # A new photo before the draw updates the row but not the number
+        assert await save_registration(1, "user", "Анна", "+79990000001", "/photos/c.jpg") == first
+
+    run(scenario())
+
+
+def test_start_refuses_buffered_rerun_after_draw(run, monkeypatch):
+    import bot.handlers.start as start
+    from bot.utils.membership import load_membership
+
+    monkeypatch.setattr(start, "BUFFER_REGISTRATION", True)
+
+    async def scenario():
+        number = await draw(1, "Анна", "+79990000001")
+        await load_membership()
+
+        bot = FakeBot()
+        state = FSMContext(storage=MemoryStorage(), key=StorageKey(bot_id=1, chat_id=1, user_id=1))
+        await start.begin_registration(bot, 1, 1, "user", state)
+
+        assert await state.get_state() is None
+        assert f"Ваш номер: {number}" in bot.sent[-1][1]
+
+        # Someone new still starts the journey
+        newcomer = FSMContext(storage=MemoryStorage(), key=StorageKey(bot_id=1, chat_id=2, user_id=2))
+        await start.begin_registration(bot, 2, 2, "new", newcomer)
+        assert await newcomer.get_state() == start.RegistrationStates.waiting_for_name.state
+
+    run(scenario())
+
+
+def test_phone_lookup_uses_the_phone_key(run, campaign):
+    import sqlite3
+    from bot.database import init_db
+
+    async def register():
+        await draw(1, "Анна", "+7 (999) 000-00-01")
+        await save_registration(2, "other", "Иван", None, "/photos/b.jpg")
+        await update_participant(2, phone="8 999 000 00 02", prize_type="small")
+
+    run(register())
+    # A row written before the column existed gets its key at the next start
+    conn = sqlite3.connect(campaign.database_path)
+    conn.execute("UPDATE participants SET phone_key = NULL WHERE telegram_id = 1")
+    conn.commit()
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM participants WHERE phone_key = ? AND prize_type IS NOT NULL", ("x",)
+    ).fetchall()
+    conn.close()
+    assert "idx_participants_phone_key" in str(plan)
+
+    async def lookup():
+        await init_db()
+        return await get_participant_by_phone("79990000001"), await get_participant_by_phone("+79990000002")
+
+    first, second = run(lookup())
+    assert first["telegram_id"] == 1 and first["phone_key"] == "9990000001"
+    assert second["telegram_id"] == 2
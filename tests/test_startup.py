@@ -0,0 +1,46 @@
+"""
+Config checks: a channel list the subscription step cannot use stops the boot.
+"""
+import dataclasses
+
+import pytest
+
+from bot.utils import startup
+from bot.utils.startup import check_config, ConfigError
+
+CHANNEL = {"id": "@news_channel", "url": "https://t.me/news_channel", "name": "Новости", "button": "Подписаться"}
+
+
+@pytest.fixture
+def configure(monkeypatch, campaign):
+    """Run check_config against the test campaign with the given channels."""
+    monkeypatch.setattr(startup, "BOT_TOKEN", "123456:" + "a" * 35)
+
+    def configure(*channels):
+        monkeypatch.setattr(startup, "CAMPAIGNS", {
+            campaign.slug: dataclasses.replace(campaign, channels=tuple(channels))
+        })
+        return check_config()
+
+    return configure
+
+
+def test_numeric_channel_id_is_accepted(configure):
+    warnings = configure({**CHANNEL, "id": -1001234567890})
+    assert not any("neither @username" in warning for warning in warnings)
+
+
+def test_misnamed_channel_id_is_a_warning(configure):
+    warnings = configure({**CHANNEL, "id": "news"})
+    assert any("neither @username" in warning for warning in warnings)
+
+
+@pytest.mark.parametrize("channel", [
+    {key: value for key, value in CHANNEL.items() if key != "button"},
+    {**CHANNEL, "chat": "@news_channel"},
+    {**CHANNEL, "url": "javascript:alert(1)"},
+    {**CHANNEL, "verify": "yes"},
+])
+def test_invalid_channel_stops_startup(configure, channel):
+    with pytest.raises(ConfigError, match="subscription channels are invalid"):
+        configure(channel)
@@ -0,0 +1,44 @@
+"""
+Storage channel forwarding: a rejected album must not take the good photos down with it.
+"""
+import time
+
+from aiogram.exceptions import TelegramBadRequest
+
+from bot.database import get_due_outbox
+from bot.utils import storage_forwarder
+from bot.utils.storage_forwarder import PendingForward
+
+
+class FakeBot:
+    def __init__(self, bad: set[str]):
+        self.bad = bad
+        self.albums = 0
+        self.photos = []
+
+    async def send_media_group(self, chat_id, media):
+        self.albums += 1
+        if any(item.media in self.bad for item in media):
+            raise TelegramBadRequest(method=None, message="Bad Request: wrong file identifier")
+
+    async def send_photo(self, chat_id, photo, caption):
+        if photo in self.bad:
+            raise TelegramBadRequest(method=None, message="Bad Request: wrong file identifier")
+        self.photos.append(photo)
+
+
+def test_rejected_album_is_sent_one_by_one(run, monkeypatch):
+    monkeypatch.setattr(storage_forwarder, "STORAGE_CHANNEL_ID", "-1001")
+    bot = FakeBot(bad={"f2"})
+    batch = [PendingForward(f"f{n}", f"#{n}") for n in range(1, 5)]
+
+    async def scenario():
+        delivered = await storage_forwarder._send_batch(bot, batch)
+        return delivered, await get_due_outbox(time.time() + 3600)
+
+    delivered, outbox = run(scenario())
+    # No retries of the same album, the bad photo is dropped rather than queued forever
+    assert bot.albums == 1
+    assert bot.photos == ["f1", "f3", "f4"]
+    assert delivered is False
+    assert outbox == []